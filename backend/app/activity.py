@@ -0,0 +1,158 @@
+# app/activity.py
+"""
+Historial de cambios de tickets con escritura diferida (write-behind).
+
+Los servicios llaman a `activity_log.record(...)`, que sólo agrega a un
+buffer en memoria; un thread de fondo vuelca el buffer a `ticket_activity`
+con un INSERT multi-fila cada `ACTIVITY_FLUSH_INTERVAL` segundos o apenas
+se junten `ACTIVITY_FLUSH_SIZE` eventos.
+"""
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from enum import Enum
+
+from app.database import SessionLocal
+from app.repos import activity_repo
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "2.0"))
+ACTIVITY_FLUSH_SIZE = int(os.getenv("ACTIVITY_FLUSH_SIZE", "200"))
+ACTIVITY_BUFFER_MAX = int(os.getenv("ACTIVITY_BUFFER_MAX", "10000"))
+
+TRACKED_FIELDS = ("title", "description", "status", "priority", "project_id", "assigned_to_id")
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def snapshot(ticket) -> dict:
+    return {field: _json_value(getattr(ticket, field)) for field in TRACKED_FIELDS}
+
+
+def diff(before: dict, after: dict) -> dict:
+    return {
+        field: [before.get(field), after.get(field)]
+        for field in TRACKED_FIELDS
+        if before.get(field) != after.get(field)
+    }
+
+
+class ActivityLog:
+    def __init__(
+        self,
+        flush_interval: float = ACTIVITY_FLUSH_INTERVAL,
+        flush_size: int = ACTIVITY_FLUSH_SIZE,
+        max_size: int = ACTIVITY_BUFFER_MAX,
+        session_factory=SessionLocal,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.session_factory = session_factory
+
+        # Ring buffer: si el flush se atrasa, se descartan los eventos más viejos
+        self._buffer: deque[dict] = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        # serializa los flushes para no reordenar lotes
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    def record(self, ticket_id: int, owner_id: int, actor_id: int | None, action: str, changes: dict) -> None:
+        if action == "updated" and not changes:
+            return
+        row = {
+            "ticket_id": ticket_id,
+            "owner_id": owner_id,
+            "actor_id": actor_id,
+            "action": action,
+            "changes": changes,
+            "created_at": datetime.utcnow(),
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        if pending >= self.flush_size:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        return self._flush(lambda row: True)
+
+    def flush_ticket(self, ticket_id: int, owner_id: int) -> int:
+        """
+        Read-your-writes del historial de un ticket: vuelca sólo sus eventos;
+        los de los demás tickets siguen esperando el lote del thread de fondo.
+        """
+        return self._flush(lambda row: row["ticket_id"] == ticket_id and row["owner_id"] == owner_id)
+
+    def _flush(self, match) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows = [row for row in self._buffer if match(row)]
+                if len(rows) == len(self._buffer):
+                    self._buffer.clear()
+                elif rows:
+                    rest = [row for row in self._buffer if not match(row)]
+                    self._buffer.clear()
+                    self._buffer.extend(rest)
+            if not rows:
+                return 0
+
+            db = self.session_factory()
+            try:
+                activity_repo.bulk_insert(db, rows)
+            except Exception:
+                db.rollback()
+                logger.exception("activity: falló el flush de %s eventos, se reintenta", len(rows))
+                with self._lock:
+                    # los devolvemos al frente para el próximo intento, sin pisar lo que
+                    # llegó mientras tanto: si no entran, se pierden los más viejos
+                    free = self._buffer.maxlen - len(self._buffer)
+                    keep = rows[len(rows) - free:] if free > 0 else []
+                    self.dropped += len(rows) - len(keep)
+                    self._buffer.extendleft(reversed(keep))
+                return 0
+            finally:
+                db.close()
+            return len(rows)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="activity-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+activity_log = ActivityLog()
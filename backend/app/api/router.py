@@ -1,6 +1,6 @@
 # app/api/router.py
 from fastapi import APIRouter
-from app.api.routes import core, auth, users, projects, tickets
+from app.api.routes import core, auth, users, projects, tickets, jobs, attachments, batch
 
 api_router = APIRouter()
 
@@ -9,3 +9,6 @@ api_router.include_router(auth.router)
 api_router.include_router(users.router)
 api_router.include_router(projects.router)
 api_router.include_router(tickets.router)
+api_router.include_router(jobs.router)
+api_router.include_router(attachments.router)
+api_router.include_router(batch.router)
@@ -1 +1 @@
-from . import core, auth, users, projects, tickets
+from . import core, auth, users, projects, tickets, jobs, attachments, batch
@@ -0,0 +1,70 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import get_db
+from app.deps import get_current_user
+from app.storage import get_blob_store
+from app.uploads import stream_upload
+import app.services.attachments_service as attachments_service
+import app.services.tickets_service as tickets_service
+
+router = APIRouter(prefix="/tickets/{ticket_id}/attachments", tags=["Attachments"])
+
+@router.post("", response_model=schemas.TicketAttachmentRead)
+async def upload_attachment(
+    ticket_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    # validamos antes de leer el body para no escribir a disco en vano
+    await run_in_threadpool(tickets_service.get_ticket, db, current_user.id, ticket_id)
+
+    store = get_blob_store()
+    blob = await stream_upload(request, store)
+    try:
+        return await run_in_threadpool(
+            attachments_service.create_attachment, db, store, current_user.id, ticket_id, blob
+        )
+    finally:
+        # si no llegó a `place`, el temporal no sirve más
+        store.discard(blob)
+
+@router.get("", response_model=List[schemas.TicketAttachmentRead])
+def list_attachments(
+    ticket_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return attachments_service.list_attachments(db, current_user.id, ticket_id)
+
+@router.get("/{attachment_id}")
+def download_attachment(
+    ticket_id: int,
+    attachment_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    attachment, path = attachments_service.get_attachment_path(db, get_blob_store(), current_user.id, ticket_id, attachment_id)
+    # FileResponse soporta Range y usa http.response.pathsend (zero-copy) si el server lo ofrece
+    return FileResponse(
+        path,
+        media_type=attachment.content_type,
+        filename=attachment.filename,
+        headers={"ETag": f'"{attachment.sha256}"', "Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+@router.delete("/{attachment_id}", response_model=schemas.TicketAttachmentRead)
+def delete_attachment(
+    ticket_id: int,
+    attachment_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return attachments_service.delete_attachment(db, get_blob_store(), current_user.id, ticket_id, attachment_id)
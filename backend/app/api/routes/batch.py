@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.batch import run_batch, validate_batch
+from app.database import get_db
+from app.deps import get_current_user
+
+router = APIRouter(tags=["Batch"])
+
+@router.post("/batch", response_model=schemas.BatchResponse)
+async def batch(
+    batch_in: schemas.BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    validate_batch(batch_in.requests)
+    # cada sub-request abre su propia sesión: liberamos la conexión de ésta
+    db.close()
+    return {"responses": await run_batch(request, batch_in.requests, current_user)}
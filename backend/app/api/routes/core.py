@@ -1,4 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.compression import compression_stats
+from app.database import check_ready
+from app.deps import get_current_user
 
 router = APIRouter(tags=["Core"])
 
@@ -7,5 +13,19 @@ def read_root():
     return {"message": "Bienvenido a IssueHub API"}
 
 @router.get("/health")
+@router.get("/health/live")
 def health_check():
+    # liveness: el proceso responde; no mira la base
     return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness_check():
+    ready, checks = await run_in_threadpool(check_ready)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ok" if ready else "unavailable", "databases": checks},
+    )
+
+@router.get("/metrics/compression", dependencies=[Depends(get_current_user)])
+def compression_metrics():
+    return compression_stats.snapshot()
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import get_db
+from app.deps import get_current_user
+import app.services.jobs_service as jobs_service
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+@router.get("/{job_id}", response_model=schemas.JobRead)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return jobs_service.get_job(db, current_user.id, job_id)
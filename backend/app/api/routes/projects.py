@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
+from typing import List, Optional
 
 from app import models, schemas
 from app.database import get_db
-from app.deps import get_current_user
+from app.deps import get_current_user, get_id_list, normalize_ids
 import app.services.projects_service as projects_service
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
@@ -22,9 +23,14 @@ def list_projects(
     limit: int = Query(5, ge=1, le=100),
     sort_field: str = Query("id"),
     sort_direction: str = Query("asc"),
+    ids: Optional[List[int]] = Depends(get_id_list),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    if ids is not None:
+        items, missing = projects_service.get_projects_by_ids(db, current_user.id, ids)
+        return {"items": items, "total": len(items), "missing": missing}
+
     items, total = projects_service.list_projects(
         db=db,
         owner_id=current_user.id,
@@ -35,6 +41,15 @@ def list_projects(
     )
     return {"items": items, "total": total}
 
+@router.post("/lookup", response_model=schemas.ProjectListResponse)
+def lookup_projects(
+    body: schemas.IdListRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    items, missing = projects_service.get_projects_by_ids(db, current_user.id, normalize_ids(body.ids))
+    return {"items": items, "total": len(items), "missing": missing}
+
 @router.get("/{project_id}", response_model=schemas.ProjectWithTickets)
 def get_project(
     project_id: int,
@@ -55,7 +70,13 @@ def update_project(
 @router.delete("/{project_id}", response_model=schemas.ProjectRead)
 def delete_project(
     project_id: int,
+    response: Response,
+    cascade: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return projects_service.delete_project(db, current_user.id, project_id)
+    project = projects_service.delete_project(db, current_user.id, project_id, cascade=cascade)
+    if project.deleting_at is not None:
+        # el borrado sigue en background; el avance se ve en GET /projects/{id} o /jobs/{purge_job_id}
+        response.status_code = status.HTTP_202_ACCEPTED
+    return project
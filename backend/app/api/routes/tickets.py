@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 from app import models, schemas
+from app.enums import TicketStatus, TicketPriority
 from app.database import get_db
-from app.deps import get_current_user
+from app.deps import get_assignee_filter, get_current_user, get_current_user_id_detached, get_id_list, normalize_ids
+from app.events import sse_stream
 import app.services.tickets_service as tickets_service
+import app.services.sync_service as sync_service
+import app.services.archive_service as archive_service
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
-@router.post("", response_model=schemas.TicketRead)
+@router.post("", response_model=schemas.TicketCreateResponse)
 def create_ticket(
     ticket: schemas.TicketCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return tickets_service.create_ticket(db, current_user.id, ticket)
+    created = tickets_service.create_ticket(db, current_user.id, ticket)
+    duplicates = tickets_service.find_similar(db, current_user.id, created, scope="project")
+    return {**schemas.TicketRead.model_validate(created).model_dump(), "possible_duplicates": duplicates}
 
 @router.get("", response_model=schemas.PaginatedTicketResponse)
 def list_tickets(
@@ -25,10 +34,34 @@ def list_tickets(
     sort_field: str = Query("id"),
     sort_direction: str = Query("desc"),
     project_id: Optional[int] = Query(None),
+    status: List[TicketStatus] = Query([]),
+    priority: List[TicketPriority] = Query([]),
+    assigned_to_id: List[Optional[int]] = Depends(get_assignee_filter),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    updated_after: Optional[datetime] = Query(None),
+    updated_before: Optional[datetime] = Query(None),
+    facets: Optional[str] = Query(None, description="status,priority,assignee"),
+    include_archived: bool = Query(False),
+    ids: Optional[List[int]] = Depends(get_id_list),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    items, total = tickets_service.list_tickets(
+    # multi-get: con ?ids=... se ignoran paginado y filtros
+    if ids is not None:
+        items, missing = tickets_service.get_tickets_by_ids(db, current_user.id, ids)
+        return {"items": items, "total": len(items), "missing": missing}
+
+    filters = schemas.TicketFilters(
+        status=status,
+        priority=priority,
+        assigned_to_id=assigned_to_id,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+    )
+    items, total, facet_counts = tickets_service.list_tickets(
         db=db,
         owner_id=current_user.id,
         page=page,
@@ -37,8 +70,51 @@ def list_tickets(
         sort_field=sort_field,
         sort_direction=sort_direction,
         project_id=project_id,
+        filters=filters,
+        facets=[f.strip() for f in facets.split(",") if f.strip()] if facets else None,
+        include_archived=include_archived,
     )
-    return {"items": items, "total": total}
+    return {"items": items, "total": total, "facets": facet_counts}
+
+@router.get("/suggest", response_model=List[schemas.TicketSuggestion])
+def suggest_tickets(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return tickets_service.suggest_titles(db, current_user.id, q, limit)
+
+@router.get("/changes", response_model=schemas.ChangesResponse)
+def list_changes(
+    since: Optional[str] = Query(None, description="Token devuelto en next_token; vacío = desde el inicio"),
+    limit: int = Query(200, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return sync_service.list_changes(db, current_user.id, since, limit)
+
+@router.get("/stream")
+async def stream_ticket_events(
+    request: Request,
+    project_id: Optional[int] = Query(None),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    user_id: int = Depends(get_current_user_id_detached),
+):
+    return StreamingResponse(
+        sse_stream(request, user_id, project_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/lookup", response_model=schemas.PaginatedTicketResponse)
+def lookup_tickets(
+    body: schemas.IdListRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    items, missing = tickets_service.get_tickets_by_ids(db, current_user.id, normalize_ids(body.ids))
+    return {"items": items, "total": len(items), "missing": missing}
 
 @router.get("/{ticket_id}", response_model=schemas.TicketRead)
 def get_ticket(
@@ -48,6 +124,36 @@ def get_ticket(
 ):
     return tickets_service.get_ticket(db, current_user.id, ticket_id)
 
+@router.get("/{ticket_id}/similar", response_model=List[schemas.SimilarTicket])
+def list_similar_tickets(
+    ticket_id: int,
+    scope: str = Query("owner", description="owner | project"),
+    limit: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    ticket = tickets_service.get_ticket(db, current_user.id, ticket_id)
+    return tickets_service.find_similar(db, current_user.id, ticket, scope=scope, limit=limit)
+
+@router.get("/{ticket_id}/activity", response_model=schemas.PaginatedTicketActivityResponse)
+def list_ticket_activity(
+    ticket_id: int,
+    page: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    items, total = tickets_service.list_activity(db, current_user.id, ticket_id, page, limit)
+    return {"items": items, "total": total}
+
+@router.post("/{ticket_id}/restore", response_model=schemas.TicketRead)
+def restore_ticket(
+    ticket_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return archive_service.restore_ticket(db, current_user.id, ticket_id)
+
 @router.put("/{ticket_id}", response_model=schemas.TicketRead)
 def update_ticket(
     ticket_id: int,
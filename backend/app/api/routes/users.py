@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
+from typing import List, Optional
 
 from app import models, schemas
 from app.database import get_db
 from app.deps import get_current_user
+from app.enums import TicketStatus
 import app.services.users_service as users_service
+import app.services.tickets_service as tickets_service
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -16,6 +19,17 @@ def create_user(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
 def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
+@router.get("/me/assigned", response_model=schemas.AssignedTicketsResponse)
+def list_assigned_to_me(
+    status: List[TicketStatus] = Query([]),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    items, next_cursor = tickets_service.list_assigned_tickets(db, current_user.id, status, cursor, limit)
+    return {"items": items, "next_cursor": next_cursor, "open_count": current_user.assigned_open_count}
+
 @router.put("/update")
 def update_user(
     data: schemas.UserUpdate,
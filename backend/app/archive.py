@@ -0,0 +1,28 @@
+# app/archive.py
+# Archivado manual / cron: python -m app.archive [--days 90] [--batch-size 500]
+import argparse
+import logging
+
+from app.database import SessionLocal
+from app.logs import configure_logging
+from app.services import archive_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mueve tickets cerrados viejos a archived_tickets.")
+    parser.add_argument("--days", type=int, default=archive_service.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=archive_service.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    configure_logging()
+    db = SessionLocal()
+    try:
+        moved = archive_service.archive_closed_tickets(db, args.days, args.batch_size, args.max_batches)
+    finally:
+        db.close()
+    logging.getLogger(__name__).info("archive: %s tickets archivados", moved)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# app/assignments.py
+"""
+Contador de tickets abiertos asignados a cada usuario (`users.assigned_open_count`).
+
+Un listener `before_flush` calcula, para cada ticket creado, modificado o
+borrado por el ORM, cuánto cambia el contador del asignado anterior y del
+nuevo, y aplica los deltas con un UPDATE en la misma transacción. Los
+borrados masivos (purge de proyectos) ajustan el contador a mano con
+`apply_open_deltas`.
+"""
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.enums import TicketStatus
+from app.sharding import directory_connection
+
+
+def counts_as_open(assigned_to_id, status) -> bool:
+    return assigned_to_id is not None and status != TicketStatus.CLOSED
+
+
+def _previous(obj, attr: str):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attr)
+
+
+def apply_open_deltas(session: Session, deltas: dict[int, int]) -> None:
+    # users vive en el directorio: con sharding es otra base que la del ticket
+    conn = directory_connection(session)
+    for user_id, delta in deltas.items():
+        if delta:
+            conn.execute(
+                update(models.User)
+                .where(models.User.id == user_id)
+                .values(assigned_open_count=models.User.assigned_open_count + delta)
+            )
+
+
+@event.listens_for(Session, "before_flush")
+def _track_assigned_open(session: Session, flush_context, instances) -> None:
+    deltas: dict[int, int] = {}
+
+    def bump(assigned_to_id, status, delta):
+        if counts_as_open(assigned_to_id, status):
+            deltas[assigned_to_id] = deltas.get(assigned_to_id, 0) + delta
+
+    for obj in session.new:
+        if type(obj) is models.Ticket:
+            bump(obj.assigned_to_id, obj.status, 1)
+
+    for obj in session.dirty:
+        if type(obj) is models.Ticket and session.is_modified(obj, include_collections=False):
+            bump(_previous(obj, "assigned_to_id"), _previous(obj, "status"), -1)
+            bump(obj.assigned_to_id, obj.status, 1)
+
+    for obj in session.deleted:
+        if type(obj) is models.Ticket:
+            bump(_previous(obj, "assigned_to_id"), _previous(obj, "status"), -1)
+
+    if deltas:
+        apply_open_deltas(session, deltas)
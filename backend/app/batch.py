@@ -0,0 +1,165 @@
+# app/batch.py
+"""
+`POST /batch`: varias llamadas a la API en un solo round-trip.
+
+Cada sub-request se despacha directo al router de la app (sin volver a
+pasar por los middlewares) con su propio scope ASGI, así tiene su propia
+sesión (get_db) como cualquier request. La autenticación se hace una vez,
+en /batch: el usuario viaja en `scope["state"]` y get_current_user lo
+reutiliza sin decodificar el token ni volver a buscarlo.
+
+Los GET consecutivos corren en paralelo (hasta BATCH_CONCURRENCY a la
+vez). Una escritura espera a que terminen los anteriores y los siguientes
+esperan a que termine ella: el orden de las escrituras es el del batch.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+
+from fastapi import Request
+from starlette.datastructures import Headers
+from starlette.types import Message
+
+from app import models, schemas
+from app.exceptions import BadRequestError
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+READ_METHODS = {"GET"}
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+
+# streams, archivos y auth no entran en un batch
+EXCLUDED_ROUTES = [
+    re.compile(r"^/batch$"),
+    re.compile(r"^/token(/.*)?$"),
+    re.compile(r"^/logout$"),
+    re.compile(r"^/tickets/stream$"),
+    re.compile(r"^/tickets/\d+/attachments(/.*)?$"),
+]
+
+# lo que la sub-request hereda del request de /batch
+_INHERITED_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "scheme", "server", "client", "root_path", "app",
+    "starlette.exception_handlers", "fastapi_middleware_astack",
+)
+# headers que arma el batch, no el cliente
+_RESERVED_HEADERS = {"authorization", "content-length", "content-type", "host"}
+
+
+def validate_batch(subs: list[schemas.BatchSubRequest]) -> None:
+    if not subs:
+        raise BadRequestError("El batch no tiene requests.")
+    if len(subs) > BATCH_MAX_REQUESTS:
+        raise BadRequestError(
+            f"Se pueden enviar como máximo {BATCH_MAX_REQUESTS} requests por batch.",
+            extra={"max_requests": BATCH_MAX_REQUESTS},
+        )
+    for index, sub in enumerate(subs):
+        path = sub.path.partition("?")[0]
+        if sub.method.upper() not in ALLOWED_METHODS:
+            raise BadRequestError(f"Método no soportado en batch: {sub.method}.", extra={"index": index})
+        if not path.startswith("/"):
+            raise BadRequestError("El path de cada request debe empezar con '/'.", extra={"index": index})
+        if any(pattern.match(path) for pattern in EXCLUDED_ROUTES):
+            raise BadRequestError(f"{path} no se puede usar dentro de un batch.", extra={"index": index})
+
+
+def _decode_body(content_type: str | None, body: bytes):
+    if not body:
+        return None
+    if content_type and content_type.startswith("application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def _dispatch(request: Request, sub: schemas.BatchSubRequest, user: models.User) -> dict:
+    path, _, query = sub.path.partition("?")
+    body = b"" if sub.body is None else json.dumps(sub.body).encode()
+
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in (sub.headers or {}).items()
+        if name.lower() not in _RESERVED_HEADERS
+    ]
+    headers.append((b"content-length", str(len(body)).encode()))
+    if sub.body is not None:
+        headers.append((b"content-type", b"application/json"))
+    authorization = request.headers.get("authorization")
+    if authorization:
+        headers.append((b"authorization", authorization.encode("latin-1")))
+
+    scope = {key: request.scope[key] for key in _INHERITED_SCOPE_KEYS if key in request.scope}
+    scope.update(
+        method=sub.method.upper(),
+        path=path,
+        raw_path=path.encode(),
+        query_string=query.encode(),
+        headers=headers,
+        state={**request.scope.get("state", {}), "auth_user": user},
+    )
+
+    body_sent = False
+
+    async def receive() -> Message:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status_code = 500
+    response_headers = Headers()
+    response_body = bytearray()
+
+    async def send(message: Message) -> None:
+        nonlocal status_code, response_headers
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            response_headers = Headers(raw=message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            response_body.extend(message.get("body", b""))
+
+    try:
+        await request.app.router(scope, receive, send)
+    except Exception:
+        # el handler genérico de errors.py vive en un middleware que acá no pasamos
+        logger.exception("batch: falló %s %s", scope["method"], path)
+        return {
+            "status": 500,
+            "headers": {"content-type": "application/json"},
+            "body": {"detail": "Unexpected server error", "code": "INTERNAL_SERVER_ERROR", "path": path},
+        }
+
+    content_type = response_headers.get("content-type")
+    return {
+        "status": status_code,
+        "headers": {name: value for name, value in response_headers.items() if name != "content-length"},
+        "body": _decode_body(content_type, bytes(response_body)),
+    }
+
+
+async def run_batch(request: Request, subs: list[schemas.BatchSubRequest], user: models.User) -> list[dict]:
+    """Ejecuta las sub-requests y devuelve las respuestas en el mismo orden."""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    results: list[dict | None] = [None] * len(subs)
+
+    async def run(index: int) -> None:
+        async with semaphore:
+            results[index] = await _dispatch(request, subs[index], user)
+
+    reads = []
+    for index, sub in enumerate(subs):
+        if sub.method.upper() in READ_METHODS:
+            reads.append(run(index))
+            continue
+        # escritura: barrera entre lo anterior y lo que sigue
+        await asyncio.gather(*reads)
+        reads = []
+        await run(index)
+    await asyncio.gather(*reads)
+    return results
@@ -0,0 +1,89 @@
+# app/changes.py
+"""
+Secuencia monotónica de cambios por owner, para el delta sync.
+
+Un listener `before_flush` estampa `change_seq` en cada ticket/proyecto
+creado o modificado y deja un `Tombstone` por cada borrado. El contador
+vive en `change_counters` (una fila por owner): el UPDATE ... RETURNING
+bloquea sólo la fila de ese owner hasta el commit, así los números quedan
+en orden de commit para cada usuario.
+"""
+import base64
+import binascii
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.exceptions import BadRequestError
+from app.sharding import owner_connection
+
+TRACKED_MODELS = {
+    models.Ticket: "ticket",
+    models.Project: "project",
+}
+
+
+def reserve_seqs(session: Session, owner_id: int, count: int) -> int:
+    """Reserva `count` números consecutivos para el owner; devuelve el primero."""
+    conn = owner_connection(session, owner_id)
+    new_value = conn.execute(
+        update(models.ChangeCounter)
+        .where(models.ChangeCounter.owner_id == owner_id)
+        .values(value=models.ChangeCounter.value + count)
+        .returning(models.ChangeCounter.value)
+    ).scalar()
+    if new_value is None:
+        conn.execute(insert(models.ChangeCounter).values(owner_id=owner_id, value=count))
+        new_value = count
+    return new_value - count + 1
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session: Session, flush_context, instances) -> None:
+    pending: dict[int, list] = {}
+
+    for obj in session.new:
+        if type(obj) in TRACKED_MODELS:
+            pending.setdefault(obj.owner_id, []).append(("upsert", obj))
+
+    for obj in session.dirty:
+        if type(obj) in TRACKED_MODELS and session.is_modified(obj, include_collections=False):
+            pending.setdefault(obj.owner_id, []).append(("upsert", obj))
+
+    for obj in session.deleted:
+        if type(obj) in TRACKED_MODELS:
+            pending.setdefault(obj.owner_id, []).append(("delete", obj))
+
+    for owner_id, items in pending.items():
+        seq = reserve_seqs(session, owner_id, len(items))
+        for kind, obj in items:
+            if kind == "upsert":
+                obj.change_seq = seq
+            else:
+                session.add(models.Tombstone(
+                    owner_id=owner_id,
+                    entity_type=TRACKED_MODELS[type(obj)],
+                    entity_id=obj.id,
+                    change_seq=seq,
+                ))
+            seq += 1
+
+
+# -------- Tokens de sincronización --------
+
+def encode_token(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"v1:{seq}".encode()).decode().rstrip("=")
+
+
+def decode_token(token: str | None) -> int:
+    if not token:
+        return 0
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        version, seq = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+        if version != "v1":
+            raise ValueError(version)
+        return int(seq)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise BadRequestError("Token de sincronización inválido.")
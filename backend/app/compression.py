@@ -0,0 +1,359 @@
+# app/compression.py
+import os
+import threading
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli / zstd son opcionales: si el paquete no está instalado, ese encoding
+# simplemente no se negocia y caemos a gzip.
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+# Overrides por ruta: "/tickets=4,/projects=5"
+COMPRESSION_ROUTE_LEVELS = os.getenv("COMPRESSION_ROUTE_LEVELS", "")
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "application/xml",
+)
+# SSE no se bufferea ni se comprime: cada evento tiene que salir al instante.
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+def parse_route_levels(raw: str) -> dict[str, int]:
+    levels = {}
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        prefix, level = part.split("=", 1)
+        try:
+            levels[prefix.strip()] = int(level)
+        except ValueError:
+            continue
+    return levels
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Devuelve {encoding: q} ignorando los que tienen q=0."""
+    result = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            result[name.lower()] = q
+    return result
+
+
+def available_encodings() -> list[str]:
+    # Orden de preferencia a igualdad de q
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = parse_accept_encoding(accept_encoding)
+    if not accepted:
+        return None
+    best, best_q = None, 0.0
+    for enc in available_encodings():
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+# -------- Compresores (interfaz común: compress / flush / finish) --------
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._c = zlib.compressobj(max(1, min(level, 9)), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._c = brotli.Compressor(quality=max(0, min(level, 11)))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._c = zstandard.ZstdCompressor(level=max(1, min(level, 22))).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+_COMPRESSORS = {
+    "gzip": _GzipCompressor,
+    "br": _BrotliCompressor,
+    "zstd": _ZstdCompressor,
+}
+
+
+# -------- Métricas --------
+
+class CompressionStats:
+    """Acumula bytes y tiempo de CPU por ruta para poder ajustar el nivel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def record(self, route: str, encoding: str, original: int, compressed: int, cpu_seconds: float) -> None:
+        with self._lock:
+            s = self._routes.setdefault(route, {
+                "responses": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "cpu_ms": 0.0,
+                "encodings": {},
+            })
+            s["responses"] += 1
+            s["bytes_in"] += original
+            s["bytes_out"] += compressed
+            s["cpu_ms"] += cpu_seconds * 1000
+            s["encodings"][encoding] = s["encodings"].get(encoding, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = {}
+            for route, s in self._routes.items():
+                saved = s["bytes_in"] - s["bytes_out"]
+                out[route] = {
+                    **s,
+                    "encodings": dict(s["encodings"]),
+                    "bytes_saved": saved,
+                    "ratio": round(s["bytes_out"] / s["bytes_in"], 4) if s["bytes_in"] else None,
+                    "cpu_ms": round(s["cpu_ms"], 3),
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+compression_stats = CompressionStats()
+
+
+# -------- Middleware ASGI --------
+
+class CompressionMiddleware:
+    """
+    Compresión negociada (zstd / br / gzip) con umbral mínimo.
+    Bufferea sólo hasta alcanzar `minimum_size`; a partir de ahí comprime
+    y emite en streaming, haciendo flush por cada chunk del body.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        level: int = COMPRESSION_LEVEL,
+        route_levels: dict[str, int] | None = None,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.route_levels = route_levels if route_levels is not None else parse_route_levels(COMPRESSION_ROUTE_LEVELS)
+        self.stats = stats
+
+    def level_for(self, path: str) -> int:
+        best_prefix = ""
+        level = self.level
+        for prefix, lvl in self.route_levels.items():
+            if path.startswith(prefix) and len(prefix) > len(best_prefix):
+                best_prefix, level = prefix, lvl
+        return level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            send=send,
+            encoding=encoding,
+            level=self.level_for(scope["path"]),
+            minimum_size=self.minimum_size,
+            scope=scope,
+            stats=self.stats,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int, scope: Scope, stats: CompressionStats):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.scope = scope
+        self.stats = stats
+
+        self.start_message: Message | None = None
+        self.buffer = bytearray()
+        self.passthrough = False
+        self.compressor = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+
+    def _should_compress(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        # descargas de archivos: que salgan tal cual (zero-copy / ranges)
+        if headers.get("content-disposition", "").startswith("attachment"):
+            return False
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(EXCLUDED_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        t0 = time.process_time()
+        out = self.compressor.compress(data)
+        out += self.compressor.finish() if final else self.compressor.flush()
+        self.cpu += time.process_time() - t0
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        return out
+
+    async def _start_compressed(self, final: bool) -> None:
+        self.compressor = _COMPRESSORS[self.encoding](self.level)
+        body = self._compress(bytes(self.buffer), final)
+        self.buffer.clear()
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if final:
+            headers["Content-Length"] = str(len(body))
+        elif "content-length" in headers:
+            del headers["content-length"]
+
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": body, "more_body": not final})
+
+    async def _flush_plain(self, more_body: bool) -> None:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": more_body})
+        self.buffer.clear()
+
+    async def send(self, message: Message) -> None:
+        msg_type = message["type"]
+
+        if msg_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._should_compress(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if msg_type != "http.response.body":
+            # p.ej. http.response.pathsend: no hay body que comprimir
+            if self.compressor is None:
+                self.passthrough = True
+                await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self._send({
+                "type": "http.response.body",
+                "body": self._compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+            if not more_body:
+                self._record()
+            return
+
+        self.buffer.extend(body)
+
+        if len(self.buffer) < self.minimum_size:
+            if more_body:
+                # Seguimos juntando hasta saber si vale la pena comprimir
+                return
+            self.passthrough = True
+            await self._flush_plain(more_body=False)
+            return
+
+        await self._start_compressed(final=not more_body)
+        if not more_body:
+            self._record()
+
+    def _record(self) -> None:
+        # Agrupamos por template de ruta ("/projects/{project_id}") y no por path real
+        route = self.scope.get("route")
+        name = getattr(route, "path", None) or self.scope["path"]
+        self.stats.record(name, self.encoding, self.bytes_in, self.bytes_out, self.cpu)
@@ -1,20 +1,162 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
+from app.logs import SQL_ECHO, instrument_engine
+from app.sharding import DIRECTORY, IdAllocator, OwnerShardedSession, ShardMap, parse_shard_urls
+
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql://issuehub_user:issuehub_pass@db:5432/issuehub",
 )
+# Sharding por owner: "s1=postgresql://...,s2=postgresql://..."; vacío = una sola base
+SHARD_URLS = os.getenv("SHARD_URLS", "")
+
+# Pool por engine; al arrancar se abren DB_POOL_WARM conexiones para que los
+# primeros requests no paguen el connect
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "2"))
+# con 0 la API no toca el schema al arrancar (queda para python -m app.migrate)
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "1") == "1"
+
+logger = logging.getLogger(__name__)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(DATABASE_URL, echo=True)
+def _create_engine(url: str):
+    # create_engine no conecta: la primera conexión se abre en el lifespan o en el primer request
+    kwargs = {}
+    if make_url(url).get_backend_name() != "sqlite":
+        kwargs = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT, "pool_pre_ping": True}
+    # echo sólo para depurar a mano (SQL_ECHO=1); el log normal de SQL es muestreado (app/logs.py)
+    eng = create_engine(url, echo=SQL_ECHO, **kwargs)
+    instrument_engine(eng)
+    return eng
+
+
+# con sharding, DATABASE_URL es el directorio global
+engine = _create_engine(DATABASE_URL)
+
+shard_engines = {name: _create_engine(url) for name, url in parse_shard_urls(SHARD_URLS).items()}
+shard_map = ShardMap(list(shard_engines) or ["default"], engine)
+
+if shard_engines:
+    SessionLocal = sessionmaker(
+        class_=OwnerShardedSession,
+        shards={DIRECTORY: engine, **shard_engines},
+        shard_map=shard_map,
+        id_allocator=IdAllocator(engine, shard_engines),
+        autoflush=False,
+        autocommit=False,
+    )
+else:
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def all_engines() -> list:
+    """Directorio + shards (cada base tiene el schema completo)."""
+    return [engine, *shard_engines.values()]
+
+
+def _engine_name(eng) -> str:
+    for name, shard_engine in shard_engines.items():
+        if shard_engine is eng:
+            return name
+    return "directory" if shard_engines else "default"
+
+
+def create_schema() -> None:
+    for eng in all_engines():
+        Base.metadata.create_all(bind=eng)
+
+
+def warm_pool(n: int = DB_POOL_WARM) -> int:
+    """Abre `n` conexiones por engine (a la vez, para que sean distintas) y las devuelve al pool."""
+    opened = 0
+    for eng in all_engines():
+        connections = []
+        try:
+            for _ in range(min(n, DB_POOL_SIZE)):
+                connections.append(eng.connect())
+        finally:
+            for conn in connections:
+                conn.close()
+        opened += len(connections)
+    return opened
+
+
+_schema_ready = False
+
+
+def init_database() -> bool:
+    """
+    Schema + warm-up del pool, desde el lifespan. Si la base no responde la
+    API arranca igual: /health/ready da 503 y reintenta en cada consulta.
+    """
+    global _schema_ready
+    try:
+        if DB_CREATE_SCHEMA and not _schema_ready:
+            create_schema()
+        _schema_ready = True
+        opened = warm_pool()
+    except SQLAlchemyError as exc:
+        logger.warning("database: no se pudo inicializar (%s)", exc.__class__.__name__)
+        return False
+    logger.info("database: %s conexiones precalentadas", opened)
+    return True
+
+
+def _pool_status(eng) -> dict:
+    pool = eng.pool
+    if not hasattr(pool, "checkedout"):
+        return {"class": type(pool).__name__}
+    status = {"class": type(pool).__name__, "checked_out": pool.checkedout(), "checked_in": pool.checkedin()}
+    if hasattr(pool, "size"):
+        # max_overflow -1 = sin tope
+        max_overflow = getattr(pool, "_max_overflow", -1)
+        status["size"] = pool.size()
+        status["overflow"] = pool.overflow()
+        status["saturated"] = max_overflow >= 0 and pool.checkedout() >= pool.size() + max_overflow
+    return status
+
+
+def check_ready() -> tuple[bool, dict]:
+    """Ping + estado del pool de cada engine, para /health/ready."""
+    ready = _schema_ready or init_database()
+
+    checks = {}
+    for eng in all_engines():
+        check = {"pool": _pool_status(eng)}
+        if check["pool"].get("saturated"):
+            # con el pool lleno el ping esperaría DB_POOL_TIMEOUT: no estamos listos
+            check["ok"] = False
+        else:
+            started = time.perf_counter()
+            try:
+                with eng.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                check["ok"] = True
+            except SQLAlchemyError as exc:
+                check["ok"] = False
+                check["error"] = exc.__class__.__name__
+            check["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        ready = ready and check["ok"]
+        checks[_engine_name(eng)] = check
+    return ready, checks
+
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def dispose_engines() -> None:
+    for eng in all_engines():
+        eng.dispose()
 
 
 def get_db():
@@ -1,21 +1,26 @@
 # app/deps.py
-from fastapi import Depends, HTTPException, status
+import os
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app import models
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.auth import decode_access_token
+from app.exceptions import BadRequestError
+from app.sharding import bind_owner
+
+# Tope de ids por multi-get (GET ?ids=... / POST .../lookup)
+MULTI_GET_MAX_IDS = int(os.getenv("MULTI_GET_MAX_IDS", "100"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
 def get_user_by_username(db: Session, username: str) -> models.User | None:
     return db.query(models.User).filter(models.User.username == username).first()
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> models.User:
+def _authenticate(token: str, db: Session) -> models.User:
     username = decode_access_token(token)
     if username is None:
         raise HTTPException(
@@ -32,3 +37,62 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     return user
+
+
+def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> models.User:
+    # ya autenticado antes en este request: sub-request de POST /batch (app/batch.py)
+    # o request con Idempotency-Key (app/idempotency.py)
+    auth_user = getattr(request.state, "auth_user", None)
+    if auth_user is not None:
+        user = db.merge(auth_user, load=False)
+    else:
+        user = _authenticate(token, db)
+    # de acá en más las queries del request van al shard del usuario
+    bind_owner(db, user.id)
+    return user
+
+
+def get_current_user_id_detached(token: str = Depends(oauth2_scheme)) -> int:
+    """
+    Para respuestas de larga duración (SSE): autentica con una sesión propia
+    que se cierra enseguida, así el stream no retiene una conexión del pool.
+    """
+    db = SessionLocal()
+    try:
+        return _authenticate(token, db).id
+    finally:
+        db.close()
+
+
+def normalize_ids(raw_ids: List[int]) -> List[int]:
+    """Saca duplicados manteniendo el orden y aplica el tope configurado."""
+    ids = list(dict.fromkeys(raw_ids))
+    if len(ids) > MULTI_GET_MAX_IDS:
+        raise BadRequestError(
+            f"Se pueden pedir como máximo {MULTI_GET_MAX_IDS} ids por request.",
+            extra={"max_ids": MULTI_GET_MAX_IDS},
+        )
+    return ids
+
+
+def get_id_list(ids: Optional[str] = Query(None, description="Lista de ids separada por comas")) -> Optional[List[int]]:
+    if ids is None:
+        return None
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise BadRequestError("ids inválidos: se espera una lista de enteros separada por comas.")
+    return normalize_ids(parsed)
+
+
+def get_assignee_filter(
+    assigned_to_id: List[str] = Query([], description="Ids de asignado (repetible); `none` = sin asignar"),
+) -> List[Optional[int]]:
+    try:
+        return [None if value.strip().lower() == "none" else int(value) for value in assigned_to_id]
+    except ValueError:
+        raise BadRequestError("assigned_to_id inválido: se espera un entero o `none`.")
@@ -0,0 +1,61 @@
+# app/enums.py
+from enum import Enum
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class OrdinalStrEnum(str, Enum):
+    """
+    Enum con valor string (lo que viaja en la API) y un ordinal fijo
+    (lo que se guarda en la base). El ordinal define el orden semántico.
+    """
+
+    def __new__(cls, value: str, ordinal: int):
+        obj = str.__new__(cls, value)
+        obj._value_ = value
+        obj.ordinal = ordinal
+        return obj
+
+    @classmethod
+    def from_ordinal(cls, ordinal: int):
+        for member in cls:
+            if member.ordinal == ordinal:
+                return member
+        raise ValueError(f"{ordinal} no es un ordinal válido de {cls.__name__}")
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class TicketStatus(OrdinalStrEnum):
+    OPEN = ("open", 1)
+    PENDING = ("pending", 2)
+    CLOSED = ("closed", 3)
+
+
+class TicketPriority(OrdinalStrEnum):
+    LOW = ("low", 1)
+    MEDIUM = ("medium", 2)
+    HIGH = ("high", 3)
+
+
+class OrdinalEnumType(TypeDecorator):
+    """Guarda un OrdinalStrEnum como SMALLINT; acepta el enum o su valor string."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_cls):
+        super().__init__()
+        self.enum_cls = enum_cls
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self.enum_cls(value).ordinal
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.enum_cls.from_ordinal(value)
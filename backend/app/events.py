@@ -0,0 +1,149 @@
+# app/events.py
+"""
+Broadcaster en proceso para el change feed de tickets (SSE).
+
+Los servicios (sync, corren en el threadpool) publican con `publish(...)`;
+cada suscriptor tiene una cola asyncio acotada en el loop donde se suscribió.
+Se guarda un historial corto para poder reanudar con `Last-Event-ID`.
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+
+SSE_HISTORY_SIZE = int(os.getenv("SSE_HISTORY_SIZE", "1000"))
+SSE_SUBSCRIBER_QUEUE = int(os.getenv("SSE_SUBSCRIBER_QUEUE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+
+@dataclass
+class Event:
+    id: int
+    type: str
+    owner_id: int
+    project_ids: tuple[int, ...]
+    data: dict
+
+    def matches(self, owner_id: int, project_id: int | None) -> bool:
+        if self.owner_id != owner_id:
+            return False
+        return project_id is None or project_id in self.project_ids
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+@dataclass(eq=False)
+class Subscription:
+    owner_id: int
+    project_id: int | None
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=SSE_SUBSCRIBER_QUEUE))
+    # si el cliente no consume a tiempo se descartan eventos y se le pide un resync
+    overflowed: bool = False
+
+    def _offer(self, event: Event) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # vaciamos para liberar memoria; el stream mandará "reset"
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class Broadcaster:
+    def __init__(self, history_size: int = SSE_HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._history: deque[Event] = deque(maxlen=history_size)
+        self._subscribers: set[Subscription] = set()
+
+    def publish(self, event_type: str, owner_id: int, project_ids, data: dict) -> Event:
+        with self._lock:
+            event = Event(
+                id=next(self._ids),
+                type=event_type,
+                owner_id=owner_id,
+                project_ids=tuple(p for p in project_ids if p is not None),
+                data=data,
+            )
+            self._history.append(event)
+            targets = [s for s in self._subscribers if event.matches(s.owner_id, s.project_id)]
+
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                # loop cerrado: el suscriptor ya no existe
+                self.unsubscribe(sub)
+        return event
+
+    def subscribe(self, owner_id: int, project_id: int | None, last_event_id: int | None = None):
+        """Devuelve (suscripción, eventos a reenviar, necesita_reset)."""
+        sub = Subscription(owner_id=owner_id, project_id=project_id, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+            replay: list[Event] = []
+            needs_reset = False
+            if last_event_id is not None:
+                oldest = self._history[0].id if self._history else None
+                newest = self._history[-1].id if self._history else 0
+                if last_event_id > newest or (oldest is not None and last_event_id < oldest - 1):
+                    # el historial no cubre el hueco (o el server se reinició)
+                    needs_reset = True
+                else:
+                    replay = [
+                        e for e in self._history
+                        if e.id > last_event_id and e.matches(owner_id, project_id)
+                    ]
+        return sub, replay, needs_reset
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+ticket_events = Broadcaster()
+
+
+def reset_event() -> str:
+    return "event: reset\ndata: {}\n\n"
+
+
+async def sse_stream(request, owner_id: int, project_id: int | None, last_event_id: int | None, heartbeat: float = SSE_HEARTBEAT_SECONDS):
+    sub, replay, needs_reset = ticket_events.subscribe(owner_id, project_id, last_event_id)
+    try:
+        yield "retry: 3000\n\n"
+        if needs_reset:
+            yield reset_event()
+        for event in replay:
+            yield event.encode()
+
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+
+            if event is None:
+                # overflow: el cliente tiene que refrescar la lista
+                sub.overflowed = False
+                yield reset_event()
+                continue
+            yield event.encode()
+    finally:
+        ticket_events.unsubscribe(sub)
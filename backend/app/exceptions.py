@@ -20,3 +20,7 @@ class BadRequestError(AppError):
 class UnauthorizedError(AppError):
     def __init__(self, detail="Credenciales inválidas.", extra=None):
         super().__init__(detail=detail, code="UNAUTHORIZED", status_code=401, extra=extra)
+
+class ServiceUnavailableError(AppError):
+    def __init__(self, detail="Servicio no disponible momentáneamente.", extra=None):
+        super().__init__(detail=detail, code="SERVICE_UNAVAILABLE", status_code=503, extra=extra)
@@ -0,0 +1,246 @@
+# app/idempotency.py
+"""
+Soporte de `Idempotency-Key` en los POST/PUT de creación y actualización.
+
+La primera request con una key (por usuario) reserva una fila `in_flight`
+en `idempotency_keys`; al terminar se guardan status y body, y durante
+IDEMPOTENCY_TTL los reintentos reciben esa misma respuesta sin volver a
+ejecutar el servicio. Un duplicado que llega mientras el original sigue
+en curso espera a que termine (polling de la fila, así funciona también
+entre procesos). Las respuestas 5xx no se guardan: el reintento vuelve a
+ejecutar.
+
+El usuario se resuelve una sola vez: queda en `scope["state"]["auth_user"]`
+y get_current_user lo reutiliza. Las keys vencidas las borra el job
+`idempotency.purge`; el request sólo lo encola cada
+IDEMPOTENCY_PURGE_INTERVAL segundos.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth import decode_access_token
+from app import models
+from app.database import SessionLocal
+from app.jobs import enqueue
+from app.repos import idempotency_repo, users_repo
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "30"))
+IDEMPOTENCY_POLL_INTERVAL = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL", "0.05"))
+# un in_flight más viejo que esto se considera abandonado (proceso caído)
+IDEMPOTENCY_STALE_AFTER = float(os.getenv("IDEMPOTENCY_STALE_AFTER", "120"))
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "600"))
+IDEMPOTENCY_MAX_KEY_LENGTH = 255
+
+IDEMPOTENT_ROUTES = [
+    ("POST", re.compile(r"^/tickets$")),
+    ("PUT", re.compile(r"^/tickets/\d+$")),
+    ("POST", re.compile(r"^/projects$")),
+    ("PUT", re.compile(r"^/projects/\d+$")),
+    ("POST", re.compile(r"^/batch$")),
+]
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def is_idempotent_route(method: str, path: str) -> bool:
+    return any(method == m and pattern.match(path) for m, pattern in IDEMPOTENT_ROUTES)
+
+
+def request_hash(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    h = hashlib.sha256()
+    h.update(f"{method} {path}?".encode())
+    h.update(query_string)
+    h.update(b"\n")
+    h.update(body)
+    return h.hexdigest()
+
+
+def _resolve_user(authorization: str) -> models.User | None:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    username = decode_access_token(token)
+    if username is None:
+        return None
+    db = SessionLocal()
+    try:
+        return users_repo.get_by_username(db, username)
+    finally:
+        db.close()
+
+
+def _maybe_schedule_purge(db) -> None:
+    global _last_purge
+    with _purge_lock:
+        if time.monotonic() - _last_purge < IDEMPOTENCY_PURGE_INTERVAL:
+            return
+        _last_purge = time.monotonic()
+    enqueue(db, "idempotency.purge", {})
+
+
+def _begin(user_id: int, key: str, req_hash: str):
+    """
+    ("run", row_id)     -> somos los dueños de la key, ejecutar
+    ("replay", stored)  -> ya hay respuesta guardada
+    ("mismatch", None)  -> misma key con otro request
+    ("wait", None)      -> otro request con la key está en curso
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=IDEMPOTENCY_TTL)
+    db = SessionLocal()
+    try:
+        _maybe_schedule_purge(db)
+        row = idempotency_repo.get(db, user_id, key)
+        if row is None:
+            row_id = idempotency_repo.try_insert(db, user_id, key, req_hash, now, expires_at)
+            return ("run", row_id) if row_id is not None else ("wait", None)
+
+        stale_before = now - timedelta(seconds=IDEMPOTENCY_STALE_AFTER)
+        if row.expires_at < now or (row.status == "in_flight" and row.created_at < stale_before):
+            if idempotency_repo.try_take_over(db, row.id, req_hash, now, expires_at, stale_before):
+                return "run", row.id
+            return "wait", None
+
+        if row.request_hash != req_hash:
+            return "mismatch", None
+        if row.status == "done":
+            return "replay", (row.response_status, row.response_content_type, row.response_body or b"")
+        return "wait", None
+    finally:
+        db.close()
+
+
+def _complete(row_id: int, status_code: int, content_type: str | None, body: bytes) -> None:
+    db = SessionLocal()
+    try:
+        idempotency_repo.complete(db, row_id, status_code, content_type, body)
+    finally:
+        db.close()
+
+
+def _release(row_id: int) -> None:
+    db = SessionLocal()
+    try:
+        idempotency_repo.release(db, row_id)
+    finally:
+        db.close()
+
+
+async def _send_response(send: Send, status_code: int, content_type: str | None, body: bytes, replayed: bool) -> None:
+    headers = [(b"content-length", str(len(body)).encode())]
+    if content_type:
+        headers.append((b"content-type", content_type.encode()))
+    if replayed:
+        headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_error(send: Send, scope: Scope, status_code: int, code: str, detail: str) -> None:
+    # mismo formato que los handlers de app/errors.py
+    body = json.dumps({"detail": detail, "code": code, "path": scope["path"], "extra": None}).encode()
+    await _send_response(send, status_code, "application/json", body, replayed=False)
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not is_idempotent_route(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > IDEMPOTENCY_MAX_KEY_LENGTH:
+            await _send_error(send, scope, 400, "BAD_REQUEST", "Idempotency-Key demasiado larga.")
+            return
+
+        user = await run_in_threadpool(_resolve_user, headers.get("authorization", ""))
+        if user is None:
+            # sin usuario no hay scope para la key: que la ruta responda el 401
+            await self.app(scope, receive, send)
+            return
+        # get_current_user lo reutiliza en vez de volver a buscarlo
+        scope.setdefault("state", {})["auth_user"] = user
+        user_id = user.id
+
+        # el body entra en el hash, así que lo leemos entero y se lo re-entregamos a la app
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        req_hash = request_hash(scope["method"], scope["path"], scope.get("query_string", b""), bytes(body))
+
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            outcome, value = await run_in_threadpool(_begin, user_id, key, req_hash)
+            if outcome != "wait":
+                break
+            if time.monotonic() >= deadline:
+                await _send_error(send, scope, 409, "IDEMPOTENCY_IN_PROGRESS", "Hay otro request en curso con esta Idempotency-Key.")
+                return
+            await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+        if outcome == "mismatch":
+            await _send_error(send, scope, 422, "IDEMPOTENCY_KEY_REUSED", "La Idempotency-Key ya se usó con otro request.")
+            return
+        if outcome == "replay":
+            await _send_response(send, *value, replayed=True)
+            return
+
+        await self._run(scope, receive, send, bytes(body), row_id=value)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, body: bytes, row_id: int) -> None:
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = None
+        content_type = None
+        response_body = bytearray()
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await run_in_threadpool(_release, row_id)
+            raise
+
+        if status_code is not None and status_code < 500:
+            await run_in_threadpool(_complete, row_id, status_code, content_type, bytes(response_body))
+        else:
+            await run_in_threadpool(_release, row_id)
@@ -0,0 +1,212 @@
+# app/jobs.py
+"""
+Cola de jobs en proceso, persistida en la tabla `jobs` (sin broker externo).
+
+Los handlers se registran con `@job_handler("tipo")` y reciben
+`(db, payload)`; lo que devuelvan queda guardado como `result` del job.
+El pool de workers se levanta desde el lifespan de la app o con
+`python -m app.worker`.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.repos import jobs_repo
+
+logger = logging.getLogger(__name__)
+
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", "2.0"))
+JOBS_BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", "300"))
+JOBS_STALE_AFTER = float(os.getenv("JOBS_STALE_AFTER", "600"))
+# cada cuánto un job en curso renueva locked_at, y cada cuánto se buscan jobs colgados
+JOBS_HEARTBEAT_INTERVAL = float(os.getenv("JOBS_HEARTBEAT_INTERVAL", "60"))
+JOBS_REQUEUE_INTERVAL = float(os.getenv("JOBS_REQUEUE_INTERVAL", "60"))
+
+
+@dataclass
+class JobSpec:
+    func: Callable[[Session, dict], Any]
+    concurrency: int
+    max_attempts: int
+
+
+_registry: dict[str, JobSpec] = {}
+
+
+def job_handler(job_type: str, concurrency: int = 1, max_attempts: int = 3):
+    def decorator(func):
+        _registry[job_type] = JobSpec(func=func, concurrency=concurrency, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def get_spec(job_type: str) -> JobSpec | None:
+    return _registry.get(job_type)
+
+
+def load_handlers() -> None:
+    # Importa los módulos que registran handlers
+    import app.tasks  # noqa: F401
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    seconds = min(JOBS_BACKOFF_BASE * (2 ** max(attempts - 1, 0)), JOBS_BACKOFF_MAX)
+    return timedelta(seconds=seconds)
+
+
+def enqueue(db: Session, job_type: str, payload: dict, owner_id: int | None = None):
+    spec = get_spec(job_type)
+    if spec is None:
+        raise ValueError(f"Tipo de job desconocido: {job_type}")
+    return jobs_repo.create(
+        db,
+        job_type=job_type,
+        payload=payload,
+        owner_id=owner_id,
+        max_attempts=spec.max_attempts,
+    )
+
+
+class WorkerPool:
+    """
+    N threads que hacen polling de la tabla `jobs`.
+    El límite de concurrencia por tipo es global: se cuenta en la tabla al
+    tomar el job (jobs_repo.try_claim), así vale igual con varios procesos
+    de la API y workers aparte. Mientras un job corre se renueva su
+    locked_at; uno sin heartbeat por JOBS_STALE_AFTER (proceso caído) lo
+    devuelve a la cola cualquier pool, cada JOBS_REQUEUE_INTERVAL.
+    """
+
+    def __init__(self, workers: int = JOBS_WORKERS, poll_interval: float = JOBS_POLL_INTERVAL, session_factory=SessionLocal):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._requeue_lock = threading.Lock()
+        self._last_requeue: float | None = None
+
+    def start(self) -> None:
+        load_handlers()
+
+        # no toca la base: si no responde, los threads reintentan en su loop
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads.clear()
+
+    def _requeue_stale(self) -> None:
+        """Cada JOBS_REQUEUE_INTERVAL, en un solo thread del pool."""
+        with self._requeue_lock:
+            if self._last_requeue is not None and time.monotonic() - self._last_requeue < JOBS_REQUEUE_INTERVAL:
+                return
+            db = self.session_factory()
+            try:
+                requeued, failed = jobs_repo.requeue_stale(db, timedelta(seconds=JOBS_STALE_AFTER))
+            finally:
+                db.close()
+            self._last_requeue = time.monotonic()
+        if requeued or failed:
+            logger.warning("jobs: jobs colgados: %s devueltos a la cola, %s sin más intentos", requeued, failed)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._requeue_stale()
+                worked = self.run_once()
+            except SQLAlchemyError as exc:
+                logger.warning("jobs: la base no responde (%s), se reintenta en %ss", type(exc).__name__, self.poll_interval)
+                worked = False
+            except Exception:
+                logger.exception("jobs: error en el loop del worker")
+                worked = False
+            if not worked:
+                self._stop.wait(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """Toma y ejecuta a lo sumo un job. Devuelve True si ejecutó algo."""
+        job_types = list(_registry)
+        db = self.session_factory()
+        try:
+            job = None
+            while job_types:
+                now = datetime.utcnow()
+                candidate = jobs_repo.next_ready(db, job_types, now)
+                if candidate is None:
+                    break
+                job_id, job_type = candidate
+                limit = _registry[job_type].concurrency
+                if jobs_repo.try_claim(db, job_id, job_type, limit, self.worker_id, now):
+                    job = jobs_repo.get_by_id(db, job_id)
+                    break
+                # si lo ganó otro worker se reintenta; si el tipo está sin cupo, se saltea en esta vuelta
+                if jobs_repo.count_running(db, job_type) >= limit:
+                    job_types.remove(job_type)
+
+            if job is None:
+                return False
+
+            self._execute(db, job)
+            return True
+        finally:
+            db.close()
+
+    def _heartbeat(self, job_id: int, done: threading.Event) -> None:
+        # sesión propia: la del job está ocupada con el handler
+        while not done.wait(JOBS_HEARTBEAT_INTERVAL):
+            db = self.session_factory()
+            try:
+                if not jobs_repo.heartbeat(db, job_id, self.worker_id, datetime.utcnow()):
+                    return
+            except SQLAlchemyError as exc:
+                logger.warning("jobs: no se pudo renovar el lock del job %s (%s)", job_id, type(exc).__name__)
+            finally:
+                db.close()
+
+    def _execute(self, db: Session, job) -> None:
+        spec = _registry[job.type]
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job.id, done), name=f"job-heartbeat-{job.id}", daemon=True)
+        beat.start()
+        failure = None
+        try:
+            result = spec.func(db, dict(job.payload or {}))
+        except Exception as exc:
+            db.rollback()
+            failure = exc
+        finally:
+            # el heartbeat para antes de marcar el resultado (que suelta el lock)
+            done.set()
+            beat.join()
+
+        if failure is None:
+            jobs_repo.mark_succeeded(db, job, result)
+            return
+        logger.warning("jobs: job %s (%s) falló en el intento %s: %s", job.id, job.type, job.attempts, failure)
+        retry_at = None
+        if job.attempts < job.max_attempts:
+            retry_at = datetime.utcnow() + backoff_delay(job.attempts)
+        error = "".join(traceback.format_exception_only(type(failure), failure)).strip()
+        jobs_repo.mark_failed(db, job, error, retry_at)
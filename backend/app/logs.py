@@ -0,0 +1,223 @@
+# app/logs.py
+"""
+Logging estructurado sin bloquear el request.
+
+Los handlers de la app sólo encolan el record (QueueHandler); un
+QueueListener en un thread aparte lo formatea (JSON o texto) y lo escribe
+a stdout. Cada record lleva el `request_id` del request en curso.
+
+SQL: en vez de `echo=True`, se loguea una muestra de las queries
+(SQL_LOG_SAMPLE_RATE) y siempre las que superan SQL_SLOW_MS, con un
+fingerprint del statement (literales y listas IN colapsados) y la duración.
+"""
+import atexit
+import contextvars
+import copy
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+APP_ENV = os.getenv("APP_ENV", "development")
+_PRODUCTION = APP_ENV == "production"
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json" if _PRODUCTION else "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0.01" if _PRODUCTION else "0"))
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_id", default=None)
+
+sql_logger = logging.getLogger("app.sql")
+slow_sql_logger = logging.getLogger("app.sql.slow")
+
+# atributos estándar de LogRecord: todo lo demás (extra=...) va al JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Resuelve el mensaje acá (los args pueden cambiar después) y descarta si la cola está llena."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """Idempotente: se llama desde main, el worker y los comandos de consola."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola y frena el thread escritor."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# -------- SQL --------
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\([^)]+\)s|%s|:\w+|\?|\$\d+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Normaliza el statement para agrupar queries iguales con distintos valores."""
+    sql = _WS.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _IN_LIST.sub("(?+)", sql)
+
+
+def fingerprint_id(fp: str) -> str:
+    return hashlib.sha1(fp.encode()).hexdigest()[:12]
+
+
+def instrument_engine(engine) -> None:
+    """Registra los listeners de muestreo y slow-query sobre el engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        if duration_ms >= SQL_SLOW_MS:
+            fp = fingerprint(statement)
+            slow_sql_logger.warning(
+                "slow query %.1fms",
+                duration_ms,
+                extra={"duration_ms": round(duration_ms, 3), "fingerprint": fp, "fingerprint_id": fingerprint_id(fp)},
+            )
+        elif SQL_LOG_SAMPLE_RATE > 0 and random.random() < SQL_LOG_SAMPLE_RATE:
+            fp = fingerprint(statement)
+            sql_logger.info(
+                "query %.1fms",
+                duration_ms,
+                extra={"duration_ms": round(duration_ms, 3), "fingerprint": fp, "fingerprint_id": fingerprint_id(fp)},
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        # la query falló: after_cursor_execute no corre, sacamos el inicio pendiente
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+# -------- Request id --------
+
+class RequestIdMiddleware:
+    """Toma `X-Request-ID` del cliente o genera uno; queda en el contexto y en la respuesta."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = (Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex)[:64]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("x-request-id", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,19 +1,52 @@
 # app/main.py
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
-from app.database import Base, engine
+from app.logs import RequestIdMiddleware, configure_logging
+from app.database import dispose_engines, init_database
 from app.limiter import limiter
 from app.errors import register_error_handlers
+from app.compression import CompressionMiddleware
+from app.idempotency import IdempotencyMiddleware
+from app.jobs import WorkerPool, load_handlers
+from app.activity import activity_log
 from app.api.router import api_router
 
-Base.metadata.create_all(bind=engine)
+# importar este módulo no toca la base: schema y conexiones se preparan en el lifespan
+# enqueue necesita los handlers registrados aunque el pool corra en otro proceso
+load_handlers()
+
+# Si los jobs corren en un proceso aparte (python -m app.worker) se apaga con 0
+JOBS_RUN_IN_APP = os.getenv("JOBS_RUN_IN_APP", "1") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    await run_in_threadpool(init_database)
+
+    pool = None
+    if JOBS_RUN_IN_APP:
+        pool = WorkerPool()
+        pool.start()
+    app.state.job_pool = pool
+    activity_log.start()
+    yield
+    activity_log.stop()
+    if pool is not None:
+        pool.stop()
+    dispose_engines()
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="IssueHub API", version="0.4.0")
+    app = FastAPI(title="IssueHub API", version="0.4.0", lifespan=lifespan)
 
     # ---- SlowAPI / Rate limit ----
     app.state.limiter = limiter
@@ -22,6 +55,9 @@ def create_app() -> FastAPI:
     # ---- Error handlers (429 custom + 500 generic) ----
     register_error_handlers(app)
 
+    # ---- Idempotency-Key (la más interna: guarda la respuesta sin comprimir) ----
+    app.add_middleware(IdempotencyMiddleware)
+
     # ---- CORS ----
     origins = [
         "http://localhost:3000",
@@ -35,6 +71,12 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # ---- Compresión (gzip / br / zstd) ----
+    app.add_middleware(CompressionMiddleware)
+
+    # ---- Request id (la más externa: cubre también los logs de las demás) ----
+    app.add_middleware(RequestIdMiddleware)
+
     # ---- Routers ----
     app.include_router(api_router)
 
@@ -0,0 +1,176 @@
+# app/migrate.py
+"""
+Migraciones mínimas para bases Postgres ya existentes: `python -m app.migrate`.
+
+`create_all` crea las tablas nuevas pero no modifica las existentes; acá van,
+en orden, los cambios de columnas/índices sobre tablas que ya estaban.
+Cada paso se registra en `schema_migrations` y no se vuelve a aplicar.
+"""
+import logging
+
+from sqlalchemy import text
+
+from app.database import all_engines, create_schema
+from app.logs import configure_logging
+
+logger = logging.getLogger(__name__)
+
+_STATUS_CASE = """
+    CASE lower(trim(status))
+        WHEN 'open' THEN 1 WHEN 'todo' THEN 1 WHEN 'new' THEN 1
+        WHEN 'pending' THEN 2 WHEN 'in_progress' THEN 2
+        WHEN 'closed' THEN 3 WHEN 'done' THEN 3 WHEN 'resolved' THEN 3
+        ELSE NULL
+    END
+"""
+
+_PRIORITY_CASE = """
+    CASE lower(trim(priority))
+        WHEN 'low' THEN 1
+        WHEN 'medium' THEN 2 WHEN 'normal' THEN 2
+        WHEN 'high' THEN 3 WHEN 'urgent' THEN 3
+        ELSE NULL
+    END
+"""
+
+MIGRATIONS: list[tuple[str, list[str]]] = [
+    ("0001_change_seq", [
+        "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS change_seq INTEGER",
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS change_seq INTEGER",
+        "CREATE INDEX IF NOT EXISTS ix_tickets_owner_change_seq ON tickets (owner_id, change_seq)",
+        "CREATE INDEX IF NOT EXISTS ix_projects_owner_change_seq ON projects (owner_id, change_seq)",
+    ]),
+    ("0002_ticket_minhash", [
+        "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS minhash BYTEA",
+    ]),
+    ("0003_ticket_title_trgm", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_tickets_title_trgm ON tickets USING gin (title gin_trgm_ops)",
+    ]),
+    ("0004_ticket_status_priority_enums", [
+        # sólo si las columnas siguen siendo texto (en bases nuevas ya nacen SMALLINT)
+        f"""
+        DO $$ BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'tickets' AND column_name = 'status' AND data_type = 'character varying'
+            ) THEN
+                ALTER TABLE tickets ALTER COLUMN status TYPE SMALLINT USING ({_STATUS_CASE});
+            END IF;
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'tickets' AND column_name = 'priority' AND data_type = 'character varying'
+            ) THEN
+                ALTER TABLE tickets ALTER COLUMN priority TYPE SMALLINT USING ({_PRIORITY_CASE});
+            END IF;
+        END $$
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_tickets_owner_status ON tickets (owner_id, status)",
+        "CREATE INDEX IF NOT EXISTS ix_tickets_owner_priority ON tickets (owner_id, priority)",
+    ]),
+    ("0005_ticket_archival", [
+        "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS closed_at TIMESTAMP",
+        # cerrados antes de existir closed_at: tomamos la última actualización
+        "UPDATE tickets SET closed_at = coalesce(updated_at, created_at) WHERE status = 3 AND closed_at IS NULL",
+        "ALTER TABLE ticket_attachments DROP CONSTRAINT IF EXISTS ticket_attachments_ticket_id_fkey",
+    ]),
+    ("0006_project_purge", [
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS deleting_at TIMESTAMP",
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS purge_job_id INTEGER",
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS purge_total INTEGER",
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS purge_done INTEGER",
+        # el purge recorre los tickets por proyecto en lotes
+        "CREATE INDEX IF NOT EXISTS ix_tickets_project_id ON tickets (project_id)",
+    ]),
+    ("0007_assignee_inbox", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS assigned_open_count INTEGER NOT NULL DEFAULT 0",
+        """
+        UPDATE users SET assigned_open_count = (
+            SELECT count(*) FROM tickets
+            WHERE tickets.assigned_to_id = users.id AND (tickets.status IS NULL OR tickets.status <> 3)
+        )
+        """,
+        # la paginación por cursor ordena por updated_at: no puede quedar NULL
+        "UPDATE tickets SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS ix_tickets_assignee_status_updated ON tickets (assigned_to_id, status, updated_at)",
+    ]),
+    ("0008_owner_sharding", [
+        # con sharding users queda en el directorio: los datos de los owners no pueden referenciarla
+        "ALTER TABLE projects DROP CONSTRAINT IF EXISTS projects_owner_id_fkey",
+        "ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_owner_id_fkey",
+        "ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_assigned_to_id_fkey",
+        "ALTER TABLE archived_tickets DROP CONSTRAINT IF EXISTS archived_tickets_owner_id_fkey",
+        "ALTER TABLE archived_tickets DROP CONSTRAINT IF EXISTS archived_tickets_assigned_to_id_fkey",
+        "ALTER TABLE ticket_activity DROP CONSTRAINT IF EXISTS ticket_activity_owner_id_fkey",
+        "ALTER TABLE ticket_activity DROP CONSTRAINT IF EXISTS ticket_activity_actor_id_fkey",
+        "ALTER TABLE ticket_attachments DROP CONSTRAINT IF EXISTS ticket_attachments_owner_id_fkey",
+        "ALTER TABLE ticket_lsh_buckets DROP CONSTRAINT IF EXISTS ticket_lsh_buckets_owner_id_fkey",
+        "ALTER TABLE change_counters DROP CONSTRAINT IF EXISTS change_counters_owner_id_fkey",
+        "ALTER TABLE tombstones DROP CONSTRAINT IF EXISTS tombstones_owner_id_fkey",
+    ]),
+    ("0009_change_seq_backfill", [
+        # filas de antes de 0001 con change_seq NULL: el delta sync nunca las devolvía.
+        # Se numeran a continuación del contador de cada owner (proyectos primero).
+        "LOCK TABLE change_counters IN EXCLUSIVE MODE",
+        """
+        CREATE TEMP TABLE change_seq_backfill ON COMMIT DROP AS
+        SELECT p.kind, p.id, p.owner_id,
+               coalesce(c.value, 0) + row_number() OVER (PARTITION BY p.owner_id ORDER BY p.kind, p.id) AS seq
+        FROM (
+            SELECT 'project' AS kind, id, owner_id FROM projects WHERE change_seq IS NULL
+            UNION ALL
+            SELECT 'ticket' AS kind, id, owner_id FROM tickets WHERE change_seq IS NULL
+        ) p
+        LEFT JOIN change_counters c ON c.owner_id = p.owner_id
+        """,
+        "UPDATE projects SET change_seq = b.seq FROM change_seq_backfill b WHERE b.kind = 'project' AND projects.id = b.id",
+        "UPDATE tickets SET change_seq = b.seq FROM change_seq_backfill b WHERE b.kind = 'ticket' AND tickets.id = b.id",
+        """
+        INSERT INTO change_counters (owner_id, value)
+        SELECT owner_id, max(seq) FROM change_seq_backfill GROUP BY owner_id
+        ON CONFLICT (owner_id) DO UPDATE SET value = greatest(change_counters.value, excluded.value)
+        """,
+    ]),
+    ("0010_jobs_type_status", [
+        "CREATE INDEX IF NOT EXISTS ix_jobs_type_status ON jobs (type, status)",
+    ]),
+]
+
+
+def run() -> list[str]:
+    # primero las tablas que falten (en el directorio y en cada shard); después los cambios
+    create_schema()
+    applied_now = []
+    for engine in all_engines():
+        if engine.dialect.name != "postgresql":
+            logger.info("migrate: sólo aplica a Postgres (dialecto %s); se usa create_all", engine.dialect.name)
+            continue
+        applied_now += _run_on(engine)
+    return applied_now
+
+
+def _run_on(engine) -> list[str]:
+    applied_now = []
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+    for name, statements in MIGRATIONS:
+        if name in applied:
+            continue
+        # cada migración en su propia transacción
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+        logger.info("migrate: aplicada %s en %s", name, engine.url.render_as_string(hide_password=True))
+        applied_now.append(name)
+    return applied_now
+
+
+if __name__ == "__main__":
+    configure_logging()
+    run()
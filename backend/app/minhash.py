@@ -0,0 +1,87 @@
+# app/minhash.py
+"""
+Firmas MinHash + LSH por bandas para detectar tickets casi duplicados.
+
+Cada ticket guarda su firma (MINHASH_PERM enteros de 32 bits empaquetados)
+y una fila por banda en `ticket_lsh_buckets`. Dos tickets con Jaccard alto
+comparten con alta probabilidad al menos un bucket, así que la búsqueda de
+candidatos es un lookup por índice y no un scan de la tabla.
+"""
+import hashlib
+import os
+import re
+import struct
+import unicodedata
+
+MINHASH_PERM = int(os.getenv("MINHASH_PERM", "64"))
+MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "16"))
+# descripciones con logs enormes: alcanza con el comienzo para comparar
+MINHASH_MAX_CHARS = int(os.getenv("MINHASH_MAX_CHARS", "4000"))
+# con menos shingles que esto no hay texto para comparar: el ticket queda sin firma
+MINHASH_MIN_SHINGLES = int(os.getenv("MINHASH_MIN_SHINGLES", "3"))
+
+_PRIME = (1 << 61) - 1
+_MAX32 = (1 << 32) - 1
+
+
+def _make_coefficients(n: int) -> list[tuple[int, int]]:
+    # deterministas (no dependen de PYTHONHASHSEED) para que las firmas sean estables
+    coeffs = []
+    for i in range(n):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "little") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "little") % _PRIME
+        coeffs.append((a, b))
+    return coeffs
+
+
+_COEFFS = _make_coefficients(MINHASH_PERM)
+_ROWS_PER_BAND = MINHASH_PERM // MINHASH_BANDS
+# la firma que quedó guardada en tickets sin shingles antes de MINHASH_MIN_SHINGLES
+_EMPTY_SIGNATURE = [_MAX32] * MINHASH_PERM
+
+
+def normalize(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def shingles(title: str, description: str | None) -> set[str]:
+    # palabras + bigramas: los títulos son cortos y con shingles largos casi no se solapan
+    words = normalize(f"{title} {(description or '')[:MINHASH_MAX_CHARS]}")
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def signature(title: str, description: str | None) -> list[int] | None:
+    """None si el texto tiene menos de MINHASH_MIN_SHINGLES shingles."""
+    items = shingles(title, description)
+    if len(items) < max(MINHASH_MIN_SHINGLES, 1):
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in items]
+    return [min(((a * h + b) % _PRIME) & _MAX32 for h in hashes) for a, b in _COEFFS]
+
+
+def pack(sig: list[int]) -> bytes:
+    return struct.pack(f"<{len(sig)}I", *sig)
+
+
+def unpack(data: bytes) -> list[int]:
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+def band_hashes(sig: list[int]) -> list[tuple[int, int]]:
+    """[(banda, hash del bucket)] con el hash como entero de 63 bits (entra en BIGINT)."""
+    out = []
+    for band in range(MINHASH_BANDS):
+        chunk = sig[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{len(chunk)}I", *chunk), digest_size=8).digest()
+        out.append((band, int.from_bytes(digest, "little") >> 1))
+    return out
+
+
+def similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    """Estimación de Jaccard: fracción de posiciones iguales."""
+    if not sig_a or len(sig_a) != len(sig_b) or sig_a == _EMPTY_SIGNATURE or sig_b == _EMPTY_SIGNATURE:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
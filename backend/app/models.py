@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Text, DateTime, ForeignKey, Boolean, JSON, Index, DDL, LargeBinary, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from .database import Base
+from .enums import OrdinalEnumType, TicketStatus, TicketPriority
 from datetime import datetime
 
 
@@ -14,22 +15,30 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, nullable=False, default=True)
 
+    # tickets asignados que no están cerrados (lo mantiene app/assignments.py)
+    assigned_open_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Tickets ASIGNADOS al usuario
+    # sin FK: con sharding los tickets viven en otra base (ver app/sharding.py)
     tickets = relationship(
         "Ticket",
         back_populates="assignee",
-        foreign_keys="Ticket.assigned_to_id"    
+        primaryjoin="User.id == foreign(Ticket.assigned_to_id)",
     )
 
     # Tickets CREADOS por este usuario
     my_tickets = relationship(
         "Ticket",
         back_populates="owner",
-        foreign_keys="Ticket.owner_id"         
+        primaryjoin="User.id == foreign(Ticket.owner_id)",
     )
 
     # Proyectos del usuario
-    projects = relationship("Project", back_populates="owner")
+    projects = relationship(
+        "Project",
+        back_populates="owner",
+        primaryjoin="User.id == foreign(Project.owner_id)",
+    )
 
 
 class Project(Base):
@@ -41,12 +50,30 @@ class Project(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, nullable=False)
 
-    owner = relationship("User", back_populates="projects")
+    # secuencia de cambios por owner (la estampa app/changes.py en cada escritura)
+    change_seq = Column(Integer, nullable=True)
+
+    # borrado en cascada en background: mientras deleting_at no es NULL
+    # el proyecto no acepta cambios y purge_done/purge_total marcan el avance
+    deleting_at = Column(DateTime, nullable=True)
+    purge_job_id = Column(Integer, nullable=True)
+    purge_total = Column(Integer, nullable=True)
+    purge_done = Column(Integer, nullable=True)
+
+    owner = relationship(
+        "User",
+        back_populates="projects",
+        primaryjoin="foreign(Project.owner_id) == User.id",
+    )
 
     tickets = relationship("Ticket", back_populates="project")
 
+    __table_args__ = (
+        Index("ix_projects_owner_change_seq", "owner_id", "change_seq"),
+    )
+
 
 class Ticket(Base):
     __tablename__ = "tickets"
@@ -54,18 +81,26 @@ class Ticket(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
-    status = Column(String(20))
-    priority = Column(String(20))
+    # SMALLINT con el ordinal del enum: ordena por significado (low < medium < high)
+    status = Column(OrdinalEnumType(TicketStatus))
+    priority = Column(OrdinalEnumType(TicketPriority))
 
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    # se setea al pasar a "closed" y se limpia al reabrir (lo usa el archivado)
+    closed_at = Column(DateTime, nullable=True)
 
-    assigned_to_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    assigned_to_id = Column(Integer, nullable=True)
 
     # 🔥 NUEVO: dueño del ticket
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, nullable=False)
+
+    change_seq = Column(Integer, nullable=True)
+
+    # firma MinHash de título + descripción (ver app/minhash.py)
+    minhash = Column(LargeBinary, nullable=True)
 
     # Relaciones
     project = relationship("Project", back_populates="tickets")
@@ -73,11 +108,247 @@ class Ticket(Base):
     assignee = relationship(
         "User",
         back_populates="tickets",
-        foreign_keys=[assigned_to_id]            
+        primaryjoin="foreign(Ticket.assigned_to_id) == User.id",
     )
 
     owner = relationship(
         "User",
         back_populates="my_tickets",
-        foreign_keys=[owner_id]                 
+        primaryjoin="foreign(Ticket.owner_id) == User.id",
+    )
+
+    attachments = relationship(
+        "TicketAttachment",
+        back_populates="ticket",
+        primaryjoin="Ticket.id == foreign(TicketAttachment.ticket_id)",
+        cascade="all, delete-orphan",
+    )
+
+    lsh_buckets = relationship(
+        "TicketLshBucket",
+        cascade="all, delete-orphan",
+    )
+
+    __table_args__ = (
+        Index("ix_tickets_owner_change_seq", "owner_id", "change_seq"),
+        # listados ordenados por estado / prioridad dentro de cada owner
+        Index("ix_tickets_owner_status", "owner_id", "status"),
+        Index("ix_tickets_owner_priority", "owner_id", "priority"),
+        # purge de proyectos: recorre los tickets del proyecto por lotes
+        Index("ix_tickets_project_id", "project_id"),
+        # bandeja del asignado: GET /users/me/assigned
+        Index("ix_tickets_assignee_status_updated", "assigned_to_id", "status", "updated_at"),
+    )
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | succeeded | failed
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    result = Column(JSON)
+    error = Column(Text)
+
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime)
+
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # el worker busca siempre "próximo job en cola listo para correr"
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # límite de concurrencia por tipo: cuántos hay corriendo
+        Index("ix_jobs_type_status", "type", "status"),
+    )
+
+
+class TicketActivity(Base):
+    __tablename__ = "ticket_activity"
+
+    id = Column(Integer, primary_key=True)
+    # sin FK: el historial sobrevive al borrado del ticket
+    ticket_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, nullable=False)
+    actor_id = Column(Integer, nullable=True)
+    action = Column(String(20), nullable=False)  # created | updated | deleted
+    changes = Column(JSON, nullable=False, default=dict)  # {campo: [antes, después]}
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_ticket_activity_ticket_created", "ticket_id", "created_at"),
+    )
+
+
+class TicketAttachment(Base):
+    __tablename__ = "ticket_attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # sin FK: el adjunto sigue valiendo si el ticket se mueve a archived_tickets (mismo id)
+    ticket_id = Column(Integer, nullable=False, index=True)
+    owner_id = Column(Integer, nullable=False)
+
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size = Column(Integer, nullable=False)
+    # el contenido vive en disco (BlobStore); acá sólo la referencia
+    sha256 = Column(String(64), nullable=False, index=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    ticket = relationship(
+        "Ticket",
+        back_populates="attachments",
+        primaryjoin="foreign(TicketAttachment.ticket_id) == Ticket.id",
     )
+
+
+class BlobRef(Base):
+    """Cuántos adjuntos apuntan a cada blob del BlobStore; la fila hace de lock del GC."""
+    __tablename__ = "blob_refs"
+
+    sha256 = Column(String(64), primary_key=True)
+    refcount = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ChangeCounter(Base):
+    """Último número de secuencia de cambios asignado a cada owner."""
+    __tablename__ = "change_counters"
+
+    owner_id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class IdempotencyKey(Base):
+    """Respuesta guardada de un POST/PUT con `Idempotency-Key` (ver app/idempotency.py)."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    # sha256 de método + path + body: la misma key con otro request es un error
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="in_flight")  # in_flight | done
+
+    response_status = Column(Integer)
+    response_content_type = Column(String(100))
+    response_body = Column(LargeBinary)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+
+class OwnerShard(Base):
+    """Directorio: en qué shard viven los datos de cada owner (ver app/sharding.py)."""
+    __tablename__ = "owner_shards"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard = Column(String(50), nullable=False)
+    # True mientras app.rebalance copia sus datos a otro shard
+    locked = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IdBlock(Base):
+    """Directorio: próximo id global por tabla cuando hay sharding."""
+    __tablename__ = "id_blocks"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+
+
+class Tombstone(Base):
+    """Marca de borrado para que el delta sync pueda informar ids eliminados."""
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, nullable=False)
+    entity_type = Column(String(20), nullable=False)  # ticket | project
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_tombstones_owner_change_seq", "owner_id", "change_seq"),
+    )
+
+
+class TicketLshBucket(Base):
+    """Una fila por banda LSH de la firma MinHash de cada ticket."""
+    __tablename__ = "ticket_lsh_buckets"
+
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False, index=True)
+    owner_id = Column(Integer, nullable=False)
+    band = Column(SmallInteger, nullable=False)
+    bucket = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("ix_ticket_lsh_owner_band_bucket", "owner_id", "band", "bucket"),
+    )
+
+
+class ArchivedTicket(Base):
+    """
+    Tickets cerrados hace tiempo, movidos fuera de `tickets` (ver app/archive.py).
+    Mismas columnas que Ticket (y mismo id) + archived_at.
+    """
+    __tablename__ = "archived_tickets"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(200), nullable=False)
+    description = Column(Text)
+    status = Column(OrdinalEnumType(TicketStatus))
+    priority = Column(OrdinalEnumType(TicketPriority))
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    closed_at = Column(DateTime)
+    assigned_to_id = Column(Integer, nullable=True)
+    owner_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=True)
+    minhash = Column(LargeBinary, nullable=True)
+
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_archived_tickets_owner_id", "owner_id", "id"),
+        Index("ix_archived_tickets_project", "project_id"),
+    )
+
+
+# Autocompletado de títulos: índice trigram sólo en Postgres (en SQLite usamos app/suggest.py)
+event.listen(
+    Ticket.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Ticket.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_title_trgm "
+        "ON tickets USING gin (title gin_trgm_ops)"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+# registra los listeners que estampan change_seq (necesita los modelos ya definidos)
+from app import changes  # noqa: E402,F401
+from app import assignments  # noqa: E402,F401
@@ -0,0 +1,59 @@
+# app/ownership.py
+"""
+Índice en memoria de qué proyectos tiene cada owner.
+
+Crear un ticket, moverlo de proyecto o listar con `project_id` necesitan
+saber si el proyecto es del usuario. En vez de un SELECT por request, se
+carga con una query el conjunto de ids de proyectos del owner y se
+reutiliza durante PROJECT_OWNERSHIP_TTL segundos.
+
+Sólo sirve para el dueño: que el proyecto exista y no se esté eliminando
+se valida dentro del mismo INSERT/UPDATE del ticket
+(tickets_service.ensure_project_accepts_tickets).
+
+projects_service lo invalida al crear o borrar un proyecto. Es por proceso:
+lo que cambie en otro worker se ve al vencer el TTL, y un proyecto que no
+está en el conjunto se vuelve a buscar antes de rechazar el request.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PROJECT_OWNERSHIP_TTL = float(os.getenv("PROJECT_OWNERSHIP_TTL", "30"))
+PROJECT_OWNERSHIP_MAX_OWNERS = int(os.getenv("PROJECT_OWNERSHIP_MAX_OWNERS", "10000"))
+
+
+class ProjectOwnershipIndex:
+    def __init__(self, ttl: float = PROJECT_OWNERSHIP_TTL, max_owners: int = PROJECT_OWNERSHIP_MAX_OWNERS):
+        self.ttl = ttl
+        self.max_owners = max_owners
+        self._lock = threading.Lock()
+        # owner_id -> (cargado en, ids de sus proyectos)
+        self._owners: OrderedDict[int, tuple[float, frozenset[int]]] = OrderedDict()
+
+    def get(self, owner_id: int, loader, refresh: bool = False) -> frozenset[int]:
+        with self._lock:
+            entry = self._owners.get(owner_id)
+            if entry is not None and not refresh and time.monotonic() - entry[0] < self.ttl:
+                self._owners.move_to_end(owner_id)
+                return entry[1]
+
+        projects = frozenset(loader())
+        with self._lock:
+            self._owners[owner_id] = (time.monotonic(), projects)
+            self._owners.move_to_end(owner_id)
+            while len(self._owners) > self.max_owners:
+                self._owners.popitem(last=False)
+        return projects
+
+    def invalidate(self, owner_id: int) -> None:
+        with self._lock:
+            self._owners.pop(owner_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._owners.clear()
+
+
+project_ownership = ProjectOwnershipIndex()
@@ -0,0 +1,165 @@
+# app/rebalance.py
+# Movimiento de owners entre shards (ver app/sharding.py):
+#   python -m app.rebalance --plan                 owners cuyo shard no es el del anillo
+#   python -m app.rebalance --owner 42 --to s2     mueve un owner
+#   python -m app.rebalance --apply-plan           mueve todos los del --plan
+#   python -m app.rebalance --adopt s1             fija en s1 a todo owner con datos ahí
+import argparse
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+
+from app import models
+from app.database import Base, engine, shard_engines, shard_map
+from app.logs import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# en orden de copia (padres antes que hijos); se borran en orden inverso
+OWNER_TABLES = [
+    "projects",
+    "tickets",
+    "archived_tickets",
+    "ticket_attachments",
+    "ticket_lsh_buckets",
+    "ticket_activity",
+    "tombstones",
+    "change_counters",
+]
+# ids locales a cada shard: en el destino se generan de nuevo
+_LOCAL_ID_TABLES = {"ticket_lsh_buckets", "ticket_activity", "tombstones"}
+COPY_BATCH_SIZE = 1000
+
+
+def _set_placement(owner_id: int, shard: str, locked: bool) -> None:
+    OS = models.OwnerShard
+    values = {"shard": shard, "locked": locked, "updated_at": datetime.utcnow()}
+    with engine.begin() as conn:
+        updated = conn.execute(update(OS).where(OS.owner_id == owner_id).values(**values)).rowcount
+        if not updated:
+            conn.execute(insert(OS).values(owner_id=owner_id, **values))
+    shard_map.invalidate(owner_id)
+
+
+def _copy_owner(owner_id: int, source, target) -> dict[str, int]:
+    copied = {}
+    with source.connect() as src, target.begin() as dst:
+        for name in OWNER_TABLES:
+            table = Base.metadata.tables[name]
+            columns = [c for c in table.columns if not (name in _LOCAL_ID_TABLES and c.name == "id")]
+            result = src.execution_options(stream_results=True).execute(
+                select(*columns).where(table.c.owner_id == owner_id)
+            )
+            copied[name] = 0
+            while True:
+                rows = result.fetchmany(COPY_BATCH_SIZE)
+                if not rows:
+                    break
+                dst.execute(insert(table), [row._asdict() for row in rows])
+                copied[name] += len(rows)
+    return copied
+
+
+def _delete_owner(owner_id: int, source) -> None:
+    with source.begin() as conn:
+        for name in reversed(OWNER_TABLES):
+            table = Base.metadata.tables[name]
+            conn.execute(delete(table).where(table.c.owner_id == owner_id))
+
+
+def move_owner(owner_id: int, target: str) -> dict[str, int]:
+    """
+    Bloquea al owner (sus requests reciben 503), espera a que todos los
+    procesos lo vean, copia sus filas al shard destino en una transacción,
+    cambia el pin y recién ahí borra el origen.
+    """
+    if target not in shard_engines:
+        raise SystemExit(f"shard desconocido: {target}")
+    source = shard_map.shard_for(owner_id)
+    if source == target:
+        logger.info("rebalance: owner %s ya está en %s", owner_id, target)
+        return {}
+
+    _set_placement(owner_id, source, locked=True)
+    try:
+        # los demás procesos tienen el pin cacheado hasta SHARD_PIN_TTL
+        time.sleep(shard_map.pin_ttl)
+        copied = _copy_owner(owner_id, shard_engines[source], shard_engines[target])
+    except BaseException:
+        _set_placement(owner_id, source, locked=False)
+        raise
+
+    _set_placement(owner_id, target, locked=False)
+    _delete_owner(owner_id, shard_engines[source])
+    logger.info("rebalance: owner %s movido de %s a %s %s", owner_id, source, target, copied)
+    return copied
+
+
+def plan() -> list[tuple[int, str, str]]:
+    """(owner_id, shard actual, shard del anillo) para los owners fuera de lugar."""
+    OS = models.OwnerShard
+    with engine.connect() as conn:
+        rows = conn.execute(select(OS.owner_id, OS.shard)).all()
+    return [
+        (owner_id, shard, shard_map.ring_shard(owner_id))
+        for owner_id, shard in rows
+        if shard != shard_map.ring_shard(owner_id)
+    ]
+
+
+def adopt(shard: str) -> int:
+    """
+    Al activar sharding sobre una base existente (usada como shard `shard`):
+    fija ahí a todos los owners que ya tienen datos, antes de que el anillo
+    los mande a otro lado.
+    """
+    if shard not in shard_engines:
+        raise SystemExit(f"shard desconocido: {shard}")
+    owners: set[int] = set()
+    with shard_engines[shard].connect() as conn:
+        for name in ("projects", "tickets", "archived_tickets"):
+            table = Base.metadata.tables[name]
+            owners.update(conn.execute(select(table.c.owner_id).distinct()).scalars())
+
+    OS = models.OwnerShard
+    with engine.begin() as conn:
+        pinned = set(conn.execute(select(OS.owner_id).where(OS.owner_id.in_(owners))).scalars()) if owners else set()
+        new = [{"owner_id": o, "shard": shard, "locked": False, "updated_at": datetime.utcnow()} for o in owners - pinned]
+        if new:
+            conn.execute(insert(OS), new)
+    shard_map.invalidate()
+    return len(new)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mueve owners entre shards.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--owner", type=int)
+    group.add_argument("--plan", action="store_true")
+    group.add_argument("--apply-plan", action="store_true")
+    group.add_argument("--adopt", metavar="SHARD")
+    parser.add_argument("--to", metavar="SHARD")
+    args = parser.parse_args()
+
+    configure_logging()
+    if not shard_map.sharded:
+        raise SystemExit("SHARD_URLS no define más de un shard")
+
+    if args.owner is not None:
+        if not args.to:
+            parser.error("--owner requiere --to")
+        move_owner(args.owner, args.to)
+    elif args.plan:
+        for owner_id, current, wanted in plan():
+            print(f"{owner_id}\t{current} -> {wanted}")
+    elif args.apply_plan:
+        for owner_id, _, wanted in plan():
+            move_owner(owner_id, wanted)
+    else:
+        logger.info("rebalance: %s owners fijados en %s", adopt(args.adopt), args.adopt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# app/repos/activity_repo.py
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from app import models
+from app.sharding import owner_connection
+
+
+def bulk_insert(db: Session, rows: list[dict]) -> None:
+    if not rows:
+        return
+    # un INSERT multi-fila por owner, en la conexión de su shard
+    # (el bulk insert del ORM no soporta sesiones con sharding)
+    by_owner: dict[int, list[dict]] = {}
+    for row in rows:
+        by_owner.setdefault(row["owner_id"], []).append(row)
+    for owner_id, owner_rows in by_owner.items():
+        owner_connection(db, owner_id).execute(insert(models.TicketActivity.__table__), owner_rows)
+    db.commit()
+
+
+def base_query_by_ticket(db: Session, owner_id: int, ticket_id: int):
+    return db.query(models.TicketActivity).filter(
+        models.TicketActivity.ticket_id == ticket_id,
+        models.TicketActivity.owner_id == owner_id,
+    )
+
+
+def count(query) -> int:
+    return query.with_entities(func.count(models.TicketActivity.id)).scalar()
+
+
+def list_paginated(query, offset: int, limit: int):
+    return (
+        query.order_by(models.TicketActivity.created_at.desc(), models.TicketActivity.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
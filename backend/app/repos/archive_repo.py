@@ -0,0 +1,86 @@
+# app/repos/archive_repo.py
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, func, insert, literal, select
+from app import models
+from app.changes import reserve_seqs
+from app.enums import TicketStatus
+from app.sharding import owner_connection
+
+# columnas que se copian tal cual entre tickets y archived_tickets
+TICKET_COLUMNS = [c.name for c in models.Ticket.__table__.columns]
+
+
+def _archivable(cutoff: datetime):
+    """Cerrados antes de `cutoff`; se vuelve a chequear al mover, por si se reabrió en el medio."""
+    T = models.Ticket
+    closed_since = func.coalesce(T.closed_at, T.updated_at, T.created_at)
+    return and_(T.status == TicketStatus.CLOSED, closed_since < cutoff)
+
+
+def archivable(db: Session, cutoff: datetime, limit: int) -> list[tuple[int, int]]:
+    """(id, owner_id) de tickets cerrados antes de `cutoff`."""
+    return (
+        db.query(models.Ticket.id, models.Ticket.owner_id)
+        .filter(_archivable(cutoff))
+        .order_by(models.Ticket.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def move_to_archive(db: Session, owner_id: int, ticket_ids: list[int], cutoff: datetime, archived_at: datetime) -> list[int]:
+    """
+    Copia y borra en la misma transacción; el lote es chico para no retener locks.
+    Los tickets se bloquean y se re-chequean primero: uno reabierto desde
+    `archivable()` queda donde está (y como sigue abierto, el contador de
+    asignados no cambia). Por cada archivado queda una tombstone, como en
+    cualquier borrado, para que el delta sync lo saque. Devuelve los ids movidos.
+    """
+    if not ticket_ids:
+        return []
+    hot = models.Ticket.__table__
+    still_archivable = and_(hot.c.id.in_(ticket_ids), _archivable(cutoff))
+    moved_ids = list(db.execute(select(hot.c.id).where(still_archivable).with_for_update()).scalars())
+    if not moved_ids:
+        db.commit()
+        return []
+    guard = and_(hot.c.id.in_(moved_ids), _archivable(cutoff))
+    db.execute(
+        insert(models.ArchivedTicket).from_select(
+            TICKET_COLUMNS + ["archived_at"],
+            select(*[hot.c[n] for n in TICKET_COLUMNS], literal(archived_at)).where(guard),
+        )
+    )
+    # los buckets LSH no sirven para tickets fríos; se regeneran al restaurar
+    db.execute(delete(models.TicketLshBucket).where(models.TicketLshBucket.ticket_id.in_(moved_ids)))
+    db.execute(delete(models.Ticket).where(guard))
+
+    # DELETE masivo: no pasa por before_flush, las tombstones van a mano
+    seq = reserve_seqs(db, owner_id, len(moved_ids))
+    owner_connection(db, owner_id).execute(insert(models.Tombstone.__table__), [
+        {"owner_id": owner_id, "entity_type": "ticket", "entity_id": ticket_id, "change_seq": seq + i}
+        for i, ticket_id in enumerate(moved_ids)
+    ])
+    db.commit()
+    return moved_ids
+
+
+def get_by_id_and_owner(db: Session, ticket_id: int, owner_id: int) -> models.ArchivedTicket | None:
+    return (
+        db.query(models.ArchivedTicket)
+        .filter(models.ArchivedTicket.id == ticket_id, models.ArchivedTicket.owner_id == owner_id)
+        .first()
+    )
+
+
+def restore(db: Session, archived: models.ArchivedTicket, extra: dict) -> models.Ticket:
+    data = {name: getattr(archived, name) for name in TICKET_COLUMNS}
+    ticket = models.Ticket(**{**data, **extra})
+    db.delete(archived)
+    # el DELETE tiene que salir antes que el INSERT con el mismo id
+    db.flush()
+    db.add(ticket)
+    db.commit()
+    db.refresh(ticket)
+    return ticket
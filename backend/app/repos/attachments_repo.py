@@ -0,0 +1,84 @@
+# app/repos/attachments_repo.py
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app import models
+
+
+def create(
+    db: Session,
+    ticket_id: int,
+    owner_id: int,
+    filename: str,
+    content_type: str,
+    size: int,
+    sha256: str,
+) -> models.TicketAttachment:
+    attachment = models.TicketAttachment(
+        ticket_id=ticket_id,
+        owner_id=owner_id,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+    )
+    db.add(attachment)
+    db.flush()
+    return attachment
+
+
+def save(db: Session, attachment: models.TicketAttachment) -> None:
+    db.commit()
+    db.refresh(attachment)
+
+
+def list_by_ticket(db: Session, ticket_id: int, owner_id: int):
+    return (
+        db.query(models.TicketAttachment)
+        .filter(
+            models.TicketAttachment.ticket_id == ticket_id,
+            models.TicketAttachment.owner_id == owner_id,
+        )
+        .order_by(models.TicketAttachment.id)
+        .all()
+    )
+
+
+def get_by_id(db: Session, attachment_id: int, ticket_id: int, owner_id: int) -> models.TicketAttachment | None:
+    return (
+        db.query(models.TicketAttachment)
+        .filter(
+            models.TicketAttachment.id == attachment_id,
+            models.TicketAttachment.ticket_id == ticket_id,
+            models.TicketAttachment.owner_id == owner_id,
+        )
+        .first()
+    )
+
+
+def sha_counts_for_tickets(db: Session, ticket_ids: list[int]) -> dict[str, int]:
+    """{sha256: cantidad de adjuntos} de esos tickets."""
+    if not ticket_ids:
+        return {}
+    rows = (
+        db.query(models.TicketAttachment.sha256, func.count())
+        .filter(models.TicketAttachment.ticket_id.in_(ticket_ids))
+        .group_by(models.TicketAttachment.sha256)
+        .all()
+    )
+    return {sha: n for sha, n in rows}
+
+
+def count_sha_references(db: Session, sha256: str) -> int:
+    # los blobs se comparten entre owners: con sharding hay que contar en todos los shards
+    rows = (
+        db.query(func.count(models.TicketAttachment.id))
+        .filter(models.TicketAttachment.sha256 == sha256)
+        .execution_options(all_shards=True)
+        .all()
+    )
+    return sum(n for (n,) in rows)
+
+
+def delete(db: Session, attachment: models.TicketAttachment) -> None:
+    db.delete(attachment)
+    db.commit()
@@ -0,0 +1,39 @@
+# app/repos/blobs_repo.py
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.sharding import directory_connection
+
+BR = models.BlobRef.__table__
+
+
+def add(db: Session, sha256: str, n: int) -> int | None:
+    """
+    Suma `n` (puede ser negativo o 0) y devuelve el refcount nuevo. El UPDATE
+    deja la fila bloqueada hasta el commit; si no existía se crea en `n`.
+    Devuelve None si otro request la creó a la vez (hay que reintentar).
+    """
+    conn = directory_connection(db)
+    now = datetime.utcnow()
+    updated = conn.execute(
+        update(BR).where(BR.c.sha256 == sha256).values(refcount=BR.c.refcount + n, updated_at=now)
+    ).rowcount
+    if not updated:
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(BR).values(sha256=sha256, refcount=n, updated_at=now))
+        except IntegrityError:
+            return None
+    return conn.execute(select(BR.c.refcount).where(BR.c.sha256 == sha256)).scalar()
+
+
+def set_count(db: Session, sha256: str, refcount: int) -> None:
+    directory_connection(db).execute(update(BR).where(BR.c.sha256 == sha256).values(refcount=refcount, updated_at=datetime.utcnow()))
+
+
+def remove(db: Session, sha256: str) -> None:
+    directory_connection(db).execute(delete(BR).where(BR.c.sha256 == sha256))
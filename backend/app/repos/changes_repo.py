@@ -0,0 +1,33 @@
+# app/repos/changes_repo.py
+from sqlalchemy.orm import Session
+from app import models
+
+
+def tickets_since(db: Session, owner_id: int, since: int, limit: int) -> list[models.Ticket]:
+    return (
+        db.query(models.Ticket)
+        .filter(models.Ticket.owner_id == owner_id, models.Ticket.change_seq > since)
+        .order_by(models.Ticket.change_seq)
+        .limit(limit)
+        .all()
+    )
+
+
+def projects_since(db: Session, owner_id: int, since: int, limit: int) -> list[models.Project]:
+    return (
+        db.query(models.Project)
+        .filter(models.Project.owner_id == owner_id, models.Project.change_seq > since)
+        .order_by(models.Project.change_seq)
+        .limit(limit)
+        .all()
+    )
+
+
+def tombstones_since(db: Session, owner_id: int, since: int, limit: int) -> list[models.Tombstone]:
+    return (
+        db.query(models.Tombstone)
+        .filter(models.Tombstone.owner_id == owner_id, models.Tombstone.change_seq > since)
+        .order_by(models.Tombstone.change_seq)
+        .limit(limit)
+        .all()
+    )
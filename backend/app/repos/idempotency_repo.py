@@ -0,0 +1,83 @@
+# app/repos/idempotency_repo.py
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, or_, update
+from app import models
+
+
+def get(db: Session, user_id: int, key: str) -> models.IdempotencyKey | None:
+    return (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.user_id == user_id, models.IdempotencyKey.key == key)
+        .first()
+    )
+
+
+def try_insert(db: Session, user_id: int, key: str, request_hash: str, now: datetime, expires_at: datetime) -> int | None:
+    """Reserva la key; devuelve el id o None si ya existe (la UNIQUE decide entre requests concurrentes)."""
+    row = models.IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        status="in_flight",
+        created_at=now,
+        expires_at=expires_at,
+    )
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    return row.id
+
+
+def try_take_over(
+    db: Session,
+    row_id: int,
+    request_hash: str,
+    now: datetime,
+    expires_at: datetime,
+    stale_before: datetime,
+) -> bool:
+    """Reusa una key vencida o un in_flight abandonado (proceso caído). UPDATE condicional."""
+    K = models.IdempotencyKey
+    result = db.execute(
+        update(K)
+        .where(
+            K.id == row_id,
+            or_(K.expires_at < now, and_(K.status == "in_flight", K.created_at < stale_before)),
+        )
+        .values(
+            request_hash=request_hash,
+            status="in_flight",
+            response_status=None,
+            response_content_type=None,
+            response_body=None,
+            created_at=now,
+            expires_at=expires_at,
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def complete(db: Session, row_id: int, status_code: int, content_type: str | None, body: bytes) -> None:
+    db.execute(
+        update(models.IdempotencyKey)
+        .where(models.IdempotencyKey.id == row_id)
+        .values(status="done", response_status=status_code, response_content_type=content_type, response_body=body)
+    )
+    db.commit()
+
+
+def release(db: Session, row_id: int) -> None:
+    db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.id == row_id))
+    db.commit()
+
+
+def delete_expired(db: Session, now: datetime) -> int:
+    result = db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at < now))
+    db.commit()
+    return result.rowcount
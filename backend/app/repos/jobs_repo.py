@@ -0,0 +1,160 @@
+# app/repos/jobs_repo.py
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select, update
+from app import models
+from app.sharding import directory_connection
+
+
+def create(
+    db: Session,
+    job_type: str,
+    payload: dict,
+    owner_id: int | None,
+    max_attempts: int,
+    run_after: datetime | None = None,
+) -> models.Job:
+    now = datetime.utcnow()
+    job = models.Job(
+        type=job_type,
+        payload=payload,
+        owner_id=owner_id,
+        max_attempts=max_attempts,
+        status="queued",
+        run_after=run_after or now,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_by_id(db: Session, job_id: int) -> models.Job | None:
+    return db.query(models.Job).filter(models.Job.id == job_id).first()
+
+
+def get_by_id_and_owner(db: Session, job_id: int, owner_id: int) -> models.Job | None:
+    return (
+        db.query(models.Job)
+        .filter(models.Job.id == job_id, models.Job.owner_id == owner_id)
+        .first()
+    )
+
+
+def next_ready(db: Session, job_types: list[str], now: datetime) -> tuple[int, str] | None:
+    """(id, tipo) del próximo job en cola listo para correr."""
+    if not job_types:
+        return None
+    row = (
+        db.query(models.Job.id, models.Job.type)
+        .filter(
+            models.Job.status == "queued",
+            models.Job.run_after <= now,
+            models.Job.type.in_(job_types),
+        )
+        .order_by(models.Job.run_after, models.Job.id)
+        .first()
+    )
+    return tuple(row) if row is not None else None
+
+
+def count_running(db: Session, job_type: str) -> int:
+    return (
+        db.query(func.count(models.Job.id))
+        .filter(models.Job.type == job_type, models.Job.status == "running")
+        .scalar()
+    )
+
+
+def try_claim(db: Session, job_id: int, job_type: str, limit: int, worker_id: str, now: datetime) -> bool:
+    """
+    UPDATE condicional: sólo un worker gana el job aunque varios lo vean a la
+    vez, y sólo si hay menos de `limit` jobs de ese tipo corriendo (en todos
+    los procesos). En Postgres los claims del mismo tipo se serializan con un
+    advisory lock para que dos no cuenten lo mismo a la vez.
+    """
+    conn = directory_connection(db)
+    if conn.dialect.name == "postgresql":
+        conn.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"jobs:{job_type}"))))
+    running = (
+        select(func.count())
+        .select_from(models.Job)
+        .where(models.Job.type == job_type, models.Job.status == "running")
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == "queued", running < limit)
+        .values(
+            status="running",
+            attempts=models.Job.attempts + 1,
+            locked_by=worker_id,
+            locked_at=now,
+            updated_at=now,
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def mark_succeeded(db: Session, job: models.Job, result) -> None:
+    now = datetime.utcnow()
+    job.status = "succeeded"
+    job.result = result
+    job.error = None
+    job.locked_by = None
+    job.locked_at = None
+    job.updated_at = now
+    job.finished_at = now
+    db.commit()
+
+
+def mark_failed(db: Session, job: models.Job, error: str, retry_at: datetime | None) -> None:
+    now = datetime.utcnow()
+    job.error = error
+    job.locked_by = None
+    job.locked_at = None
+    job.updated_at = now
+    if retry_at is not None:
+        job.status = "queued"
+        job.run_after = retry_at
+    else:
+        job.status = "failed"
+        job.finished_at = now
+    db.commit()
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str, now: datetime) -> bool:
+    """Renueva locked_at mientras el job corre; False si el job ya no es de este worker."""
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == "running", models.Job.locked_by == worker_id)
+        .values(locked_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def requeue_stale(db: Session, older_than: timedelta) -> tuple[int, int]:
+    """
+    Jobs que quedaron 'running' porque el proceso murió (sin heartbeat desde
+    hace `older_than`): vuelven a la cola si les quedan intentos, si no
+    quedan 'failed'. Devuelve (reencolados, fallidos).
+    """
+    now = datetime.utcnow()
+    stale = and_(models.Job.status == "running", models.Job.locked_at < now - older_than)
+    released = {"locked_by": None, "locked_at": None, "updated_at": now}
+    requeued = db.execute(
+        update(models.Job)
+        .where(stale, models.Job.attempts < models.Job.max_attempts)
+        .values(status="queued", run_after=now, **released)
+    ).rowcount
+    failed = db.execute(
+        update(models.Job)
+        .where(stale, models.Job.attempts >= models.Job.max_attempts)
+        .values(status="failed", error="El worker dejó de responder.", finished_at=now, **released)
+    ).rowcount
+    db.commit()
+    return requeued, failed
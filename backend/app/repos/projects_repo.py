@@ -1,7 +1,12 @@
 # app/repos/projects_repo.py
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import delete as delete_stmt, func, insert, select, update
 from app import models
+from app.assignments import apply_open_deltas
+from app.changes import reserve_seqs
+from app.sharding import owner_connection
+from app.repos import tickets_repo
 
 
 def create(db: Session, owner_id: int, name: str, description: str | None) -> models.Project:
@@ -20,6 +25,44 @@ def get_by_id_and_owner(db: Session, project_id: int, owner_id: int) -> models.P
     )
 
 
+def project_ids_by_owner(db: Session, owner_id: int) -> list[int]:
+    """Ids de todos los proyectos del owner, en una query."""
+    rows = db.query(models.Project.id).filter(models.Project.owner_id == owner_id).all()
+    return [project_id for (project_id,) in rows]
+
+
+def writable_project_id(project_id: int, owner_id: int):
+    """
+    Subquery que vale `project_id` si el proyecto es del owner y no se está
+    eliminando, y NULL si no. Asignada a Ticket.project_id (NOT NULL), el
+    chequeo viaja dentro del mismo INSERT/UPDATE del ticket: si no pasa, la
+    escritura falla con IntegrityError. FOR SHARE: marcar el proyecto para
+    borrar espera a que esa transacción termine.
+    """
+    P = models.Project
+    return (
+        select(P.id)
+        .where(P.id == project_id, P.owner_id == owner_id, P.deleting_at.is_(None))
+        .with_for_update(read=True)
+        .scalar_subquery()
+    )
+
+
+def lock(db: Session, project: models.Project) -> None:
+    """Bloquea la fila del proyecto (FOR UPDATE) y la refresca."""
+    db.refresh(project, with_for_update=True)
+
+
+def get_many_by_owner(db: Session, project_ids: list[int], owner_id: int) -> list[models.Project]:
+    if not project_ids:
+        return []
+    return (
+        db.query(models.Project)
+        .filter(models.Project.id.in_(project_ids), models.Project.owner_id == owner_id)
+        .all()
+    )
+
+
 def list_by_owner(db: Session, owner_id: int, offset: int, limit: int, order_col):
     return (
         db.query(models.Project)
@@ -40,7 +83,76 @@ def count_by_owner(db: Session, owner_id: int) -> int:
 
 
 def count_tickets_in_project(db: Session, project_id: int) -> int:
-    return db.query(models.Ticket).filter(models.Ticket.project_id == project_id).count()
+    # incluye los archivados: también referencian al proyecto
+    hot = db.query(models.Ticket).filter(models.Ticket.project_id == project_id).count()
+    archived = db.query(models.ArchivedTicket).filter(models.ArchivedTicket.project_id == project_id).count()
+    return hot + archived
+
+
+def mark_deleting(db: Session, project: models.Project, total: int) -> None:
+    project.deleting_at = datetime.utcnow()
+    project.purge_total = total
+    project.purge_done = 0
+    db.commit()
+    db.refresh(project)
+
+
+def link_purge_job(db: Session, project: models.Project, job_id: int) -> None:
+    """
+    El job ya está en la cola y puede haber borrado el proyecto: UPDATE
+    directo (0 filas si ya no está). `project` tiene que estar fuera de la
+    sesión (ver projects_service.delete_project); sólo se le copia el valor.
+    """
+    db.execute(update(models.Project).where(models.Project.id == project.id).values(purge_job_id=job_id))
+    db.commit()
+    project.purge_job_id = job_id
+
+
+def ticket_batch(db: Session, model, project_id: int, limit: int) -> list[tuple[int, int]]:
+    """(id, owner_id) del próximo lote de tickets del proyecto (activos o archivados)."""
+    return (
+        db.query(model.id, model.owner_id)
+        .filter(model.project_id == project_id)
+        .order_by(model.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def delete_ticket_batch(db: Session, model, project_id: int, rows: list[tuple[int, int]]) -> int:
+    """
+    Borra un lote en una transacción corta (sólo bloquea esas filas).
+    Es un DELETE masivo, así que no pasa por before_flush: las tombstones,
+    sus change_seq y el contador de asignados se resuelven acá.
+    """
+    if not rows:
+        return 0
+    ticket_ids = [ticket_id for ticket_id, _ in rows]
+
+    by_owner: dict[int, list[int]] = {}
+    for ticket_id, owner_id in rows:
+        by_owner.setdefault(owner_id, []).append(ticket_id)
+    for owner_id, ids in by_owner.items():
+        seq = reserve_seqs(db, owner_id, len(ids))
+        # Core sobre la conexión del shard: el bulk insert del ORM no soporta sharding
+        owner_connection(db, owner_id).execute(insert(models.Tombstone.__table__), [
+            {"owner_id": owner_id, "entity_type": "ticket", "entity_id": ticket_id, "change_seq": seq + i}
+            for i, ticket_id in enumerate(ids)
+        ])
+
+    db.execute(delete_stmt(models.TicketAttachment).where(models.TicketAttachment.ticket_id.in_(ticket_ids)))
+    if model is models.Ticket:
+        # tampoco pasa por el contador de asignados (los archivados están cerrados)
+        apply_open_deltas(db, {user_id: -n for user_id, n in tickets_repo.open_assigned_counts(db, ticket_ids).items()})
+        db.execute(delete_stmt(models.TicketLshBucket).where(models.TicketLshBucket.ticket_id.in_(ticket_ids)))
+    result = db.execute(delete_stmt(model).where(model.id.in_(ticket_ids)))
+    db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id)
+        .values(purge_done=func.coalesce(models.Project.purge_done, 0) + result.rowcount)
+    )
+    db.commit()
+    return result.rowcount
 
 
 def delete(db: Session, project: models.Project) -> None:
@@ -1,8 +1,12 @@
 # app/repos/tickets_repo.py
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Integer, and_, func, literal, or_, select, text, tuple_, type_coerce, union_all
+from sqlalchemy.types import TypeDecorator
 from typing import Optional
 from app import models
+from app.enums import TicketStatus
+from app.sharding import session_dialect
 
 
 def create(db: Session, owner_id: int, data: dict) -> models.Ticket:
@@ -21,24 +25,223 @@ def get_by_id_and_owner(db: Session, ticket_id: int, owner_id: int) -> models.Ti
     )
 
 
-def base_query_by_owner(db: Session, owner_id: int):
-    return db.query(models.Ticket).filter(models.Ticket.owner_id == owner_id)
+def get_many_by_owner(db: Session, ticket_ids: list[int], owner_id: int) -> list[models.Ticket]:
+    if not ticket_ids:
+        return []
+    return (
+        db.query(models.Ticket)
+        .filter(models.Ticket.id.in_(ticket_ids), models.Ticket.owner_id == owner_id)
+        .all()
+    )
+
+
+def ticket_entity(include_archived: bool = False):
+    """
+    Entidad sobre la que se listan tickets: la tabla caliente, o un UNION ALL
+    con archived_tickets mapeado como Ticket (mismas columnas, mismos ids).
+    """
+    if not include_archived:
+        return models.Ticket
+    names = [c.name for c in models.Ticket.__table__.columns]
+    archived = models.ArchivedTicket.__table__
+    both = union_all(
+        select(*[models.Ticket.__table__.c[n] for n in names]),
+        select(*[archived.c[n] for n in names]),
+    ).subquery("tickets_all")
+    return aliased(models.Ticket, both)
 
 
-def apply_project_filter(query, project_id: int):
-    return query.filter(models.Ticket.project_id == project_id)
+def base_query_by_owner(db: Session, owner_id: int, entity=models.Ticket):
+    return db.query(entity).filter(entity.owner_id == owner_id)
 
 
-def apply_search_filter(query, search: str):
+def apply_project_filter(query, project_id: int, entity=models.Ticket):
+    return query.filter(entity.project_id == project_id)
+
+
+def apply_search_filter(query, search: str, entity=models.Ticket):
     s = f"%{search}%"
     return query.filter(
-        (models.Ticket.title.ilike(s)) |
-        (models.Ticket.description.ilike(s))
+        (entity.title.ilike(s)) |
+        (entity.description.ilike(s))
+    )
+
+
+def apply_in_filter(query, column, values: list):
+    """Filtro multi-valor; None en la lista matchea NULL (p.ej. tickets sin asignar)."""
+    non_null = [v for v in values if v is not None]
+    conditions = []
+    if non_null:
+        conditions.append(column.in_(non_null))
+    if len(non_null) != len(values):
+        conditions.append(column.is_(None))
+    if not conditions:
+        return query
+    return query.filter(conditions[0] if len(conditions) == 1 else (conditions[0] | conditions[1]))
+
+
+def apply_range_filter(query, column, after=None, before=None):
+    if after is not None:
+        query = query.filter(column >= after)
+    if before is not None:
+        query = query.filter(column < before)
+    return query
+
+
+# faceta -> atributo de Ticket
+FACET_COLUMNS = {
+    "status": "status",
+    "priority": "priority",
+    "assignee": "assigned_to_id",
+}
+
+
+def facet_counts(db: Session, query, facets: list[str], entity=models.Ticket) -> dict[str, list[tuple]]:
+    """
+    Conteos por valor para cada faceta sobre el filtro actual, en una sola query:
+    GROUPING SETS en Postgres, UNION ALL de GROUP BYs en el resto (SQLite).
+    """
+    result = {facet: [] for facet in facets}
+    if not facets:
+        return result
+
+    base = query.with_entities(*[getattr(entity, FACET_COLUMNS[f]).label(f) for f in facets]).subquery()
+
+    if session_dialect(db).name == "postgresql":
+        cols = [base.c[f] for f in facets]
+        stmt = (
+            select(
+                *cols,
+                *[func.grouping(c).label(f"g_{f}") for f, c in zip(facets, cols)],
+                func.count().label("n"),
+            )
+            .group_by(func.grouping_sets(*[tuple_(c) for c in cols]))
+        )
+        for row in db.execute(stmt).mappings():
+            for f in facets:
+                # grouping()=0 indica que esta fila agrupa por esa columna
+                if row[f"g_{f}"] == 0:
+                    result[f].append((row[f], row["n"]))
+                    break
+        return result
+
+    # en el UNION la columna "value" toma el tipo de la primera rama, así que
+    # viajan los enteros crudos y cada faceta se decodifica con su propio tipo
+    parts = [
+        select(literal(f).label("facet"), type_coerce(base.c[f], Integer).label("value"), func.count().label("n"))
+        .group_by(base.c[f])
+        for f in facets
+    ]
+    stmt = union_all(*parts) if len(parts) > 1 else parts[0]
+    dialect = session_dialect(db)
+    for facet, value, n in db.execute(stmt):
+        col_type = getattr(models.Ticket, FACET_COLUMNS[facet]).type
+        if value is not None and isinstance(col_type, TypeDecorator):
+            value = col_type.process_result_value(value, dialect)
+        result[facet].append((value, n))
+    return result
+
+
+def titles_by_owner(db: Session, owner_id: int) -> list[tuple[int, str]]:
+    return (
+        db.query(models.Ticket.id, models.Ticket.title)
+        .filter(models.Ticket.owner_id == owner_id)
+        .all()
+    )
+
+
+def _like_literal(q: str) -> str:
+    """Escapa los comodines de LIKE para buscar el texto tal cual (con escape='\\')."""
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def suggest_titles_pg(db: Session, owner_id: int, q: str, limit: int, timeout_ms: int) -> list[tuple[int, str]]:
+    """Autocompletado con el índice pg_trgm; corta la query si supera el presupuesto."""
+    db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+    return (
+        db.query(models.Ticket.id, models.Ticket.title)
+        .filter(models.Ticket.owner_id == owner_id, models.Ticket.title.ilike(f"%{_like_literal(q)}%", escape="\\"))
+        .order_by(func.similarity(models.Ticket.title, q).desc(), models.Ticket.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def lsh_candidates(
+    db: Session,
+    owner_id: int,
+    bands: list[tuple[int, int]],
+    exclude_id: int,
+    project_id: int | None,
+    limit: int,
+) -> list[tuple]:
+    """Tickets que comparten al menos un bucket LSH: (id, title, project_id, minhash)."""
+    B = models.TicketLshBucket
+    matching_ids = (
+        select(B.ticket_id)
+        .where(
+            B.owner_id == owner_id,
+            or_(*[and_(B.band == band, B.bucket == bucket) for band, bucket in bands]),
+            B.ticket_id != exclude_id,
+        )
+        .distinct()
+    )
+    q = db.query(
+        models.Ticket.id,
+        models.Ticket.title,
+        models.Ticket.project_id,
+        models.Ticket.minhash,
+    ).filter(
+        models.Ticket.id.in_(matching_ids),
+        models.Ticket.owner_id == owner_id,
+        models.Ticket.minhash.isnot(None),
+    )
+    if project_id is not None:
+        q = q.filter(models.Ticket.project_id == project_id)
+    return q.order_by(models.Ticket.id.desc()).limit(limit).all()
+
+
+def list_assigned(
+    db: Session,
+    user_id: int,
+    statuses: list,
+    after: tuple[datetime, int] | None,
+    limit: int,
+) -> list[models.Ticket]:
+    """
+    Keyset por (updated_at, id) descendente; sirve el índice (assigned_to_id, status, updated_at).
+    Los tickets asignados pueden ser de owners en cualquier shard: cada shard
+    devuelve hasta `limit` y se mezclan acá.
+    """
+    T = models.Ticket
+    q = db.query(T).filter(T.assigned_to_id == user_id).execution_options(all_shards=True)
+    q = apply_in_filter(q, T.status, statuses)
+    if after is not None:
+        updated_at, ticket_id = after
+        q = q.filter(or_(T.updated_at < updated_at, and_(T.updated_at == updated_at, T.id < ticket_id)))
+    rows = q.order_by(T.updated_at.desc(), T.id.desc()).limit(limit).all()
+    rows.sort(key=lambda t: (t.updated_at, t.id), reverse=True)
+    return rows[:limit]
+
+
+def open_assigned_counts(db: Session, ticket_ids: list[int]) -> dict[int, int]:
+    """Tickets abiertos con asignado entre `ticket_ids`, agrupados por asignado."""
+    T = models.Ticket
+    rows = (
+        db.query(T.assigned_to_id, func.count(T.id))
+        .filter(
+            T.id.in_(ticket_ids),
+            T.assigned_to_id.isnot(None),
+            or_(T.status.is_(None), T.status != TicketStatus.CLOSED),
+        )
+        .group_by(T.assigned_to_id)
+        .all()
     )
+    return {user_id: n for user_id, n in rows}
 
 
-def count(query) -> int:
-    return query.with_entities(func.count(models.Ticket.id)).scalar()
+def count(query, entity=models.Ticket) -> int:
+    return query.with_entities(func.count(entity.id)).scalar()
 
 
 def list_paginated(query, offset: int, limit: int, order_col):
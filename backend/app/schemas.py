@@ -1,8 +1,10 @@
 # app/schemas.py
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Any, Dict, Union
 from datetime import datetime
 
+from app.enums import TicketStatus, TicketPriority
+
 # -------- Auth --------
 
 class Token(BaseModel):
@@ -26,6 +28,7 @@ class UserCreate(UserBase):
 class UserRead(UserBase):
     id: int
     is_active: bool
+    assigned_open_count: int = 0
 
     class Config:
         from_attributes = True
@@ -46,8 +49,8 @@ class UserUpdate(BaseModel):
 class TicketBase(BaseModel):
     title: str
     description: Optional[str] = None
-    status: Optional[str] = None
-    priority: Optional[str] = None
+    status: Optional[TicketStatus] = None
+    priority: Optional[TicketPriority] = None
     project_id: int
     assigned_to_id: Optional[int] = None
 
@@ -59,8 +62,8 @@ class TicketCreate(TicketBase):
 class TicketUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    status: Optional[str] = None
-    priority: Optional[str] = None
+    status: Optional[TicketStatus] = None
+    priority: Optional[TicketPriority] = None
     project_id: Optional[int] = None
     assigned_to_id: Optional[int] = None
 
@@ -74,9 +77,86 @@ class TicketRead(TicketBase):
     class Config:
         from_attributes = True
 
+class SimilarTicket(BaseModel):
+    id: int
+    title: str
+    project_id: int
+    similarity: float
+
+
+class TicketCreateResponse(TicketRead):
+    # probables duplicados detectados al crear (MinHash/LSH)
+    possible_duplicates: List[SimilarTicket] = []
+
+
+class TicketSuggestion(BaseModel):
+    id: int
+    title: str
+
+
+class TicketFilters(BaseModel):
+    status: List[TicketStatus] = []
+    priority: List[TicketPriority] = []
+    # None = tickets sin asignar
+    assigned_to_id: List[Optional[int]] = []
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+
+
+class FacetValue(BaseModel):
+    value: Optional[Union[int, str]] = None
+    count: int
+
+
 class PaginatedTicketResponse(BaseModel):
     items: List[TicketRead]
     total: int
+    # sólo si se pidió ?facets=...
+    facets: Optional[Dict[str, List[FacetValue]]] = None
+    # sólo en multi-get (?ids=...): ids pedidos que no existen o no son del usuario
+    missing: Optional[List[int]] = None
+
+
+class AssignedTicketsResponse(BaseModel):
+    items: List[TicketRead]
+    # None cuando no hay más páginas
+    next_cursor: Optional[str] = None
+    # tickets asignados no cerrados (contador mantenido en users)
+    open_count: int
+
+
+class IdListRequest(BaseModel):
+    ids: List[int]
+
+class TicketActivityRead(BaseModel):
+    id: int
+    ticket_id: int
+    actor_id: Optional[int] = None
+    action: str
+    changes: dict
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PaginatedTicketActivityResponse(BaseModel):
+    items: List[TicketActivityRead]
+    total: int
+
+class TicketAttachmentRead(BaseModel):
+    id: int
+    ticket_id: int
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 # -------- Projects (lo que ya tenías) --------
 
@@ -99,6 +179,11 @@ class ProjectRead(ProjectBase):
     owner_id: int                    
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    # borrado en cascada en curso (DELETE /projects/{id}?cascade=true)
+    deleting_at: Optional[datetime] = None
+    purge_job_id: Optional[int] = None
+    purge_total: Optional[int] = None
+    purge_done: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -109,4 +194,58 @@ class ProjectWithTickets(ProjectRead):
 
 class ProjectListResponse(BaseModel):
     items: List[ProjectRead]
-    total: int
\ No newline at end of file
+    total: int
+    missing: Optional[List[int]] = None
+
+
+# -------- Jobs --------
+
+class JobRead(BaseModel):
+    id: int
+    type: str
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    run_after: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# -------- Delta sync --------
+
+class ChangesResponse(BaseModel):
+    tickets: List[TicketRead]
+    projects: List[ProjectRead]
+    deleted_tickets: List[int]
+    deleted_projects: List[int]
+    next_token: str
+    has_more: bool
+
+
+# -------- Batch --------
+
+class BatchSubRequest(BaseModel):
+    method: str
+    path: str  # con query string, p. ej. "/tickets?project_id=3"
+    body: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+
+class BatchSubResponse(BaseModel):
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
@@ -0,0 +1,66 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import models, minhash, schemas
+from app.events import ticket_events
+from app.exceptions import NotFoundError
+from app.repos import archive_repo
+from app.services import tickets_service
+from app.sharding import owner_scope
+from app.suggest import suggest_index
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+
+def archive_closed_tickets(
+    db: Session,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: int | None = None,
+) -> int:
+    """Mueve a archived_tickets los tickets cerrados hace más de N días, por lotes."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = archive_repo.archivable(db, cutoff, batch_size)
+        if not rows:
+            break
+        by_owner: dict[int, list[int]] = {}
+        for ticket_id, owner_id in rows:
+            by_owner.setdefault(owner_id, []).append(ticket_id)
+        for owner_id, ticket_ids in by_owner.items():
+            with owner_scope(db, owner_id):
+                moved_ids = archive_repo.move_to_archive(db, owner_id, ticket_ids, cutoff, datetime.utcnow())
+            moved += len(moved_ids)
+            for ticket_id in moved_ids:
+                suggest_index.remove(owner_id, ticket_id)
+        batches += 1
+        logger.info("archive: lote %s, %s tickets movidos en total", batches, moved)
+    return moved
+
+
+def restore_ticket(db: Session, owner_id: int, ticket_id: int) -> models.Ticket:
+    archived = archive_repo.get_by_id_and_owner(db, ticket_id, owner_id)
+    if not archived:
+        raise NotFoundError("Ticket archivado no encontrado.")
+    project_id = archived.project_id
+    extra = {"project_id": tickets_service.ensure_project_accepts_tickets(db, owner_id, project_id)}
+    if archived.minhash is not None:
+        extra["lsh_buckets"] = [
+            models.TicketLshBucket(owner_id=owner_id, band=band, bucket=bucket)
+            for band, bucket in minhash.band_hashes(minhash.unpack(archived.minhash))
+        ]
+    with tickets_service.project_write_guard(db, owner_id, project_id):
+        ticket = archive_repo.restore(db, archived, extra)
+
+    suggest_index.upsert(owner_id, ticket.id, ticket.title)
+    data = schemas.TicketRead.model_validate(ticket).model_dump(mode="json")
+    ticket_events.publish("ticket.restored", owner_id, [ticket.project_id], data)
+    return ticket
@@ -0,0 +1,60 @@
+from sqlalchemy.orm import Session
+
+from app import models
+from app.exceptions import NotFoundError
+from app.repos import attachments_repo
+from app.services import blobs_service, tickets_service
+from app.storage import BlobStore, StoredBlob
+
+
+def create_attachment(db: Session, store: BlobStore, owner_id: int, ticket_id: int, blob: StoredBlob) -> models.TicketAttachment:
+    try:
+        tickets_service.get_ticket(db, owner_id, ticket_id)
+    except NotFoundError:
+        store.discard(blob)
+        raise
+    attachment = attachments_repo.create(
+        db,
+        ticket_id=ticket_id,
+        owner_id=owner_id,
+        filename=blob.filename,
+        content_type=blob.content_type,
+        size=blob.size,
+        sha256=blob.sha256,
+    )
+    # la referencia se toma al final y se confirma junto con el adjunto
+    blobs_service.acquire(db, store, blob)
+    try:
+        attachments_repo.save(db, attachment)
+    except Exception:
+        db.rollback()
+        # el blob ya quedó en su lugar: si nadie más lo usa, no lo dejamos huérfano
+        blobs_service.release(db, store, {blob.sha256: 0})
+        raise
+    return attachment
+
+
+def list_attachments(db: Session, owner_id: int, ticket_id: int):
+    tickets_service.get_ticket(db, owner_id, ticket_id)
+    return attachments_repo.list_by_ticket(db, ticket_id, owner_id)
+
+
+def get_attachment(db: Session, owner_id: int, ticket_id: int, attachment_id: int) -> models.TicketAttachment:
+    attachment = attachments_repo.get_by_id(db, attachment_id, ticket_id, owner_id)
+    if not attachment:
+        raise NotFoundError("Adjunto no encontrado.")
+    return attachment
+
+
+def get_attachment_path(db: Session, store: BlobStore, owner_id: int, ticket_id: int, attachment_id: int) -> tuple[models.TicketAttachment, str]:
+    attachment = get_attachment(db, owner_id, ticket_id, attachment_id)
+    if not store.exists(attachment.sha256):
+        raise NotFoundError("El contenido del adjunto no está disponible.")
+    return attachment, store.path_for(attachment.sha256)
+
+
+def delete_attachment(db: Session, store: BlobStore, owner_id: int, ticket_id: int, attachment_id: int) -> models.TicketAttachment:
+    attachment = get_attachment(db, owner_id, ticket_id, attachment_id)
+    attachments_repo.delete(db, attachment)
+    blobs_service.release(db, store, {attachment.sha256: 1})
+    return attachment
@@ -0,0 +1,40 @@
+"""
+Referencias a blobs del BlobStore (compartidos entre adjuntos por sha256).
+
+Subir toma la referencia (`blob_refs`) antes de dejar el archivo en su ruta
+final y en la misma transacción que crea el adjunto; liberar la descuenta y,
+si llega a 0, vuelve a contar los adjuntos reales antes de borrar el
+archivo. Las dos cosas pasan con la fila de `blob_refs` bloqueada, así un
+upload que reusa el sha no puede quedar en el medio del check y el unlink.
+"""
+from sqlalchemy.orm import Session
+
+from app.repos import attachments_repo, blobs_repo
+from app.storage import BlobStore, StoredBlob
+
+
+def _add(db: Session, sha256: str, n: int) -> int:
+    while True:
+        refcount = blobs_repo.add(db, sha256, n)
+        if refcount is not None:
+            return refcount
+
+
+def acquire(db: Session, store: BlobStore, blob: StoredBlob) -> None:
+    """Toma una referencia y deja el blob en su lugar. Queda bloqueado hasta el commit del caller."""
+    _add(db, blob.sha256, 1)
+    store.place(blob)
+
+
+def release(db: Session, store: BlobStore, counts: dict[str, int]) -> None:
+    """Descuenta referencias ({sha: n}) de adjuntos ya borrados; borra los blobs que quedan sin uso."""
+    for sha, n in counts.items():
+        if _add(db, sha, -n) <= 0:
+            # el contador puede estar atrasado (adjuntos de antes de blob_refs): manda el conteo real
+            actual = attachments_repo.count_sha_references(db, sha)
+            if actual:
+                blobs_repo.set_count(db, sha, actual)
+            else:
+                store.delete(sha)
+                blobs_repo.remove(db, sha)
+        db.commit()
@@ -0,0 +1,12 @@
+from sqlalchemy.orm import Session
+
+from app import models
+from app.exceptions import NotFoundError
+from app.repos import jobs_repo
+
+
+def get_job(db: Session, owner_id: int, job_id: int) -> models.Job:
+    job = jobs_repo.get_by_id_and_owner(db, job_id, owner_id)
+    if not job:
+        raise NotFoundError("Job no encontrado.")
+    return job
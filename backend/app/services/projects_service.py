@@ -1,17 +1,33 @@
+import logging
+import os
+
 from sqlalchemy.orm import Session
 
 from app import models, schemas
+from app.events import ticket_events
 from app.exceptions import NotFoundError, BadRequestError
-from app.repos import projects_repo
+from app.jobs import enqueue
+from app.repos import attachments_repo, projects_repo
+from app.services import blobs_service
+from app.sharding import owner_scope
+from app.storage import get_blob_store
+from app.suggest import suggest_index
+from app.ownership import project_ownership
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
 
 
 def create_project(db: Session, owner_id: int, project_in: schemas.ProjectCreate) -> models.Project:
-    return projects_repo.create(
+    project = projects_repo.create(
         db=db,
         owner_id=owner_id,
         name=project_in.name,
         description=project_in.description,
     )
+    project_ownership.invalidate(owner_id)
+    return project
 
 
 def list_projects(
@@ -49,6 +65,13 @@ def get_project(db: Session, owner_id: int, project_id: int) -> models.Project:
     return project
 
 
+def get_projects_by_ids(db: Session, owner_id: int, project_ids: list[int]):
+    found = {p.id: p for p in projects_repo.get_many_by_owner(db, project_ids, owner_id)}
+    items = [found[i] for i in project_ids if i in found]
+    missing = [i for i in project_ids if i not in found]
+    return items, missing
+
+
 def update_project(
     db: Session,
     owner_id: int,
@@ -56,6 +79,7 @@ def update_project(
     project_update: schemas.ProjectUpdate,
 ) -> models.Project:
     project = get_project(db, owner_id, project_id)
+    ensure_not_deleting(project)
 
     for key, value in project_update.dict(exclude_unset=True).items():
         setattr(project, key, value)
@@ -65,12 +89,70 @@ def update_project(
     return project
 
 
-def delete_project(db: Session, owner_id: int, project_id: int) -> models.Project:
-    project = get_project(db, owner_id, project_id)
+def ensure_not_deleting(project: models.Project) -> None:
+    if project.deleting_at is not None:
+        raise BadRequestError("El proyecto se está eliminando.")
 
-    tickets_count = projects_repo.count_tickets_in_project(db, project_id)
-    if tickets_count > 0:
-        raise BadRequestError("No se puede eliminar el proyecto porque tiene tickets asociados.")
 
-    projects_repo.delete(db, project)
+def delete_project(db: Session, owner_id: int, project_id: int, cascade: bool = False) -> models.Project:
+    project = get_project(db, owner_id, project_id)
+    # espera a los tickets que se estén creando en el proyecto (FOR SHARE en projects_repo.writable_project_id)
+    projects_repo.lock(db, project)
+
+    if project.deleting_at is not None:
+        if not cascade:
+            ensure_not_deleting(project)
+        # ya hay un purge en curso: repetir el DELETE no encola otro
+        if project.purge_job_id is not None:
+            return project
+        # quedó marcado pero el job no llegó a encolarse: se encola ahora
+    else:
+        tickets_count = projects_repo.count_tickets_in_project(db, project_id)
+        if tickets_count == 0:
+            projects_repo.delete(db, project)
+            project_ownership.invalidate(owner_id)
+            return project
+        if not cascade:
+            raise BadRequestError("No se puede eliminar el proyecto porque tiene tickets asociados.")
+        # primero la marca, en la transacción del lock: desde el commit no entra ningún
+        # ticket nuevo, y recién después el job existe para los workers
+        projects_repo.mark_deleting(db, project, tickets_count)
+
+    # desde el enqueue el purge puede borrar la fila: la respuesta sale de lo ya cargado
+    db.expunge(project)
+    job = enqueue(db, "projects.purge", {"project_id": project_id}, owner_id=owner_id)
+    projects_repo.link_purge_job(db, project, job.id)
     return project
+
+
+def purge_project(db: Session, project_id: int, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Borra los tickets del proyecto por lotes y al final el proyecto. Reanudable."""
+    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    if project is None:
+        return 0
+    owner_id = project.owner_id
+    store = get_blob_store()
+
+    deleted = 0
+    # el job corre sin request: fijamos el shard del dueño del proyecto
+    with owner_scope(db, owner_id):
+        for model in (models.Ticket, models.ArchivedTicket):
+            while True:
+                rows = projects_repo.ticket_batch(db, model, project_id, batch_size)
+                if not rows:
+                    break
+                ticket_ids = [ticket_id for ticket_id, _ in rows]
+                sha_counts = attachments_repo.sha_counts_for_tickets(db, ticket_ids)
+                deleted += projects_repo.delete_ticket_batch(db, model, project_id, rows)
+
+                for ticket_id, ticket_owner_id in rows:
+                    suggest_index.remove(ticket_owner_id, ticket_id)
+                    ticket_events.publish("ticket.deleted", ticket_owner_id, [project_id], {"id": ticket_id, "project_id": project_id})
+                blobs_service.release(db, store, sha_counts)
+                logger.info("purge: proyecto %s, %s tickets borrados", project_id, deleted)
+
+        project = projects_repo.get_by_id_and_owner(db, project_id, owner_id)
+        if project is not None:
+            projects_repo.delete(db, project)
+    project_ownership.invalidate(owner_id)
+    return deleted
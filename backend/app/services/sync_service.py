@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+
+from app.changes import decode_token, encode_token
+from app.repos import changes_repo
+
+
+def list_changes(db: Session, owner_id: int, since_token: str | None, limit: int) -> dict:
+    """
+    Devuelve hasta `limit` cambios con change_seq > since, mezclando tickets,
+    proyectos y tombstones en orden de secuencia.
+    """
+    since = decode_token(since_token)
+
+    # cada fuente trae limit+1 para saber si quedan más después del corte
+    tickets = changes_repo.tickets_since(db, owner_id, since, limit + 1)
+    projects = changes_repo.projects_since(db, owner_id, since, limit + 1)
+    tombstones = changes_repo.tombstones_since(db, owner_id, since, limit + 1)
+
+    merged = sorted(
+        [(t.change_seq, "ticket", t) for t in tickets]
+        + [(p.change_seq, "project", p) for p in projects]
+        + [(d.change_seq, "tombstone", d) for d in tombstones],
+        key=lambda row: row[0],
+    )
+    has_more = len(merged) > limit
+    batch = merged[:limit]
+
+    result = {
+        "tickets": [obj for _, kind, obj in batch if kind == "ticket"],
+        "projects": [obj for _, kind, obj in batch if kind == "project"],
+        "deleted_tickets": [obj.entity_id for _, kind, obj in batch if kind == "tombstone" and obj.entity_type == "ticket"],
+        "deleted_projects": [obj.entity_id for _, kind, obj in batch if kind == "tombstone" and obj.entity_type == "project"],
+        "next_token": encode_token(batch[-1][0] if batch else since),
+        "has_more": has_more,
+    }
+    return result
@@ -1,20 +1,106 @@
+import base64
+import binascii
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app import models, schemas
 from app.exceptions import NotFoundError, BadRequestError
-from app.repos import tickets_repo, projects_repo
+from app.repos import tickets_repo, projects_repo, activity_repo, attachments_repo
+from app.services import blobs_service
+from app.storage import get_blob_store
+from app.activity import activity_log, snapshot, diff
+from app.events import ticket_events
+from app.suggest import suggest_index
+from app.ownership import project_ownership
+from app.sharding import session_dialect
+from app import minhash
+from app.enums import TicketStatus
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_TIMEOUT_MS = int(os.getenv("SUGGEST_TIMEOUT_MS", "50"))
+SUGGEST_MAX_RESULTS = int(os.getenv("SUGGEST_MAX_RESULTS", "20"))
+SIMILAR_THRESHOLD = float(os.getenv("SIMILAR_THRESHOLD", "0.5"))
+SIMILAR_MAX_CANDIDATES = int(os.getenv("SIMILAR_MAX_CANDIDATES", "200"))
 
 
 def _ensure_project_belongs_to_user(db: Session, owner_id: int, project_id: int) -> None:
-    project = projects_repo.get_by_id_and_owner(db, project_id, owner_id)
-    if not project:
+    """Valida contra el índice en memoria (app/ownership.py)."""
+    def loader():
+        return projects_repo.project_ids_by_owner(db, owner_id)
+
+    projects = project_ownership.get(owner_id, loader)
+    if project_id not in projects:
+        # puede ser un proyecto recién creado en otro proceso: una recarga antes de rechazar
+        projects = project_ownership.get(owner_id, loader, refresh=True)
+    if project_id not in projects:
         raise BadRequestError("El proyecto no existe o no pertenece al usuario actual.")
 
 
+def ensure_project_accepts_tickets(db: Session, owner_id: int, project_id: int):
+    """
+    Para escribir un ticket en el proyecto. El dueño sale del cache; que el
+    proyecto siga existiendo y no se esté eliminando se valida en la misma
+    escritura: devuelve lo que hay que asignar a Ticket.project_id, y la
+    escritura va dentro de `project_write_guard`.
+    """
+    _ensure_project_belongs_to_user(db, owner_id, project_id)
+    return projects_repo.writable_project_id(project_id, owner_id)
+
+
+@contextmanager
+def project_write_guard(db: Session, owner_id: int, project_id: Optional[int]):
+    """Traduce el rechazo de `ensure_project_accepts_tickets` (IntegrityError) a un 400."""
+    try:
+        yield
+    except IntegrityError:
+        db.rollback()
+        if project_id is None:
+            raise
+        # sólo en el camino de error: leemos el proyecto para dar el motivo
+        project = projects_repo.get_by_id_and_owner(db, project_id, owner_id)
+        if project is None:
+            project_ownership.invalidate(owner_id)
+            raise BadRequestError("El proyecto no existe o no pertenece al usuario actual.")
+        if project.deleting_at is not None:
+            raise BadRequestError("El proyecto se está eliminando.")
+        raise
+
+
+def _publish(event_type: str, ticket: models.Ticket, project_ids) -> None:
+    data = schemas.TicketRead.model_validate(ticket).model_dump(mode="json")
+    ticket_events.publish(event_type, ticket.owner_id, project_ids, data)
+
+
+def _minhash_fields(owner_id: int, title: str, description: Optional[str]) -> tuple[bytes, list]:
+    sig = minhash.signature(title, description)
+    if sig is None:
+        # muy poco texto: firma vacía (b"", no None, que es "todavía sin calcular") y sin buckets
+        return b"", []
+    buckets = [
+        models.TicketLshBucket(owner_id=owner_id, band=band, bucket=bucket)
+        for band, bucket in minhash.band_hashes(sig)
+    ]
+    return minhash.pack(sig), buckets
+
+
 def create_ticket(db: Session, owner_id: int, ticket_in: schemas.TicketCreate) -> models.Ticket:
-    _ensure_project_belongs_to_user(db, owner_id, ticket_in.project_id)
-    return tickets_repo.create(db, owner_id, ticket_in.dict())
+    data = ticket_in.dict()
+    data["project_id"] = ensure_project_accepts_tickets(db, owner_id, ticket_in.project_id)
+    data["minhash"], data["lsh_buckets"] = _minhash_fields(owner_id, ticket_in.title, ticket_in.description)
+    if ticket_in.status == TicketStatus.CLOSED:
+        data["closed_at"] = datetime.utcnow()
+    with project_write_guard(db, owner_id, ticket_in.project_id):
+        ticket = tickets_repo.create(db, owner_id, data)
+    activity_log.record(ticket.id, owner_id, owner_id, "created", diff({}, snapshot(ticket)))
+    _publish("ticket.created", ticket, [ticket.project_id])
+    suggest_index.upsert(owner_id, ticket.id, ticket.title)
+    return ticket
 
 
 def list_tickets(
@@ -26,30 +112,59 @@ def list_tickets(
     sort_field: str,
     sort_direction: str,
     project_id: Optional[int],
+    filters: Optional[schemas.TicketFilters] = None,
+    facets: Optional[list[str]] = None,
+    include_archived: bool = False,
 ):
-    q = tickets_repo.base_query_by_owner(db, owner_id)
+    T = tickets_repo.ticket_entity(include_archived)
+    q = tickets_repo.base_query_by_owner(db, owner_id, T)
 
     # filtro por proyecto + validación de ownership
     if project_id is not None:
         _ensure_project_belongs_to_user(db, owner_id, project_id)
-        q = tickets_repo.apply_project_filter(q, project_id)
+        q = tickets_repo.apply_project_filter(q, project_id, T)
 
     # search
     if search:
-        q = tickets_repo.apply_search_filter(q, search)
+        q = tickets_repo.apply_search_filter(q, search, T)
+
+    # filtros multi-valor y rangos de fechas
+    if filters is not None:
+        if filters.status:
+            q = tickets_repo.apply_in_filter(q, T.status, filters.status)
+        if filters.priority:
+            q = tickets_repo.apply_in_filter(q, T.priority, filters.priority)
+        if filters.assigned_to_id:
+            q = tickets_repo.apply_in_filter(q, T.assigned_to_id, filters.assigned_to_id)
+        q = tickets_repo.apply_range_filter(q, T.created_at, filters.created_after, filters.created_before)
+        q = tickets_repo.apply_range_filter(q, T.updated_at, filters.updated_after, filters.updated_before)
+
+    total = tickets_repo.count(q, T)
 
-    total = tickets_repo.count(q)
+    facet_result = None
+    if facets:
+        unknown = [f for f in facets if f not in tickets_repo.FACET_COLUMNS]
+        if unknown:
+            raise BadRequestError(
+                "Faceta inválida.",
+                extra={"invalid": unknown, "allowed": list(tickets_repo.FACET_COLUMNS)},
+            )
+        counts = tickets_repo.facet_counts(db, q, list(dict.fromkeys(facets)), T)
+        facet_result = {
+            facet: [{"value": value, "count": n} for value, n in sorted(rows, key=lambda r: -r[1])]
+            for facet, rows in counts.items()
+        }
 
     # sort whitelist
     sort_map = {
-        "id": models.Ticket.id,
-        "title": models.Ticket.title,
-        "status": models.Ticket.status,
-        "priority": models.Ticket.priority,
-        "created_at": models.Ticket.created_at,
-        "updated_at": models.Ticket.updated_at,
+        "id": T.id,
+        "title": T.title,
+        "status": T.status,
+        "priority": T.priority,
+        "created_at": T.created_at,
+        "updated_at": T.updated_at,
     }
-    sort_col = sort_map.get(sort_field, models.Ticket.id)
+    sort_col = sort_map.get(sort_field, T.id)
 
     direction = sort_direction.lower()
     if direction not in ("asc", "desc"):
@@ -64,7 +179,7 @@ def list_tickets(
         order_col=sort_col,
     )
 
-    return items, total
+    return items, total, facet_result
 
 
 def get_ticket(db: Session, owner_id: int, ticket_id: int) -> models.Ticket:
@@ -74,6 +189,107 @@ def get_ticket(db: Session, owner_id: int, ticket_id: int) -> models.Ticket:
     return ticket
 
 
+def _encode_cursor(ticket: models.Ticket) -> str:
+    raw = f"v1:{ticket.id}:{ticket.updated_at.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, ticket_id, updated_at = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 2)
+        if version != "v1":
+            raise ValueError(version)
+        return datetime.fromisoformat(updated_at), int(ticket_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise BadRequestError("Cursor inválido.")
+
+
+def list_assigned_tickets(
+    db: Session,
+    user_id: int,
+    statuses: list[TicketStatus],
+    cursor: Optional[str],
+    limit: int,
+):
+    """Bandeja del asignado (tickets de cualquier owner); devuelve (items, next_cursor)."""
+    after = _decode_cursor(cursor) if cursor else None
+    items = tickets_repo.list_assigned(db, user_id, statuses, after, limit + 1)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1])
+    return items, next_cursor
+
+
+def get_tickets_by_ids(db: Session, owner_id: int, ticket_ids: list[int]):
+    """Multi-get en una sola query; respeta el orden pedido y devuelve los ids faltantes."""
+    found = {t.id: t for t in tickets_repo.get_many_by_owner(db, ticket_ids, owner_id)}
+    items = [found[i] for i in ticket_ids if i in found]
+    missing = [i for i in ticket_ids if i not in found]
+    return items, missing
+
+
+def suggest_titles(db: Session, owner_id: int, q: str, limit: int) -> list[dict]:
+    q = q.strip()
+    if not q:
+        return []
+    limit = min(limit, SUGGEST_MAX_RESULTS)
+
+    if session_dialect(db).name == "postgresql":
+        try:
+            rows = tickets_repo.suggest_titles_pg(db, owner_id, q, limit, SUGGEST_TIMEOUT_MS)
+        except OperationalError:
+            # statement_timeout: para autocompletar es mejor nada que tarde
+            db.rollback()
+            logger.info("suggest: se superó el presupuesto de %sms (q=%r)", SUGGEST_TIMEOUT_MS, q)
+            return []
+    else:
+        rows = suggest_index.search(
+            owner_id, q, limit, SUGGEST_TIMEOUT_MS,
+            loader=lambda: tickets_repo.titles_by_owner(db, owner_id),
+        )
+    return [{"id": ticket_id, "title": title} for ticket_id, title in rows]
+
+
+def find_similar(
+    db: Session,
+    owner_id: int,
+    ticket: models.Ticket,
+    scope: str = "owner",
+    limit: int = 5,
+) -> list[dict]:
+    """Probables duplicados vía buckets LSH; sólo se compara la firma de los candidatos."""
+    if scope not in ("owner", "project"):
+        raise BadRequestError("scope inválido (owner/project).")
+
+    if ticket.minhash is None:
+        # ticket anterior a las firmas: se calcula y se guarda ahora
+        ticket.minhash, ticket.lsh_buckets = _minhash_fields(owner_id, ticket.title, ticket.description)
+        tickets_repo.save(db)
+        db.refresh(ticket)
+    if not ticket.minhash:
+        return []
+
+    sig = minhash.unpack(ticket.minhash)
+    candidates = tickets_repo.lsh_candidates(
+        db,
+        owner_id=owner_id,
+        bands=minhash.band_hashes(sig),
+        exclude_id=ticket.id,
+        project_id=ticket.project_id if scope == "project" else None,
+        limit=SIMILAR_MAX_CANDIDATES,
+    )
+
+    scored = []
+    for cand_id, title, project_id, cand_sig in candidates:
+        score = minhash.similarity(sig, minhash.unpack(cand_sig))
+        if score >= SIMILAR_THRESHOLD:
+            scored.append({"id": cand_id, "title": title, "project_id": project_id, "similarity": round(score, 3)})
+    scored.sort(key=lambda r: (-r["similarity"], -r["id"]))
+    return scored[:limit]
+
+
 def update_ticket(
     db: Session,
     owner_id: int,
@@ -84,18 +300,57 @@ def update_ticket(
 
     data = ticket_update.dict(exclude_unset=True)
 
+    project_guard = None
     if "project_id" in data and data["project_id"] is not None:
-        _ensure_project_belongs_to_user(db, owner_id, data["project_id"])
+        project_guard = ensure_project_accepts_tickets(db, owner_id, data["project_id"])
 
+    before = snapshot(ticket)
     for key, value in data.items():
         setattr(ticket, key, value)
+    changes = diff(before, snapshot(ticket))
+
+    if "title" in changes or "description" in changes:
+        ticket.minhash, ticket.lsh_buckets = _minhash_fields(owner_id, ticket.title, ticket.description)
+
+    if changes:
+        ticket.updated_at = datetime.utcnow()
+    if "status" in changes:
+        ticket.closed_at = ticket.updated_at if ticket.status == TicketStatus.CLOSED else None
+    if project_guard is not None and "project_id" in changes:
+        # UPDATE ... SET project_id = (subquery): si el destino no acepta tickets, falla
+        ticket.project_id = project_guard
 
-    tickets_repo.save(db)
+    with project_write_guard(db, owner_id, data["project_id"] if project_guard is not None else None):
+        tickets_repo.save(db)
     db.refresh(ticket)
+    activity_log.record(ticket.id, owner_id, owner_id, "updated", changes)
+    if changes:
+        # si se movió de proyecto, se entera quien mira cualquiera de los dos
+        _publish("ticket.updated", ticket, {before["project_id"], ticket.project_id})
+    if "title" in changes:
+        suggest_index.upsert(owner_id, ticket.id, ticket.title)
     return ticket
 
 
 def delete_ticket(db: Session, owner_id: int, ticket_id: int) -> models.Ticket:
     ticket = get_ticket(db, owner_id, ticket_id)
+    before = snapshot(ticket)
+    sha_counts = attachments_repo.sha_counts_for_tickets(db, [ticket_id])
     tickets_repo.delete(db, ticket)
+    activity_log.record(ticket_id, owner_id, owner_id, "deleted", diff(before, {}))
+    ticket_events.publish("ticket.deleted", owner_id, [before["project_id"]], {"id": ticket_id, "project_id": before["project_id"]})
+    suggest_index.remove(owner_id, ticket_id)
+
+    # los adjuntos se fueron con el ticket (cascade): soltamos sus blobs
+    blobs_service.release(db, get_blob_store(), sha_counts)
     return ticket
+
+
+def list_activity(db: Session, owner_id: int, ticket_id: int, page: int, limit: int):
+    # read-your-writes: lo que siga en el buffer para este ticket se vuelca antes de leer
+    activity_log.flush_ticket(ticket_id, owner_id)
+
+    q = activity_repo.base_query_by_ticket(db, owner_id, ticket_id)
+    total = activity_repo.count(q)
+    items = activity_repo.list_paginated(q, offset=page * limit, limit=limit)
+    return items, total
@@ -0,0 +1,304 @@
+# app/sharding.py
+"""
+Sharding horizontal por owner.
+
+Sin SHARD_URLS todo vive en DATABASE_URL, como siempre. Con
+SHARD_URLS="s1=url1,s2=url2" los datos de cada owner (proyectos, tickets y
+todo lo que cuelga de ellos) viven en un shard, y DATABASE_URL queda como
+directorio global: users, jobs, idempotency keys, `owner_shards` y
+`id_blocks`.
+
+- Ubicación: la primera vez que se ve un owner se le asigna el shard que
+  indica el anillo de consistent hashing y queda fijado en `owner_shards`.
+  Agregar un shard no mueve a nadie; los owners se mueven con
+  `python -m app.rebalance`.
+- Sesión: un ShardedSession. Las escrituras van al shard del `owner_id` de
+  cada instancia; las queries, al shard del owner del request
+  (`session.info["owner_id"]`, lo setea get_current_user). Sin owner, o con
+  `execution_options(all_shards=True)`, se consultan todos los shards.
+- Ids: proyectos, tickets y adjuntos toman el id de un contador global
+  (`id_blocks`, por bloques) para poder mover un owner sin colisiones.
+"""
+import bisect
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session
+
+from app.exceptions import ServiceUnavailableError
+
+DIRECTORY = "directory"
+
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+# cuánto puede tardar un proceso en enterarse de que un owner se está moviendo
+SHARD_PIN_TTL = float(os.getenv("SHARD_PIN_TTL", "5"))
+SHARD_ID_BLOCK = int(os.getenv("SHARD_ID_BLOCK", "100"))
+
+# tablas que viven sólo en el directorio
+DIRECTORY_TABLES = {"users", "jobs", "idempotency_keys", "owner_shards", "id_blocks", "blob_refs"}
+
+# tablas con id global -> nombre del contador (tickets y archivados comparten ids)
+GLOBAL_ID_TABLES = {
+    "projects": "projects",
+    "tickets": "tickets",
+    "ticket_attachments": "ticket_attachments",
+}
+_ID_SEED_TABLES = {
+    "projects": ["projects"],
+    "tickets": ["tickets", "archived_tickets"],
+    "ticket_attachments": ["ticket_attachments"],
+}
+
+
+def parse_shard_urls(raw: str) -> dict[str, str]:
+    shards = {}
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        name, url = part.split("=", 1)
+        shards[name.strip()] = url.strip()
+    if DIRECTORY in shards:
+        raise ValueError(f"'{DIRECTORY}' es un nombre reservado de shard")
+    return shards
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Anillo de consistent hashing con nodos virtuales."""
+
+    def __init__(self, names: list[str], vnodes: int = SHARD_VNODES):
+        points = sorted((_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def node_for(self, key: str) -> str:
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._names[i]
+
+
+@dataclass
+class _Placement:
+    shard: str
+    locked: bool
+    loaded_at: float
+
+
+class ShardMap:
+    def __init__(self, names: list[str], directory_engine, vnodes: int = SHARD_VNODES, pin_ttl: float = SHARD_PIN_TTL):
+        self.names = list(names)
+        self.ring = HashRing(self.names, vnodes)
+        self.directory_engine = directory_engine
+        self.pin_ttl = pin_ttl
+        self._lock = threading.Lock()
+        self._cache: dict[int, _Placement] = {}
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.names) > 1
+
+    def ring_shard(self, owner_id: int) -> str:
+        return self.ring.node_for(str(owner_id))
+
+    def _placement(self, owner_id: int) -> _Placement:
+        with self._lock:
+            cached = self._cache.get(owner_id)
+        if cached is not None and time.monotonic() - cached.loaded_at < self.pin_ttl:
+            return cached
+
+        placement = self._load(owner_id)
+        with self._lock:
+            self._cache[owner_id] = placement
+        return placement
+
+    def _load(self, owner_id: int) -> _Placement:
+        select_sql = text("SELECT shard, locked FROM owner_shards WHERE owner_id = :owner_id")
+        with self.directory_engine.begin() as conn:
+            row = conn.execute(select_sql, {"owner_id": owner_id}).first()
+        if row is None:
+            # primera vez: se fija el shard del anillo
+            shard = self.ring_shard(owner_id)
+            try:
+                with self.directory_engine.begin() as conn:
+                    conn.execute(
+                        text("INSERT INTO owner_shards (owner_id, shard, locked, updated_at) VALUES (:owner_id, :shard, :locked, :now)"),
+                        {"owner_id": owner_id, "shard": shard, "locked": False, "now": datetime.utcnow()},
+                    )
+            except IntegrityError:
+                pass
+            with self.directory_engine.begin() as conn:
+                row = conn.execute(select_sql, {"owner_id": owner_id}).first()
+        return _Placement(shard=row.shard, locked=bool(row.locked), loaded_at=time.monotonic())
+
+    def shard_for(self, owner_id: int) -> str:
+        if not self.sharded:
+            return self.names[0]
+        return self._placement(owner_id).shard
+
+    def is_locked(self, owner_id: int) -> bool:
+        if not self.sharded:
+            return False
+        return self._placement(owner_id).locked
+
+    def invalidate(self, owner_id: int | None = None) -> None:
+        with self._lock:
+            if owner_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(owner_id, None)
+
+
+class IdAllocator:
+    """Reserva ids globales de a bloques en el directorio (hi/lo)."""
+
+    def __init__(self, directory_engine, shard_engines: dict, block_size: int = SHARD_ID_BLOCK):
+        self.directory_engine = directory_engine
+        self.shard_engines = shard_engines
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks: dict[str, list[int]] = {}
+
+    def next_id(self, name: str) -> int:
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                block = self._blocks[name] = self._reserve(name)
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def _seed(self, name: str) -> int:
+        # al activar sharding sobre datos existentes: arrancar después del máximo
+        top = 0
+        for eng in self.shard_engines.values():
+            with eng.connect() as conn:
+                for table in _ID_SEED_TABLES[name]:
+                    top = max(top, conn.execute(text(f"SELECT max(id) FROM {table}")).scalar() or 0)
+        return top + 1
+
+    def _reserve(self, name: str) -> list[int]:
+        update_sql = text("UPDATE id_blocks SET next_value = next_value + :n WHERE name = :name RETURNING next_value")
+        while True:
+            with self.directory_engine.begin() as conn:
+                end = conn.execute(update_sql, {"n": self.block_size, "name": name}).scalar()
+            if end is not None:
+                return [end - self.block_size, end]
+            start = self._seed(name)
+            try:
+                with self.directory_engine.begin() as conn:
+                    conn.execute(
+                        text("INSERT INTO id_blocks (name, next_value) VALUES (:name, :value)"),
+                        {"name": name, "value": start + self.block_size},
+                    )
+                return [start, start + self.block_size]
+            except IntegrityError:
+                # otro proceso lo creó primero: reintentar el UPDATE
+                continue
+
+
+def _is_directory(mapper) -> bool:
+    return mapper is not None and mapper.local_table.name in DIRECTORY_TABLES
+
+
+class OwnerShardedSession(ShardedSession):
+    def __init__(self, shard_map: ShardMap, id_allocator: IdAllocator, **kw):
+        self.shard_map = shard_map
+        self.id_allocator = id_allocator
+        super().__init__(
+            shard_chooser=self._shard_chooser,
+            identity_chooser=self._identity_chooser,
+            execute_chooser=self._execute_chooser,
+            **kw,
+        )
+
+    def _owner_shards(self) -> list[str]:
+        owner_id = self.info.get("owner_id")
+        if owner_id is None:
+            return self.shard_map.names
+        return [self.shard_map.shard_for(owner_id)]
+
+    def _shard_chooser(self, mapper, instance, clause=None, **kw):
+        if _is_directory(mapper):
+            return DIRECTORY
+        owner_id = getattr(instance, "owner_id", None) if instance is not None else None
+        if owner_id is None:
+            owner_id = self.info.get("owner_id")
+        if owner_id is not None:
+            return self.shard_map.shard_for(owner_id)
+        raise RuntimeError(f"No se puede elegir shard para {mapper.class_.__name__} sin owner_id")
+
+    def _identity_chooser(self, mapper, primary_key, *, lazy_loaded_from=None, **kw):
+        if lazy_loaded_from is not None and lazy_loaded_from.identity_token is not None:
+            return [lazy_loaded_from.identity_token]
+        if _is_directory(mapper):
+            return [DIRECTORY]
+        return self._owner_shards()
+
+    def _execute_chooser(self, orm_context):
+        if _is_directory(orm_context.bind_mapper):
+            return [DIRECTORY]
+        if orm_context.execution_options.get("all_shards"):
+            return self.shard_map.names
+        return self._owner_shards()
+
+
+@event.listens_for(OwnerShardedSession, "before_flush")
+def _assign_global_ids(session: OwnerShardedSession, flush_context, instances) -> None:
+    for obj in session.new:
+        name = GLOBAL_ID_TABLES.get(getattr(type(obj), "__tablename__", None))
+        if name is not None and obj.id is None:
+            obj.id = session.id_allocator.next_id(name)
+
+
+# -------- Helpers para el resto de la app (funcionan con o sin sharding) --------
+
+def bind_owner(session: Session, owner_id: int) -> None:
+    """Fija el owner del request: sus queries van a su shard."""
+    session.info["owner_id"] = owner_id
+    if isinstance(session, OwnerShardedSession) and session.shard_map.is_locked(owner_id):
+        raise ServiceUnavailableError("Los datos de la cuenta se están moviendo; reintentá en unos segundos.")
+
+
+@contextmanager
+def owner_scope(session: Session, owner_id: int):
+    """Para código sin request (jobs, flushers): opera sobre el shard de `owner_id`."""
+    previous = session.info.get("owner_id")
+    bind_owner(session, owner_id)
+    try:
+        yield session
+    finally:
+        if previous is None:
+            session.info.pop("owner_id", None)
+        else:
+            session.info["owner_id"] = previous
+
+
+def owner_connection(session: Session, owner_id: int):
+    if isinstance(session, OwnerShardedSession):
+        return session.connection(bind_arguments={"shard_id": session.shard_map.shard_for(owner_id)})
+    return session.connection()
+
+
+def session_dialect(session: Session):
+    """Dialecto de la base del owner del request; ShardedSession.get_bind() sin mapper no sabe elegir."""
+    if isinstance(session, OwnerShardedSession):
+        owner_id = session.info.get("owner_id")
+        shard = session.shard_map.shard_for(owner_id) if owner_id is not None else session.shard_map.names[0]
+        return session.get_bind(shard_id=shard).dialect
+    return session.get_bind().dialect
+
+
+def directory_connection(session: Session):
+    if isinstance(session, OwnerShardedSession):
+        return session.connection(bind_arguments={"shard_id": DIRECTORY})
+    return session.connection()
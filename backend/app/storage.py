@@ -0,0 +1,112 @@
+# app/storage.py
+"""
+Almacenamiento de adjuntos en disco local, direccionado por contenido:
+cada blob se guarda una sola vez en `<dir>/ab/cd/<sha256>`.
+
+El upload queda en un temporal hasta que attachments_service toma la
+referencia en `blob_refs` y recién ahí lo deja en su ruta final (`place`).
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+
+ATTACHMENTS_DIR = os.getenv("ATTACHMENTS_DIR", "./data/attachments")
+ATTACHMENTS_MAX_SIZE = int(os.getenv("ATTACHMENTS_MAX_SIZE", str(25 * 1024 * 1024)))
+
+
+class BlobTooLargeError(Exception):
+    pass
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    filename: str
+    content_type: str
+    tmp_path: str | None = None
+
+
+class BlobWriter:
+    """Escribe un blob por chunks a un archivo temporal calculando el SHA-256 al vuelo."""
+
+    def __init__(self, store: "BlobStore", max_size: int):
+        self.store = store
+        self.max_size = max_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.tmp_dir, prefix=uuid.uuid4().hex)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise BlobTooLargeError()
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> tuple[str, str]:
+        """Cierra el temporal; devuelve (sha256, ruta del temporal)."""
+        self._file.close()
+        return self._hash.hexdigest(), self._tmp_path
+
+    def abort(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+class BlobStore:
+    def __init__(self, root: str = ATTACHMENTS_DIR):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def writer(self, max_size: int = ATTACHMENTS_MAX_SIZE) -> BlobWriter:
+        return BlobWriter(self, max_size)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    def place(self, blob: StoredBlob) -> None:
+        """Mueve el temporal a su ruta final; si ya existía el mismo contenido, lo descarta."""
+        if blob.tmp_path is None:
+            return
+        final = self.path_for(blob.sha256)
+        if os.path.exists(final):
+            os.unlink(blob.tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.replace(blob.tmp_path, final)
+        blob.tmp_path = None
+
+    def discard(self, blob: StoredBlob) -> None:
+        """Borra el temporal si todavía no se movió (no-op después de `place`)."""
+        if blob.tmp_path is not None:
+            try:
+                os.unlink(blob.tmp_path)
+            except FileNotFoundError:
+                pass
+            blob.tmp_path = None
+
+    def delete(self, sha256: str) -> None:
+        try:
+            os.unlink(self.path_for(sha256))
+        except FileNotFoundError:
+            pass
+
+
+_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        _store = BlobStore()
+    return _store
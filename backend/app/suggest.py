@@ -0,0 +1,115 @@
+# app/suggest.py
+"""
+Índice en memoria para el autocompletado de títulos (SQLite / dev).
+
+En Postgres el autocompletado usa el índice pg_trgm sobre `tickets.title`;
+acá mantenemos, por owner, un índice de trigramas que se carga con una sola
+query la primera vez y después se actualiza desde tickets_service.
+Es por proceso: con varios workers cada uno tiene su copia.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SUGGEST_MAX_OWNERS = int(os.getenv("SUGGEST_MAX_OWNERS", "1000"))
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _OwnerIndex:
+    def __init__(self, rows):
+        self.titles: dict[int, str] = {}
+        self.grams: dict[str, set[int]] = {}
+        for ticket_id, title in rows:
+            self.add(ticket_id, title)
+
+    def add(self, ticket_id: int, title: str) -> None:
+        self.remove(ticket_id)
+        self.titles[ticket_id] = title
+        for g in trigrams(title):
+            self.grams.setdefault(g, set()).add(ticket_id)
+
+    def remove(self, ticket_id: int) -> None:
+        old = self.titles.pop(ticket_id, None)
+        if old is None:
+            return
+        for g in trigrams(old):
+            ids = self.grams.get(g)
+            if ids is not None:
+                ids.discard(ticket_id)
+                if not ids:
+                    del self.grams[g]
+
+    def search(self, q: str, limit: int, deadline: float) -> list[tuple[int, str]]:
+        needle = q.lower()
+        q_grams = trigrams(q)
+
+        scores: dict[int, int] = {}
+        for g in q_grams:
+            for ticket_id in self.grams.get(g, ()):
+                scores[ticket_id] = scores.get(ticket_id, 0) + 1
+            if time.monotonic() > deadline:
+                break
+
+        ranked = []
+        for ticket_id, score in scores.items():
+            title = self.titles[ticket_id]
+            lowered = title.lower()
+            # prefijo > substring > similitud por trigramas
+            if lowered.startswith(needle):
+                rank = 0
+            elif needle in lowered:
+                rank = 1
+            elif score * 2 >= len(q_grams):
+                rank = 2
+            else:
+                continue
+            ranked.append((rank, -score, len(title), ticket_id, title))
+
+        ranked.sort()
+        return [(ticket_id, title) for *_, ticket_id, title in ranked[:limit]]
+
+
+class SuggestIndex:
+    def __init__(self, max_owners: int = SUGGEST_MAX_OWNERS):
+        self.max_owners = max_owners
+        self._lock = threading.Lock()
+        self._owners: OrderedDict[int, _OwnerIndex] = OrderedDict()
+
+    def search(self, owner_id: int, q: str, limit: int, timeout_ms: float, loader) -> list[tuple[int, str]]:
+        deadline = time.monotonic() + timeout_ms / 1000
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is not None:
+                self._owners.move_to_end(owner_id)
+        if index is None:
+            index = _OwnerIndex(loader())
+            with self._lock:
+                self._owners[owner_id] = index
+                while len(self._owners) > self.max_owners:
+                    self._owners.popitem(last=False)
+        with self._lock:
+            return index.search(q, limit, deadline)
+
+    def upsert(self, owner_id: int, ticket_id: int, title: str) -> None:
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is not None:
+                index.add(ticket_id, title)
+
+    def remove(self, owner_id: int, ticket_id: int) -> None:
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is not None:
+                index.remove(ticket_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._owners.clear()
+
+
+suggest_index = SuggestIndex()
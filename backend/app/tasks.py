@@ -0,0 +1,33 @@
+# app/tasks.py
+# Handlers de jobs en background. Cada servicio que necesite trabajo pesado
+# registra acá su handler con @job_handler; el worker importa este módulo al arrancar.
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.jobs import job_handler
+from app.repos import idempotency_repo
+from app.services import archive_service, projects_service
+
+
+@job_handler("tickets.archive", concurrency=1, max_attempts=3)
+def archive_tickets(db: Session, payload: dict) -> dict:
+    moved = archive_service.archive_closed_tickets(
+        db,
+        older_than_days=payload.get("older_than_days", archive_service.ARCHIVE_AFTER_DAYS),
+        batch_size=payload.get("batch_size", archive_service.ARCHIVE_BATCH_SIZE),
+        max_batches=payload.get("max_batches"),
+    )
+    return {"archived": moved}
+
+
+@job_handler("projects.purge", concurrency=1, max_attempts=5)
+def purge_project(db: Session, payload: dict) -> dict:
+    deleted = projects_service.purge_project(db, payload["project_id"])
+    return {"deleted": deleted}
+
+
+@job_handler("idempotency.purge", concurrency=1, max_attempts=1)
+def purge_idempotency_keys(db: Session, payload: dict) -> dict:
+    deleted = idempotency_repo.delete_expired(db, datetime.utcnow())
+    return {"deleted": deleted}
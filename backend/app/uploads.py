@@ -0,0 +1,121 @@
+# app/uploads.py
+"""
+Parser multipart en streaming: el body del request se procesa chunk a chunk
+con python-multipart y el contenido del campo `file` va directo al BlobStore,
+sin cargar el archivo entero en memoria.
+"""
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.exceptions import BadRequestError
+from app.storage import BlobStore, BlobTooLargeError, StoredBlob, ATTACHMENTS_MAX_SIZE
+
+
+class _FilePartCollector:
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: str | None = None
+        self.content_type = "application/octet-stream"
+        self.found = False
+
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[bytes, bytes] = {}
+        self._in_target = False
+        self.pending: list[bytes] = []
+
+    # callbacks de python-multipart
+    def on_part_begin(self):
+        self._headers = {}
+        self._in_target = False
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        if name != self.field_name or self.found:
+            return
+        self._in_target = True
+        self.found = True
+        self.filename = options.get(b"filename", b"").decode("utf-8", "replace") or "archivo"
+        ctype = self._headers.get(b"content-type")
+        if ctype:
+            self.content_type = ctype.decode("latin-1")
+
+    def on_part_data(self, data, start, end):
+        if self._in_target:
+            self.pending.append(bytes(data[start:end]))
+
+    def on_part_end(self):
+        self._in_target = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+def _write_pending(writer, pending: list[bytes]) -> None:
+    for chunk in pending:
+        writer.write(chunk)
+
+
+async def stream_upload(
+    request: Request,
+    store: BlobStore,
+    field_name: str = "file",
+    max_size: int = ATTACHMENTS_MAX_SIZE,
+) -> StoredBlob:
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise BadRequestError("Se esperaba multipart/form-data.")
+
+    collector = _FilePartCollector(field_name)
+    parser = MultipartParser(boundary, collector.callbacks())
+    writer = store.writer(max_size)
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if collector.pending:
+                pending, collector.pending = collector.pending, []
+                await run_in_threadpool(_write_pending, writer, pending)
+        parser.finalize()
+        if collector.pending:
+            await run_in_threadpool(_write_pending, writer, collector.pending)
+
+        if not collector.found:
+            raise BadRequestError(f"Falta el campo '{field_name}'.")
+
+        sha, tmp_path = await run_in_threadpool(writer.finish)
+    except BlobTooLargeError:
+        writer.abort()
+        raise BadRequestError("El archivo supera el tamaño máximo permitido.", extra={"max_size": max_size})
+    except BaseException:
+        writer.abort()
+        raise
+
+    return StoredBlob(
+        sha256=sha,
+        size=writer.size,
+        filename=collector.filename,
+        content_type=collector.content_type,
+        tmp_path=tmp_path,
+    )
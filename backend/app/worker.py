@@ -0,0 +1,32 @@
+# app/worker.py
+# Worker standalone: python -m app.worker
+import logging
+import signal
+import threading
+
+from app.database import create_schema
+from app.jobs import WorkerPool
+from app.logs import configure_logging
+
+
+def main() -> None:
+    configure_logging()
+    create_schema()
+
+    pool = WorkerPool()
+    stop = threading.Event()
+
+    def _handle_signal(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    pool.start()
+    logging.getLogger(__name__).info("worker %s iniciado con %s threads", pool.worker_id, pool.workers)
+    stop.wait()
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
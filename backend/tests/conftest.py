@@ -0,0 +1,95 @@
+# tests/conftest.py
+"""
+Fixtures comunes: la API contra un SQLite temporal, sin workers de jobs.
+
+El entorno se fija antes de importar `app`, porque engines, store de
+adjuntos y demás se configuran al importar. Cada test arranca con las
+tablas vacías y los índices en memoria limpios.
+"""
+import os
+import shutil
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="issuehub-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["SHARD_URLS"] = ""
+os.environ["ATTACHMENTS_DIR"] = os.path.join(_TMP_DIR, "attachments")
+os.environ["JOBS_RUN_IN_APP"] = "0"
+os.environ["DB_POOL_WARM"] = "0"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.activity import activity_log
+from app.compression import compression_stats
+from app.database import Base, SessionLocal, engine, shard_map
+from app.limiter import limiter
+from app.main import app
+from app.ownership import project_ownership
+from app.suggest import suggest_index
+
+# /token tiene rate limit por IP y todos los tests vienen de la misma
+limiter.enabled = False
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    engine.dispose()
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_state(schema):
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    project_ownership.clear()
+    suggest_index.clear()
+    compression_stats.reset()
+    shard_map.invalidate()
+    with activity_log._lock:
+        activity_log._buffer.clear()
+    activity_log.dropped = 0
+    yield
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def register(client, username: str = "ana") -> dict:
+    """Crea el usuario y devuelve los headers con su token."""
+    r = client.post(
+        "/users",
+        json={"username": username, "password": "secreto123", "full_name": username.title(), "email": f"{username}@example.com"},
+    )
+    assert r.status_code == 200, r.text
+    r = client.post("/token", data={"username": username, "password": "secreto123"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def auth(client) -> dict:
+    return register(client)
+
+
+@pytest.fixture
+def project(client, auth) -> dict:
+    r = client.post("/projects", json={"name": "Backend", "description": "API"}, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
@@ -0,0 +1,118 @@
+import logging
+
+from app.activity import ActivityLog, activity_log, diff
+from app.repos import activity_repo
+
+
+class _FakeSession:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _ticket_ids(log: ActivityLog) -> list[int]:
+    return [row["ticket_id"] for row in log._buffer]
+
+
+def test_diff_only_keeps_changed_fields():
+    before = {"title": "a", "status": 1, "priority": 2}
+    after = {"title": "b", "status": 1, "priority": 3}
+    assert diff(before, after) == {"title": ["a", "b"], "priority": [2, 3]}
+
+
+def test_update_without_changes_is_not_recorded():
+    log = ActivityLog(session_factory=_FakeSession)
+    log.record(1, 1, 1, "updated", {})
+    assert log.pending() == 0
+
+
+def test_overflow_drops_oldest_and_counts_them():
+    log = ActivityLog(max_size=3, session_factory=_FakeSession)
+    for ticket_id in range(5):
+        log.record(ticket_id, 1, 1, "created", {})
+    assert _ticket_ids(log) == [2, 3, 4]
+    assert log.dropped == 2
+
+
+def test_failed_flush_requeues_without_evicting_new_events(monkeypatch, caplog):
+    log = ActivityLog(max_size=5, session_factory=_FakeSession)
+    for ticket_id in range(4):
+        log.record(ticket_id, 1, 1, "created", {})
+
+    def failing_insert(db, rows):
+        # llegan eventos nuevos mientras el flush está en curso
+        for ticket_id in (10, 11, 12):
+            log.record(ticket_id, 1, 1, "created", {})
+        raise RuntimeError("base caída")
+    monkeypatch.setattr(activity_repo, "bulk_insert", failing_insert)
+
+    with caplog.at_level(logging.CRITICAL):
+        assert log.flush() == 0
+    # entran los 2 más nuevos del lote fallido; los 3 nuevos no se pierden
+    assert _ticket_ids(log) == [2, 3, 10, 11, 12]
+    assert log.dropped == 2
+
+
+def test_failed_flush_keeps_order_when_there_is_room(monkeypatch, caplog):
+    log = ActivityLog(max_size=10, session_factory=_FakeSession)
+    for ticket_id in range(3):
+        log.record(ticket_id, 1, 1, "created", {})
+    monkeypatch.setattr(activity_repo, "bulk_insert", lambda db, rows: (_ for _ in ()).throw(RuntimeError("x")))
+
+    with caplog.at_level(logging.CRITICAL):
+        log.flush()
+    log.record(3, 1, 1, "created", {})
+    assert _ticket_ids(log) == [0, 1, 2, 3]
+    assert log.dropped == 0
+
+
+def test_flush_ticket_only_writes_that_ticket(monkeypatch):
+    log = ActivityLog(session_factory=_FakeSession)
+    for ticket_id in (1, 2, 1, 3):
+        log.record(ticket_id, 1, 1, "created", {})
+    log.record(1, 2, 2, "created", {})
+    written = []
+    monkeypatch.setattr(activity_repo, "bulk_insert", lambda db, rows: written.extend(rows))
+
+    assert log.flush_ticket(1, 1) == 2
+    assert [(row["ticket_id"], row["owner_id"]) for row in written] == [(1, 1), (1, 1)]
+    assert _ticket_ids(log) == [2, 3, 1]
+    assert log.flush_ticket(1, 1) == 0
+
+
+def test_reading_history_leaves_other_tickets_buffered(client, auth, project):
+    # sin el thread de fondo, que vaciaría el buffer por su cuenta
+    activity_log.stop()
+    ticket = client.post("/tickets", json={"title": "a", "project_id": project["id"]}, headers=auth).json()
+    client.post("/tickets", json={"title": "b", "project_id": project["id"]}, headers=auth)
+
+    assert client.get(f"/tickets/{ticket['id']}/activity", headers=auth).json()["total"] == 1
+    assert activity_log.pending() == 1
+
+
+def test_ticket_history_is_readable_right_after_writing(client, auth, project):
+    other = client.post("/projects", json={"name": "Otro"}, headers=auth).json()
+    ticket = client.post("/tickets", json={"title": "Login roto", "status": "open", "project_id": project["id"]}, headers=auth).json()
+    client.put(f"/tickets/{ticket['id']}", json={"status": "closed", "project_id": other["id"]}, headers=auth)
+
+    r = client.get(f"/tickets/{ticket['id']}/activity", headers=auth)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 2
+    updated, created = body["items"]
+    assert created["action"] == "created"
+    assert updated["action"] == "updated"
+    assert updated["changes"]["project_id"] == [project["id"], other["id"]]
+    assert set(updated["changes"]) == {"status", "project_id"}
+
+
+def test_ticket_history_is_paginated(client, auth, project):
+    ticket = client.post("/tickets", json={"title": "t", "project_id": project["id"]}, headers=auth).json()
+    for i in range(4):
+        client.put(f"/tickets/{ticket['id']}", json={"title": f"t{i}"}, headers=auth)
+
+    page = client.get(f"/tickets/{ticket['id']}/activity?limit=2&page=1", headers=auth).json()
+    assert page["total"] == 5
+    assert len(page["items"]) == 2
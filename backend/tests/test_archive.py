@@ -0,0 +1,129 @@
+import sys
+from datetime import datetime, timedelta
+
+from app import archive, models
+from app.repos import archive_repo
+from app.services import archive_service
+
+TITLE = "Error 500 al exportar el reporte mensual de ventas"
+
+
+def _create(client, auth, project, title, status=None):
+    body = {"title": title, "project_id": project["id"], "status": status}
+    r = client.post("/tickets", json=body, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _age(db, ticket_ids, days):
+    past = datetime.utcnow() - timedelta(days=days)
+    db.query(models.Ticket).filter(models.Ticket.id.in_(ticket_ids)).update({"closed_at": past}, synchronize_session=False)
+    db.commit()
+
+
+def _ids(client, auth, **params):
+    r = client.get("/tickets", params={"sort_direction": "asc", **params}, headers=auth)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    return [t["id"] for t in body["items"]], body
+
+
+def test_only_old_closed_tickets_are_archived(client, auth, project, db):
+    old = _create(client, auth, project, "viejo", "closed")
+    recent = _create(client, auth, project, "reciente", "closed")
+    open_ = _create(client, auth, project, "abierto", "open")
+    _age(db, [old["id"]], 120)
+
+    assert archive_service.archive_closed_tickets(db, older_than_days=90) == 1
+    assert db.query(models.ArchivedTicket.id).all() == [(old["id"],)]
+    assert _ids(client, auth)[0] == [recent["id"], open_["id"]]
+    assert client.get(f"/tickets/{old['id']}", headers=auth).status_code == 404
+
+
+def test_batches_and_max_batches(client, auth, project, db):
+    tickets = [_create(client, auth, project, f"t{i}", "closed") for i in range(5)]
+    _age(db, [t["id"] for t in tickets], 120)
+
+    assert archive_service.archive_closed_tickets(db, 90, batch_size=2, max_batches=1) == 2
+    assert archive_service.archive_closed_tickets(db, 90, batch_size=2) == 3
+    assert db.query(models.Ticket).count() == 0
+
+
+def test_include_archived_lists_both_tables(client, auth, project, db):
+    old = _create(client, auth, project, "viejo cerrado", "closed")
+    hot = _create(client, auth, project, "nuevo cerrado", "closed")
+    _create(client, auth, project, "abierto", "open")
+    _age(db, [old["id"]], 120)
+    archive_service.archive_closed_tickets(db, 90)
+
+    ids, body = _ids(client, auth, include_archived="true", status="closed", facets="status")
+    assert ids == [old["id"], hot["id"]]
+    assert body["total"] == 2
+    assert body["facets"]["status"] == [{"value": "closed", "count": 2}]
+
+    ids, _ = _ids(client, auth, include_archived="true", search="viejo")
+    assert ids == [old["id"]]
+    assert _ids(client, auth, include_archived="true")[1]["total"] == 3
+
+
+def test_restore_moves_the_ticket_back(client, auth, project, db):
+    old = _create(client, auth, project, TITLE, "closed")
+    _age(db, [old["id"]], 120)
+    archive_service.archive_closed_tickets(db, 90)
+    assert db.query(models.TicketLshBucket).filter_by(ticket_id=old["id"]).count() == 0
+
+    r = client.post(f"/tickets/{old['id']}/restore", headers=auth)
+    assert r.status_code == 200, r.text
+    assert r.json()["id"] == old["id"]
+    assert db.query(models.ArchivedTicket).count() == 0
+    assert client.get(f"/tickets/{old['id']}", headers=auth).status_code == 200
+
+    # los buckets LSH se regeneran al volver a la tabla caliente
+    copy = _create(client, auth, project, TITLE + " otra vez")
+    assert [d["id"] for d in copy["possible_duplicates"]] == [old["id"]]
+
+    assert client.post(f"/tickets/{old['id']}/restore", headers=auth).status_code == 404
+
+
+def test_cli(client, auth, project, db, monkeypatch):
+    old = _create(client, auth, project, "viejo", "closed")
+    _age(db, [old["id"]], 10)
+
+    monkeypatch.setattr(sys, "argv", ["app.archive", "--days", "30"])
+    archive.main()
+    assert db.query(models.ArchivedTicket).count() == 0
+
+    monkeypatch.setattr(sys, "argv", ["app.archive", "--days", "5", "--batch-size", "10"])
+    archive.main()
+    assert db.query(models.ArchivedTicket).count() == 1
+
+
+def test_ticket_reopened_before_the_move_stays_hot(client, auth, project, db):
+    me = client.get("/users/me", headers=auth).json()
+    ticket = _create(client, auth, project, "viejo", "closed")
+    _age(db, [ticket["id"]], 120)
+    cutoff = datetime.utcnow() - timedelta(days=90)
+    rows = archive_repo.archivable(db, cutoff, 10)
+    assert rows == [(ticket["id"], me["id"])]
+
+    # se reabre (y se asigna) entre archivable() y el movimiento
+    client.put(f"/tickets/{ticket['id']}", json={"status": "open", "assigned_to_id": me["id"]}, headers=auth)
+    assert archive_repo.move_to_archive(db, me["id"], [ticket["id"]], cutoff, datetime.utcnow()) == []
+
+    assert client.get(f"/tickets/{ticket['id']}", headers=auth).status_code == 200
+    assert db.query(models.ArchivedTicket).count() == 0
+    assert client.get("/users/me/assigned", headers=auth).json()["open_count"] == 1
+
+
+def test_archived_tickets_leave_the_change_feed(client, auth, project, db):
+    old = _create(client, auth, project, "viejo", "closed")
+    _age(db, [old["id"]], 120)
+    token = client.get("/tickets/changes", headers=auth).json()["next_token"]
+
+    archive_service.archive_closed_tickets(db, 90)
+    changes = client.get(f"/tickets/changes?since={token}", headers=auth).json()
+    assert changes["deleted_tickets"] == [old["id"]]
+
+    client.post(f"/tickets/{old['id']}/restore", headers=auth)
+    restored = client.get(f"/tickets/changes?since={changes['next_token']}", headers=auth).json()
+    assert [t["id"] for t in restored["tickets"]] == [old["id"]]
@@ -0,0 +1,88 @@
+from tests.conftest import register
+
+
+def _me(client, headers):
+    return client.get("/users/me", headers=headers).json()
+
+
+def _create(client, auth, project, title, **fields):
+    r = client.post("/tickets", json={"title": title, "project_id": project["id"], **fields}, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _inbox(client, headers, **params):
+    r = client.get("/users/me/assigned", params=params, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_inbox_lists_tickets_from_any_owner(client, auth, project):
+    beto = register(client, "beto")
+    beto_id = _me(client, beto)["id"]
+    mine = _create(client, auth, project, "de ana", assigned_to_id=beto_id)
+    _create(client, auth, project, "sin asignar")
+
+    beto_project = client.post("/projects", json={"name": "B", "description": "b"}, headers=beto).json()
+    own = _create(client, beto, beto_project, "de beto", assigned_to_id=beto_id)
+
+    body = _inbox(client, beto)
+    assert [t["id"] for t in body["items"]] == [own["id"], mine["id"]]
+    assert body["open_count"] == 2
+    assert body["next_cursor"] is None
+    assert _inbox(client, auth)["items"] == []
+
+
+def test_open_count_follows_status_and_reassignment(client, auth, project):
+    me_id = _me(client, auth)["id"]
+    beto = register(client, "beto")
+    beto_id = _me(client, beto)["id"]
+
+    a = _create(client, auth, project, "a", assigned_to_id=me_id)
+    b = _create(client, auth, project, "b", assigned_to_id=me_id, status="pending")
+    _create(client, auth, project, "c", assigned_to_id=me_id, status="closed")
+    assert _inbox(client, auth)["open_count"] == 2
+
+    client.put(f"/tickets/{a['id']}", json={"status": "closed"}, headers=auth)
+    assert _inbox(client, auth)["open_count"] == 1
+
+    client.put(f"/tickets/{b['id']}", json={"assigned_to_id": beto_id}, headers=auth)
+    assert _inbox(client, auth)["open_count"] == 0
+    assert _inbox(client, beto)["open_count"] == 1
+
+    client.delete(f"/tickets/{b['id']}", headers=auth)
+    assert _inbox(client, beto)["open_count"] == 0
+
+
+def test_status_filter(client, auth, project):
+    me_id = _me(client, auth)["id"]
+    _create(client, auth, project, "abierto", assigned_to_id=me_id, status="open")
+    _create(client, auth, project, "cerrado", assigned_to_id=me_id, status="closed")
+
+    assert [t["title"] for t in _inbox(client, auth, status="closed")["items"]] == ["cerrado"]
+    assert len(_inbox(client, auth, status=["open", "closed"])["items"]) == 2
+
+
+def test_cursor_walks_newest_first_without_repeats(client, auth, project):
+    me_id = _me(client, auth)["id"]
+    created = [_create(client, auth, project, f"t{i}", assigned_to_id=me_id) for i in range(5)]
+    # tocar el más viejo lo sube al principio de la bandeja
+    client.put(f"/tickets/{created[0]['id']}", json={"title": "t0 editado"}, headers=auth)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = _inbox(client, auth, **params)
+        seen += [t["id"] for t in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [created[0]["id"]] + [t["id"] for t in reversed(created[1:])]
+    assert seen == expected
+
+
+def test_invalid_cursor_is_400(client, auth):
+    assert client.get("/users/me/assigned?cursor=basura", headers=auth).status_code == 400
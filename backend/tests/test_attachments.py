@@ -0,0 +1,123 @@
+import glob
+import os
+
+import pytest
+
+from app import models
+from app.services import blobs_service
+from app.storage import ATTACHMENTS_DIR, StoredBlob, get_blob_store
+
+CONTENT = b"linea de log\n" * 2000
+
+
+def _blob_files() -> list[str]:
+    return glob.glob(os.path.join(ATTACHMENTS_DIR, "??", "??", "*"))
+
+
+def _tmp_files() -> list[str]:
+    return os.listdir(get_blob_store().tmp_dir)
+
+
+@pytest.fixture(autouse=True)
+def empty_store():
+    store = get_blob_store()
+    for path in _blob_files() + [os.path.join(store.tmp_dir, name) for name in _tmp_files()]:
+        os.unlink(path)
+
+
+@pytest.fixture
+def ticket(client, auth, project):
+    return client.post("/tickets", json={"title": "Falla el login", "project_id": project["id"]}, headers=auth).json()
+
+
+def _upload(client, auth, ticket_id, content=CONTENT, name="app.log"):
+    return client.post(f"/tickets/{ticket_id}/attachments", files={"file": (name, content, "text/plain")}, headers=auth)
+
+
+def _refcount(db, sha) -> int | None:
+    row = db.get(models.BlobRef, sha)
+    return row.refcount if row else None
+
+
+def test_upload_and_download_with_range(client, auth, ticket):
+    r = _upload(client, auth, ticket["id"])
+    assert r.status_code == 200, r.text
+    attachment = r.json()
+    assert attachment["size"] == len(CONTENT)
+
+    url = f"/tickets/{ticket['id']}/attachments/{attachment['id']}"
+    full = client.get(url, headers=auth)
+    assert full.status_code == 200
+    assert full.content == CONTENT
+    partial = client.get(url, headers={**auth, "Range": "bytes=0-11"})
+    assert partial.status_code == 206
+    assert partial.content == b"linea de log"
+
+
+def test_same_content_is_stored_once(client, auth, ticket, db):
+    first = _upload(client, auth, ticket["id"], name="a.log").json()
+    second = _upload(client, auth, ticket["id"], name="b.log").json()
+
+    assert first["sha256"] == second["sha256"]
+    assert len(_blob_files()) == 1
+    assert _refcount(db, first["sha256"]) == 2
+    assert _tmp_files() == []
+
+
+def test_blob_is_deleted_with_its_last_reference(client, auth, ticket, db):
+    first = _upload(client, auth, ticket["id"]).json()
+    second = _upload(client, auth, ticket["id"]).json()
+    base = f"/tickets/{ticket['id']}/attachments"
+
+    client.delete(f"{base}/{first['id']}", headers=auth)
+    assert len(_blob_files()) == 1
+    assert client.get(f"{base}/{second['id']}", headers=auth).status_code == 200
+
+    client.delete(f"{base}/{second['id']}", headers=auth)
+    assert _blob_files() == []
+    assert _refcount(db, first["sha256"]) is None
+
+
+def test_deleting_the_ticket_releases_its_blobs(client, auth, ticket):
+    _upload(client, auth, ticket["id"])
+    assert client.delete(f"/tickets/{ticket['id']}", headers=auth).status_code == 200
+    assert _blob_files() == []
+
+
+def test_missing_blob_is_404(client, auth, ticket):
+    attachment = _upload(client, auth, ticket["id"]).json()
+    os.unlink(_blob_files()[0])
+
+    r = client.get(f"/tickets/{ticket['id']}/attachments/{attachment['id']}", headers=auth)
+    assert r.status_code == 404
+
+
+def test_upload_to_unknown_ticket_leaves_nothing_on_disk(client, auth):
+    assert _upload(client, auth, 999).status_code == 404
+    assert _blob_files() == []
+    assert _tmp_files() == []
+
+
+def test_release_recounts_before_unlinking(client, auth, ticket, db):
+    """Si el contador llega a 0 pero todavía hay adjuntos con ese sha, el archivo se queda."""
+    attachment = _upload(client, auth, ticket["id"]).json()
+    sha = attachment["sha256"]
+    # liberamos una referencia que no corresponde a ningún adjunto borrado
+
+    blobs_service.release(db, get_blob_store(), {sha: 1})
+    assert len(_blob_files()) == 1
+    assert _refcount(db, sha) == 1
+
+
+def test_acquire_places_the_upload_and_takes_a_reference(db):
+    store = get_blob_store()
+    writer = store.writer()
+    writer.write(b"hola")
+    sha, tmp_path = writer.finish()
+    blob = StoredBlob(sha256=sha, size=4, filename="h.txt", content_type="text/plain", tmp_path=tmp_path)
+
+    blobs_service.acquire(db, store, blob)
+    db.commit()
+    assert store.exists(sha)
+    assert not os.path.exists(tmp_path)
+    assert _refcount(db, sha) == 1
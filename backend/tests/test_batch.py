@@ -0,0 +1,108 @@
+import pytest
+
+from app import batch, deps, models
+from app.services import tickets_service
+from tests.conftest import register
+
+
+def _batch(client, auth, requests):
+    return client.post("/batch", json={"requests": requests}, headers=auth)
+
+
+def test_responses_keep_the_request_order(client, auth, project):
+    r = _batch(client, auth, [
+        {"method": "GET", "path": f"/projects/{project['id']}"},
+        {"method": "GET", "path": "/tickets/999"},
+        {"method": "GET", "path": "/users/me"},
+    ])
+    assert r.status_code == 200
+    responses = r.json()["responses"]
+    assert [s["status"] for s in responses] == [200, 404, 200]
+    assert responses[0]["body"]["name"] == "Backend"
+    assert responses[1]["body"]["code"]
+    assert responses[2]["body"]["username"] == "ana"
+    assert responses[0]["headers"]["content-type"] == "application/json"
+
+
+def test_writes_run_in_order_with_the_reads_around_them(client, auth, project):
+    r = _batch(client, auth, [
+        {"method": "GET", "path": f"/tickets?project_id={project['id']}"},
+        {"method": "POST", "path": "/tickets", "body": {"title": "uno", "project_id": project["id"]}},
+        {"method": "POST", "path": "/tickets", "body": {"title": "dos", "project_id": project["id"]}},
+        {"method": "GET", "path": f"/tickets?project_id={project['id']}&sort_direction=asc"},
+    ])
+    before, first, second, after = r.json()["responses"]
+    assert before["body"]["total"] == 0
+    assert first["body"]["id"] < second["body"]["id"]
+    assert [t["title"] for t in after["body"]["items"]] == ["uno", "dos"]
+
+
+def test_user_is_authenticated_once(client, auth, project, monkeypatch):
+    lookups = []
+    original = deps.get_user_by_username
+
+    def counting(*args, **kwargs):
+        lookups.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(deps, "get_user_by_username", counting)
+    _batch(client, auth, [{"method": "GET", "path": "/users/me"}] * 5)
+    assert len(lookups) == 1
+
+
+def test_sub_request_cannot_swap_the_token(client, auth, project):
+    beto = register(client, "beto")
+    r = _batch(client, auth, [{"method": "GET", "path": "/users/me", "headers": beto}])
+    assert r.json()["responses"][0]["body"]["username"] == "ana"
+
+
+def test_requires_auth(client):
+    assert _batch(client, {}, [{"method": "GET", "path": "/users/me"}]).status_code == 401
+
+
+@pytest.mark.parametrize("sub", [
+    {"method": "POST", "path": "/batch"},
+    {"method": "POST", "path": "/token"},
+    {"method": "GET", "path": "/tickets/stream?project_id=1"},
+    {"method": "GET", "path": "/tickets/1/attachments"},
+    {"method": "OPTIONS", "path": "/tickets"},
+    {"method": "GET", "path": "tickets"},
+])
+def test_rejected_sub_requests(client, auth, sub):
+    r = _batch(client, auth, [{"method": "GET", "path": "/users/me"}, sub])
+    assert r.status_code == 400
+    assert r.json()["extra"]["index"] == 1
+
+
+def test_size_limits(client, auth, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_MAX_REQUESTS", 2)
+    assert _batch(client, auth, []).status_code == 400
+    r = _batch(client, auth, [{"method": "GET", "path": "/users/me"}] * 3)
+    assert r.status_code == 400
+    assert r.json()["extra"] == {"max_requests": 2}
+
+
+def test_unexpected_error_stays_in_its_slot(client, auth, project, monkeypatch):
+    def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(tickets_service, "get_ticket", boom)
+    r = _batch(client, auth, [
+        {"method": "GET", "path": "/tickets/1"},
+        {"method": "GET", "path": "/users/me"},
+    ])
+    assert r.status_code == 200
+    failed, ok = r.json()["responses"]
+    assert failed["status"] == 500
+    assert failed["body"]["code"] == "INTERNAL_SERVER_ERROR"
+    assert ok["status"] == 200
+
+
+def test_batch_with_idempotency_key_runs_once(client, auth, project, db):
+    requests = [{"method": "POST", "path": "/tickets", "body": {"title": "uno", "project_id": project["id"]}}]
+    headers = {**auth, "Idempotency-Key": "lote-1"}
+    first = client.post("/batch", json={"requests": requests}, headers=headers)
+    second = client.post("/batch", json={"requests": requests}, headers=headers)
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert db.query(models.Ticket).count() == 1
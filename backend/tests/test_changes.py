@@ -0,0 +1,81 @@
+import pytest
+
+from app.changes import decode_token, encode_token
+from app.exceptions import BadRequestError
+from tests.conftest import register
+
+
+def _changes(client, auth, since=None, limit=None):
+    params = {}
+    if since is not None:
+        params["since"] = since
+    if limit is not None:
+        params["limit"] = limit
+    r = client.get("/tickets/changes", params=params, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_token_round_trip():
+    assert decode_token(encode_token(42)) == 42
+    assert decode_token(None) == 0
+    assert decode_token("") == 0
+
+
+@pytest.mark.parametrize("token", ["basura", "eDE6MQ", "djI6MQ"])
+def test_invalid_token_is_rejected(token):
+    with pytest.raises(BadRequestError):
+        decode_token(token)
+
+
+def test_invalid_token_is_400(client, auth):
+    assert client.get("/tickets/changes?since=basura", headers=auth).status_code == 400
+
+
+def test_full_sync_then_deltas(client, auth, project):
+    ticket = client.post("/tickets", json={"title": "Uno", "project_id": project["id"]}, headers=auth).json()
+
+    first = _changes(client, auth)
+    assert [p["id"] for p in first["projects"]] == [project["id"]]
+    assert [t["id"] for t in first["tickets"]] == [ticket["id"]]
+    assert first["has_more"] is False
+
+    # nada nuevo: mismo token
+    idle = _changes(client, auth, since=first["next_token"])
+    assert idle["tickets"] == [] and idle["projects"] == []
+    assert idle["next_token"] == first["next_token"]
+
+    client.put(f"/tickets/{ticket['id']}", json={"title": "Uno bis"}, headers=auth)
+    updated = _changes(client, auth, since=first["next_token"])
+    assert [t["title"] for t in updated["tickets"]] == ["Uno bis"]
+    assert updated["projects"] == []
+
+    client.delete(f"/tickets/{ticket['id']}", headers=auth)
+    deleted = _changes(client, auth, since=updated["next_token"])
+    assert deleted["tickets"] == []
+    assert deleted["deleted_tickets"] == [ticket["id"]]
+
+
+def test_pages_follow_the_sequence(client, auth, project):
+    for i in range(5):
+        client.post("/tickets", json={"title": f"t{i}", "project_id": project["id"]}, headers=auth)
+
+    seen, token, pages = [], None, 0
+    while True:
+        page = _changes(client, auth, since=token, limit=2)
+        seen += [("project", p["id"]) for p in page["projects"]] + [("ticket", t["id"]) for t in page["tickets"]]
+        token = page["next_token"]
+        pages += 1
+        if not page["has_more"]:
+            break
+    assert pages == 3
+    assert len(seen) == 6
+    assert len(set(seen)) == 6
+
+
+def test_changes_are_per_owner(client, auth, project):
+    client.post("/tickets", json={"title": "privado", "project_id": project["id"]}, headers=auth)
+    other = register(client, "beto")
+
+    body = _changes(client, other)
+    assert body["tickets"] == [] and body["projects"] == []
@@ -0,0 +1,120 @@
+import asyncio
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.compression import CompressionMiddleware, CompressionStats, choose_encoding, parse_accept_encoding
+
+BIG = b'{"items": [' + b",".join(b'{"id": %d, "title": "ticket"}' % i for i in range(200)) + b"]}"
+
+
+async def _big(request):
+    return Response(BIG, media_type="application/json")
+
+
+async def _small(request):
+    return PlainTextResponse("ok")
+
+
+async def _events(request):
+    async def gen():
+        for _ in range(50):
+            yield b"data: " + b"x" * 100 + b"\n\n"
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+def _call(accept_encoding: str | None, path: str, stats: CompressionStats | None = None):
+    """Llama al middleware por ASGI y devuelve (headers, body) sin decodificar."""
+    inner = Starlette(routes=[Route("/big", _big), Route("/small", _small), Route("/events", _events)])
+    app = CompressionMiddleware(inner, minimum_size=500, stats=stats or CompressionStats())
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding is not None else []
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": headers, "http_version": "1.1", "scheme": "http", "server": ("test", 80), "root_path": ""}
+    messages = []
+
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # el cliente sigue conectado; StreamingResponse lo cancela al terminar
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return {k.decode(): v.decode() for k, v in start["headers"]}, body
+
+
+def test_parse_accept_encoding_drops_q_zero():
+    assert parse_accept_encoding("gzip;q=0.5, br, zstd;q=0") == {"gzip": 0.5, "br": 1.0}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br, zstd", "zstd"),
+    ("gzip;q=1, br;q=0.8", "gzip"),
+    ("br", "br"),
+    ("*", "zstd"),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize("encoding, decompress", [
+    ("gzip", gzip.decompress),
+    ("br", brotli.decompress),
+    ("zstd", lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)),
+])
+def test_large_response_is_compressed(encoding, decompress):
+    headers, body = _call(encoding, "/big")
+    assert headers["content-encoding"] == encoding
+    assert "accept-encoding" in headers["vary"].lower()
+    assert "content-length" not in headers or int(headers["content-length"]) == len(body)
+    assert len(body) < len(BIG)
+    assert decompress(body) == BIG
+
+
+def test_response_under_threshold_is_not_compressed():
+    headers, body = _call("gzip", "/small")
+    assert "content-encoding" not in headers
+    assert body == b"ok"
+
+
+def test_without_accept_encoding_passes_through():
+    headers, body = _call(None, "/big")
+    assert "content-encoding" not in headers
+    assert body == BIG
+
+
+def test_event_stream_is_never_compressed():
+    headers, body = _call("gzip", "/events")
+    assert "content-encoding" not in headers
+    assert body.startswith(b"data: ")
+
+
+def test_stats_count_compressed_bytes():
+    stats = CompressionStats()
+    headers, body = _call("gzip", "/big", stats)
+    snapshot = stats.snapshot()
+    [route] = snapshot.values()
+    assert route["responses"] == 1
+    assert route["bytes_in"] == len(BIG)
+    assert route["bytes_out"] == len(body)
+    assert route["encodings"] == {"gzip": 1}
+
+
+def test_compression_metrics_require_auth(client, auth):
+    assert client.get("/metrics/compression").status_code == 401
+    assert client.get("/metrics/compression", headers=auth).status_code == 200
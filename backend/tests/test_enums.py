@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import text
+
+from app.enums import OrdinalEnumType, TicketPriority, TicketStatus
+from app.migrate import _PRIORITY_CASE, _STATUS_CASE
+
+
+def _create(client, auth, project, title, **fields):
+    r = client.post("/tickets", json={"title": title, "project_id": project["id"], **fields}, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_ordinals():
+    assert [s.ordinal for s in TicketStatus] == [1, 2, 3]
+    assert TicketPriority.from_ordinal(3) is TicketPriority.HIGH
+    assert TicketStatus("pending") == "pending"
+    with pytest.raises(ValueError):
+        TicketStatus.from_ordinal(9)
+
+
+def test_column_type_accepts_enum_or_string():
+    col = OrdinalEnumType(TicketPriority)
+    assert col.process_bind_param("medium", None) == 2
+    assert col.process_bind_param(TicketPriority.MEDIUM, None) == 2
+    assert col.process_bind_param(None, None) is None
+    assert col.process_result_value(2, None) is TicketPriority.MEDIUM
+    with pytest.raises(ValueError):
+        col.process_bind_param("urgente", None)
+
+
+def test_api_speaks_strings_and_stores_smallints(client, auth, project, db):
+    ticket = _create(client, auth, project, "t", status="pending", priority="high")
+    assert (ticket["status"], ticket["priority"]) == ("pending", "high")
+
+    row = db.execute(text("SELECT status, priority FROM tickets WHERE id = :id"), {"id": ticket["id"]}).one()
+    assert tuple(row) == (2, 3)
+
+
+def test_unknown_values_are_422(client, auth, project):
+    r = client.post("/tickets", json={"title": "t", "project_id": project["id"], "priority": "urgente"}, headers=auth)
+    assert r.status_code == 422
+    ticket = _create(client, auth, project, "t")
+    assert client.put(f"/tickets/{ticket['id']}", json={"status": "done"}, headers=auth).status_code == 422
+
+
+@pytest.mark.parametrize("field,values", [
+    ("priority", ["medium", "high", "low"]),
+    ("status", ["closed", "open", "pending"]),
+])
+def test_sorting_uses_the_semantic_order(client, auth, project, field, values):
+    for v in values:
+        _create(client, auth, project, v, **{field: v})
+
+    def order(direction):
+        r = client.get("/tickets", params={"sort_field": field, "sort_direction": direction}, headers=auth)
+        return [t[field] for t in r.json()["items"]]
+
+    expected = sorted(values, key=lambda v: (TicketPriority if field == "priority" else TicketStatus)(v).ordinal)
+    assert order("asc") == expected
+    assert order("desc") == expected[::-1]
+
+
+@pytest.mark.parametrize("case,raw,expected", [
+    (_STATUS_CASE, " Open ", 1),
+    (_STATUS_CASE, "in_progress", 2),
+    (_STATUS_CASE, "DONE", 3),
+    (_STATUS_CASE, "cualquiera", None),
+    (_PRIORITY_CASE, "normal", 2),
+    (_PRIORITY_CASE, "Urgent", 3),
+    (_PRIORITY_CASE, None, None),
+])
+def test_migration_maps_legacy_strings(db, case, raw, expected):
+    column = "status" if case is _STATUS_CASE else "priority"
+    value = db.execute(text(f"SELECT {case} FROM (SELECT :raw AS {column})"), {"raw": raw}).scalar()
+    assert value == expected
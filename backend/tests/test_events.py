@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import pytest
+
+import app.events as events
+from app.events import Broadcaster, sse_stream
+
+
+class _ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+@pytest.fixture
+def broadcaster(monkeypatch):
+    fresh = Broadcaster(history_size=10)
+    monkeypatch.setattr(events, "ticket_events", fresh)
+    return fresh
+
+
+def _collect(owner_id, project_id=None, last_event_id=None, publish=(), count=1, heartbeat=5.0):
+    """Abre el stream, publica desde otro thread (como los servicios) y junta `count` mensajes."""
+    async def run():
+        stream = sse_stream(_ConnectedRequest(), owner_id, project_id, last_event_id, heartbeat=heartbeat)
+        out = [await stream.__anext__()]
+        for args in publish:
+            thread = threading.Thread(target=events.ticket_events.publish, args=args)
+            thread.start()
+            thread.join()
+        while len(out) < count:
+            out.append(await asyncio.wait_for(stream.__anext__(), timeout=2))
+        await stream.aclose()
+        return out
+    return asyncio.run(run())
+
+
+def test_stream_delivers_only_the_owners_events(broadcaster):
+    out = _collect(
+        owner_id=1,
+        publish=[("ticket.created", 2, [5], {"id": 50}), ("ticket.created", 1, [3], {"id": 7})],
+        count=2,
+    )
+    assert out[0].startswith("retry:")
+    assert out[1].startswith("id: 2\nevent: ticket.created\n")
+    assert '"id": 7' in out[1]
+    assert broadcaster.subscriber_count() == 0
+
+
+def test_project_filter(broadcaster):
+    out = _collect(
+        owner_id=1,
+        project_id=3,
+        publish=[("ticket.updated", 1, [4], {"id": 1}), ("ticket.updated", 1, [4, 3], {"id": 2})],
+        count=2,
+    )
+    assert '"id": 2' in out[1]
+
+
+def test_resume_with_last_event_id_replays_the_gap(broadcaster):
+    for i in range(1, 4):
+        broadcaster.publish("ticket.updated", 1, [1], {"id": i})
+
+    out = _collect(owner_id=1, last_event_id=1, count=3)
+    assert [message.split("\n")[0] for message in out[1:]] == ["id: 2", "id: 3"]
+
+
+def test_resume_past_history_asks_for_reset(broadcaster):
+    out = _collect(owner_id=1, last_event_id=500, count=2)
+    assert out[1].startswith("event: reset")
+
+
+def test_slow_consumer_gets_reset_instead_of_unbounded_queue(broadcaster, monkeypatch):
+    monkeypatch.setattr(events, "SSE_SUBSCRIBER_QUEUE", 2)
+    out = _collect(owner_id=1, publish=[("x", 1, [1], {"i": i}) for i in range(5)], count=2)
+    assert out[1].startswith("event: reset")
+
+
+def test_heartbeat_when_idle(broadcaster):
+    out = _collect(owner_id=1, count=2, heartbeat=0.05)
+    assert out[1] == ": ping\n\n"
+
+
+def test_ticket_writes_are_published(client, auth, project):
+    ticket = client.post("/tickets", json={"title": "Nuevo", "project_id": project["id"]}, headers=auth).json()
+    client.delete(f"/tickets/{ticket['id']}", headers=auth)
+
+    history = list(events.ticket_events._history)[-2:]
+    assert [e.type for e in history] == ["ticket.created", "ticket.deleted"]
+    assert all(project["id"] in e.project_ids for e in history)
+
+
+def test_stream_requires_auth(client):
+    assert client.get("/tickets/stream").status_code == 401
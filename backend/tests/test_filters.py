@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.conftest import register
+
+
+def _me(client, auth):
+    return client.get("/users/me", headers=auth).json()
+
+
+@pytest.fixture
+def tickets(client, auth, project):
+    me = _me(client, auth)
+    rows = [
+        ("a", "open", "high", me["id"]),
+        ("b", "open", "low", None),
+        ("c", "pending", "high", None),
+        ("d", "closed", "medium", me["id"]),
+        ("e", "closed", None, None),
+    ]
+    created = []
+    for title, status, priority, assignee in rows:
+        body = {"title": title, "project_id": project["id"], "status": status, "priority": priority, "assigned_to_id": assignee}
+        r = client.post("/tickets", json=body, headers=auth)
+        assert r.status_code == 200, r.text
+        created.append(r.json())
+    return created
+
+
+def _titles(client, auth, params):
+    r = client.get("/tickets", params={**params, "sort_field": "title", "sort_direction": "asc"}, headers=auth)
+    assert r.status_code == 200, r.text
+    return [t["title"] for t in r.json()["items"]]
+
+
+def test_multi_value_filters(client, auth, tickets):
+    assert _titles(client, auth, {"status": ["open", "pending"]}) == ["a", "b", "c"]
+    assert _titles(client, auth, {"status": "closed", "priority": ["medium", "high"]}) == ["d"]
+    assert _titles(client, auth, {"assigned_to_id": tickets[0]["assigned_to_id"]}) == ["a", "d"]
+
+
+def test_unassigned_filter(client, auth, tickets):
+    me_id = tickets[0]["assigned_to_id"]
+    assert _titles(client, auth, {"assigned_to_id": "none"}) == ["b", "c", "e"]
+    assert _titles(client, auth, {"assigned_to_id": ["none", me_id], "status": "closed"}) == ["d", "e"]
+    assert client.get("/tickets?assigned_to_id=nadie", headers=auth).status_code == 400
+
+
+def test_invalid_status_is_422(client, auth, tickets):
+    assert client.get("/tickets?status=abierto", headers=auth).status_code == 422
+
+
+def test_date_ranges(client, auth, tickets):
+    now = datetime.utcnow()
+    assert len(_titles(client, auth, {"created_after": (now - timedelta(hours=1)).isoformat()})) == 5
+    assert _titles(client, auth, {"created_after": (now + timedelta(hours=1)).isoformat()}) == []
+    assert _titles(client, auth, {"updated_before": (now - timedelta(hours=1)).isoformat()}) == []
+
+
+def test_facets_follow_the_current_filters(client, auth, tickets):
+    me_id = tickets[0]["assigned_to_id"]
+    r = client.get("/tickets?facets=status,priority,assignee", headers=auth)
+    body = r.json()
+    assert body["total"] == 5
+    facets = {f: {v["value"]: v["count"] for v in values} for f, values in body["facets"].items()}
+    assert facets["status"] == {"open": 2, "pending": 1, "closed": 2}
+    assert facets["priority"] == {"high": 2, "low": 1, "medium": 1, None: 1}
+    assert facets["assignee"] == {me_id: 2, None: 3}
+
+    body = client.get("/tickets?status=open&facets=priority", headers=auth).json()
+    assert set(body["facets"]) == {"priority"}
+    assert {v["value"]: v["count"] for v in body["facets"]["priority"]} == {"high": 1, "low": 1}
+
+
+def test_facets_are_omitted_unless_requested(client, auth, tickets):
+    assert client.get("/tickets", headers=auth).json()["facets"] is None
+
+
+def test_unknown_facet_is_400(client, auth, tickets):
+    r = client.get("/tickets?facets=status,color", headers=auth)
+    assert r.status_code == 400
+    assert "color" in r.text
+
+
+def test_facets_are_per_owner(client, auth, tickets):
+    other = register(client, "beto")
+    body = client.get("/tickets?facets=status", headers=other).json()
+    assert body["total"] == 0
+    assert body["facets"] == {"status": []}
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from app import database
+from app.jobs import WorkerPool
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _unreachable_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path}/no/existe/x.db")
+
+
+def test_live_does_not_need_the_database(client, monkeypatch):
+    monkeypatch.setattr(database, "all_engines", lambda: [])
+    assert client.get("/health/live").json() == {"status": "ok"}
+    assert client.get("/health").status_code == 200
+
+
+def test_ready_reports_each_engine(client):
+    r = client.get("/health/ready")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ok"
+    check = body["databases"]["default"]
+    assert check["ok"] is True
+    assert check["latency_ms"] >= 0
+    assert "class" in check["pool"]
+
+
+def test_ready_is_503_when_a_database_is_down(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(database, "all_engines", lambda: [_unreachable_engine(tmp_path)])
+    r = client.get("/health/ready")
+    assert r.status_code == 503
+    body = r.json()
+    assert body["status"] == "unavailable"
+    assert body["databases"]["default"]["ok"] is False
+    assert body["databases"]["default"]["error"] == "OperationalError"
+
+
+def test_saturated_pool_is_not_ready_without_pinging(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path}/p.db", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=30)
+    monkeypatch.setattr(database, "all_engines", lambda: [eng])
+    with eng.connect():
+        ready, checks = database.check_ready()
+    assert ready is False
+    (check,) = checks.values()
+    assert check["pool"]["saturated"] is True
+    assert "latency_ms" not in check
+    assert database.check_ready()[0] is True
+    eng.dispose()
+
+
+def test_init_database_retries_until_the_database_answers(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "_schema_ready", False)
+    monkeypatch.setattr(database, "all_engines", lambda: [_unreachable_engine(tmp_path)])
+    assert database.init_database() is False
+    assert database._schema_ready is False
+
+    monkeypatch.setattr(database, "all_engines", lambda: [database.engine])
+    ready, _ = database.check_ready()
+    assert ready is True
+    assert database._schema_ready is True
+
+
+def test_warm_pool_leaves_connections_checked_in(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path}/w.db", poolclass=QueuePool, pool_size=3, max_overflow=0)
+    monkeypatch.setattr(database, "all_engines", lambda: [eng])
+    assert database.warm_pool(2) == 2
+    assert eng.pool.checkedin() == 2
+    assert eng.pool.checkedout() == 0
+    eng.dispose()
+
+
+def test_worker_pool_starts_without_the_database():
+    attempts = []
+    retried = threading.Event()
+
+    def broken_session():
+        attempts.append(1)
+        if len(attempts) >= 3:
+            retried.set()
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    pool = WorkerPool(workers=1, poll_interval=0.01, session_factory=broken_session)
+    pool.start()  # no conecta: sólo levanta los threads
+    try:
+        assert retried.wait(5)
+    finally:
+        pool.stop()
+    assert pool._last_requeue is None
+
+
+STARTUP_SCRIPT = textwrap.dedent("""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+        r = client.get("/health/ready")
+        assert r.status_code == 503, r.text
+        assert r.json()["status"] == "unavailable"
+    print("ok")
+""")
+
+
+def test_app_boots_with_the_database_down(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/no/existe/x.db",
+        "SHARD_URLS": "",
+        "ATTACHMENTS_DIR": str(tmp_path / "attachments"),
+        "JOBS_RUN_IN_APP": "1",
+        "LOG_LEVEL": "ERROR",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-3000:]
+    assert result.stdout.strip().endswith("ok")
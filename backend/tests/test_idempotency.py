@@ -0,0 +1,149 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import deps, idempotency, models
+from app.idempotency import request_hash
+from app.jobs import WorkerPool
+from app.main import app
+from app.repos import users_repo
+from app.services import tickets_service
+from tests.conftest import register
+
+
+@pytest.fixture(autouse=True)
+def no_purge(monkeypatch):
+    # que ningún test encole el purge salvo el que lo pide
+    monkeypatch.setattr(idempotency, "_last_purge", float("inf"))
+
+
+def _post(client, auth, key, body):
+    return client.post("/tickets", json=body, headers={**auth, "Idempotency-Key": key})
+
+
+def test_retry_replays_the_stored_response(client, auth, project, db):
+    body = {"title": "una vez", "project_id": project["id"]}
+    first = _post(client, auth, "k1", body)
+    second = _post(client, auth, "k1", body)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert db.query(models.Ticket).count() == 1
+
+
+def test_same_key_with_another_body_is_422(client, auth, project, db):
+    _post(client, auth, "k1", {"title": "a", "project_id": project["id"]})
+    r = _post(client, auth, "k1", {"title": "b", "project_id": project["id"]})
+    assert r.status_code == 422
+    assert r.json()["code"] == "IDEMPOTENCY_KEY_REUSED"
+    assert db.query(models.Ticket).count() == 1
+
+
+def test_keys_are_per_user(client, auth, project, db):
+    _post(client, auth, "k1", {"title": "a", "project_id": project["id"]})
+    beto = register(client, "beto")
+    beto_project = client.post("/projects", json={"name": "B", "description": "b"}, headers=beto).json()
+    r = _post(client, beto, "k1", {"title": "a", "project_id": beto_project["id"]})
+    assert r.status_code == 200
+    assert "idempotent-replayed" not in r.headers
+    assert db.query(models.Ticket).count() == 2
+
+
+def test_without_key_every_request_runs(client, auth, project, db):
+    body = {"title": "a", "project_id": project["id"]}
+    client.post("/tickets", json=body, headers=auth)
+    client.post("/tickets", json=body, headers=auth)
+    assert db.query(models.Ticket).count() == 2
+
+
+def test_key_too_long_is_400(client, auth, project):
+    assert _post(client, auth, "x" * 256, {"title": "a", "project_id": project["id"]}).status_code == 400
+
+
+def test_client_errors_are_replayed_too(client, auth):
+    body = {"title": "a", "project_id": 999}
+    assert _post(client, auth, "k1", body).status_code == 400
+    r = _post(client, auth, "k1", body)
+    assert r.status_code == 400
+    assert r.headers["idempotent-replayed"] == "true"
+
+
+def test_server_errors_are_not_stored(auth, project, db, monkeypatch):
+    original = tickets_service.create_ticket
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(tickets_service, "create_ticket", flaky)
+    body = {"title": "a", "project_id": project["id"]}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert _post(client, auth, "k1", body).status_code == 500
+        r = _post(client, auth, "k1", body)
+    assert r.status_code == 200
+    assert "idempotent-replayed" not in r.headers
+    assert len(calls) == 2
+
+
+def test_expired_key_runs_again(client, auth, project, db):
+    body = {"title": "a", "project_id": project["id"]}
+    _post(client, auth, "k1", body)
+    db.query(models.IdempotencyKey).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    r = _post(client, auth, "k1", body)
+    assert "idempotent-replayed" not in r.headers
+    assert db.query(models.Ticket).count() == 2
+
+
+def test_request_in_flight_gets_409(client, auth, project, db, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_TIMEOUT", 0.1)
+    user_id = client.get("/users/me", headers=auth).json()["id"]
+    raw = json.dumps({"title": "a", "project_id": project["id"]}).encode()
+    now = datetime.utcnow()
+    db.add(models.IdempotencyKey(
+        user_id=user_id, key="k1", request_hash=request_hash("POST", "/tickets", b"", raw),
+        status="in_flight", created_at=now, expires_at=now + timedelta(hours=1),
+    ))
+    db.commit()
+
+    headers = {**auth, "Idempotency-Key": "k1", "Content-Type": "application/json"}
+    r = client.post("/tickets", content=raw, headers=headers)
+    assert r.status_code == 409
+    assert r.json()["code"] == "IDEMPOTENCY_IN_PROGRESS"
+
+
+def test_user_is_looked_up_once(client, auth, project, monkeypatch):
+    lookups = []
+
+    def counting(original):
+        def wrapper(*args, **kwargs):
+            lookups.append(1)
+            return original(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(users_repo, "get_by_username", counting(users_repo.get_by_username))
+    monkeypatch.setattr(deps, "get_user_by_username", counting(deps.get_user_by_username))
+
+    r = _post(client, auth, "k1", {"title": "a", "project_id": project["id"]})
+    assert r.status_code == 200
+    assert len(lookups) == 1
+
+
+def test_purge_is_enqueued_once_per_interval(client, auth, project, db, monkeypatch):
+    monkeypatch.setattr(idempotency, "_last_purge", 0.0)
+    _post(client, auth, "k1", {"title": "a", "project_id": project["id"]})
+    _post(client, auth, "k2", {"title": "b", "project_id": project["id"]})
+    assert db.query(models.Job).filter_by(type="idempotency.purge").count() == 1
+
+    db.query(models.IdempotencyKey).filter_by(key="k1").update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert WorkerPool(workers=1).run_once() is True
+    assert [k for k, in db.query(models.IdempotencyKey.key)] == ["k2"]
@@ -0,0 +1,205 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import jobs
+from app.database import SessionLocal
+from app.jobs import JobSpec, WorkerPool, backoff_delay, enqueue
+from app.models import Job
+from tests.conftest import register
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Registra handlers de prueba sólo para este test."""
+    def add(job_type, func, concurrency=1, max_attempts=3):
+        monkeypatch.setitem(jobs._registry, job_type, JobSpec(func=func, concurrency=concurrency, max_attempts=max_attempts))
+    return add
+
+
+@pytest.fixture
+def pool(db):
+    return WorkerPool(workers=1, poll_interval=0.01)
+
+
+def _make_ready(db, job):
+    # el reintento queda agendado con backoff: lo adelantamos en vez de esperar
+    db.refresh(job)
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+
+def test_backoff_doubles_and_is_capped(monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_BACKOFF_BASE", 2.0)
+    monkeypatch.setattr(jobs, "JOBS_BACKOFF_MAX", 10.0)
+    assert [backoff_delay(n).total_seconds() for n in (1, 2, 3, 4, 5)] == [2, 4, 8, 10, 10]
+
+
+def test_enqueue_rejects_unknown_type(db):
+    with pytest.raises(ValueError):
+        enqueue(db, "no.existe", {})
+
+
+def test_successful_job_stores_result(db, pool, handlers):
+    handlers("test.echo", lambda session, payload: {"echo": payload["x"]})
+    job = enqueue(db, "test.echo", {"x": 7})
+
+    assert pool.run_once() is True
+    db.refresh(job)
+    assert job.status == "succeeded"
+    assert job.result == {"echo": 7}
+    assert job.attempts == 1
+    assert pool.run_once() is False
+
+
+def test_failed_job_is_retried_with_backoff_then_fails(db, pool, handlers):
+    def boom(session, payload):
+        raise RuntimeError("sin conexión")
+    handlers("test.boom", boom, max_attempts=2)
+    job = enqueue(db, "test.boom", {})
+
+    before = datetime.utcnow()
+    assert pool.run_once() is True
+    db.refresh(job)
+    assert job.status == "queued"
+    assert job.attempts == 1
+    assert "sin conexión" in job.error
+    assert job.run_after >= before + backoff_delay(1) - timedelta(seconds=1)
+    # todavía no le toca
+    assert pool.run_once() is False
+
+    _make_ready(db, job)
+    assert pool.run_once() is True
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.attempts == 2
+    assert job.finished_at is not None
+
+
+def test_flaky_job_succeeds_on_retry(db, pool, handlers):
+    calls = []
+
+    def flaky(session, payload):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("timeout")
+        return "ok"
+    handlers("test.flaky", flaky)
+    job = enqueue(db, "test.flaky", {})
+
+    pool.run_once()
+    _make_ready(db, job)
+    pool.run_once()
+    db.refresh(job)
+    assert job.status == "succeeded"
+    assert job.attempts == 2
+    assert job.error is None
+
+
+def test_concurrency_limit_counts_running_jobs_in_the_table(db, pool, handlers):
+    handlers("test.limited", lambda session, payload: None, concurrency=1)
+    handlers("test.free", lambda session, payload: None, concurrency=1)
+    # otro proceso ya tiene uno corriendo
+    running = enqueue(db, "test.limited", {})
+    running.status = "running"
+    running.locked_by = "otro-host:1"
+    running.locked_at = datetime.utcnow()
+    db.commit()
+    queued = enqueue(db, "test.limited", {})
+    other = enqueue(db, "test.free", {})
+
+    assert pool.run_once() is True
+    assert pool.run_once() is False
+    db.refresh(queued)
+    db.refresh(other)
+    assert queued.status == "queued"
+    assert other.status == "succeeded"
+
+    running.status = "succeeded"
+    db.commit()
+    assert pool.run_once() is True
+    db.refresh(queued)
+    assert queued.status == "succeeded"
+
+
+def _stale(db, job, attempts=1):
+    job.status = "running"
+    job.attempts = attempts
+    job.locked_by = "otro-proceso"
+    job.locked_at = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+
+
+def test_stale_running_jobs_are_requeued(db, pool, handlers, monkeypatch):
+    handlers("test.noop", lambda session, payload: None, max_attempts=2)
+    job = enqueue(db, "test.noop", {})
+    exhausted = enqueue(db, "test.noop", {})
+    _stale(db, job, attempts=1)
+    _stale(db, exhausted, attempts=2)
+    monkeypatch.setattr(jobs, "JOBS_STALE_AFTER", 60)
+
+    pool._requeue_stale()
+    db.refresh(job)
+    db.refresh(exhausted)
+    assert job.status == "queued"
+    assert job.locked_by is None
+    # sin intentos restantes no vuelve a la cola
+    assert exhausted.status == "failed"
+    assert exhausted.finished_at is not None
+
+
+def test_requeue_runs_periodically(db, pool, handlers, monkeypatch):
+    handlers("test.noop", lambda session, payload: None)
+    monkeypatch.setattr(jobs, "JOBS_STALE_AFTER", 60)
+    monkeypatch.setattr(jobs, "JOBS_REQUEUE_INTERVAL", 3600)
+    pool._requeue_stale()
+
+    # un worker se cae después del primer barrido
+    job = enqueue(db, "test.noop", {})
+    _stale(db, job)
+    pool._requeue_stale()
+    db.refresh(job)
+    assert job.status == "running"
+
+    monkeypatch.setattr(jobs, "JOBS_REQUEUE_INTERVAL", 0)
+    pool._requeue_stale()
+    db.refresh(job)
+    assert job.status == "queued"
+
+
+def test_running_job_keeps_its_lock_fresh(db, pool, handlers, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_HEARTBEAT_INTERVAL", 0.02)
+    seen = []
+
+    def slow(session, payload):
+        started = datetime.utcnow()
+        time.sleep(0.2)
+        check = SessionLocal()
+        try:
+            seen.append(check.get(Job, payload["id"]).locked_at > started)
+        finally:
+            check.close()
+
+    handlers("test.slow", slow)
+    job = enqueue(db, "test.slow", {})
+    job.payload = {"id": job.id}
+    db.commit()
+
+    assert pool.run_once() is True
+    assert seen == [True]
+    db.refresh(job)
+    assert job.status == "succeeded"
+    assert job.locked_at is None
+
+
+def test_job_status_endpoint_is_scoped_to_owner(client, db):
+    ana = register(client, "ana")
+    beto = register(client, "beto")
+    ana_id = client.get("/users/me", headers=ana).json()["id"]
+    job = enqueue(db, "tickets.archive", {}, owner_id=ana_id)
+
+    r = client.get(f"/jobs/{job.id}", headers=ana)
+    assert r.status_code == 200
+    assert r.json()["status"] == "queued"
+    assert client.get(f"/jobs/{job.id}", headers=beto).status_code == 404
@@ -0,0 +1,107 @@
+import json
+import logging
+import queue
+
+from sqlalchemy import create_engine, text
+
+from app import logs
+from app.logs import (
+    JsonFormatter,
+    RequestIdFilter,
+    TextFormatter,
+    _NonBlockingQueueHandler,
+    fingerprint,
+    fingerprint_id,
+    instrument_engine,
+    request_id_var,
+)
+
+
+def _record(msg="hola %s", args=("mundo",), **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_request_id_is_echoed_or_generated(client):
+    r = client.get("/health/live", headers={"X-Request-ID": "abc-123"})
+    assert r.headers["x-request-id"] == "abc-123"
+
+    generated = client.get("/health/live").headers["x-request-id"]
+    assert len(generated) == 32
+    assert client.get("/health/live").headers["x-request-id"] != generated
+
+    assert len(client.get("/health/live", headers={"X-Request-ID": "x" * 200}).headers["x-request-id"]) == 64
+
+
+def test_filter_takes_the_request_id_from_context():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record()
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    assert record.request_id == "req-1"
+
+
+def test_json_formatter_includes_extras():
+    entry = json.loads(JsonFormatter().format(_record(request_id="req-1", duration_ms=1.5)))
+    assert entry["msg"] == "hola mundo"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-1"
+    assert entry["duration_ms"] == 1.5
+    assert "args" not in entry
+
+
+def test_text_formatter_without_request_id():
+    line = TextFormatter().format(_record())
+    assert line.endswith("INFO app.test [-] hola mundo")
+
+
+def test_queue_handler_resolves_the_message_and_drops_when_full():
+    q = queue.Queue(maxsize=1)
+    handler = _NonBlockingQueueHandler(q)
+    args = ["mundo"]
+    handler.emit(_record(args=(args,)))
+    args.append("cambiado")
+    handler.emit(_record())  # cola llena: se descarta sin bloquear
+
+    queued = q.get_nowait()
+    assert queued.getMessage() == "hola ['mundo']"
+    assert q.empty()
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    a = fingerprint("SELECT * FROM tickets WHERE owner_id = 7 AND title = 'x''y' AND id IN (1, 2, 3)")
+    b = fingerprint("SELECT *  FROM tickets\nWHERE owner_id = 12 AND title = 'z' AND id IN (4)")
+    assert a == b == "SELECT * FROM tickets WHERE owner_id = ? AND title = ? AND id IN (?+)"
+    assert fingerprint("SELECT :owner_id, %(x)s, $1") == "SELECT ?, ?, ?"
+    assert fingerprint_id(a) == fingerprint_id(b)
+
+
+def test_slow_queries_are_logged_with_fingerprint(monkeypatch, caplog):
+    monkeypatch.setattr(logs, "SQL_SLOW_MS", 0.0)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql.slow"), engine.connect() as conn:
+        conn.execute(text("SELECT 1 WHERE 2 = :x"), {"x": 2})
+    record = next(r for r in caplog.records if r.name == "app.sql.slow")
+    assert record.fingerprint == "SELECT ? WHERE ? = ?"
+    assert record.fingerprint_id == fingerprint_id(record.fingerprint)
+    engine.dispose()
+
+
+def test_failed_query_does_not_leak_timers(monkeypatch):
+    monkeypatch.setattr(logs, "SQL_SLOW_MS", 1e9)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("SELECT * FROM no_existe"))
+        except Exception:
+            pass
+        assert conn.info.get("query_start") == []
+    engine.dispose()
@@ -0,0 +1,53 @@
+from tests.conftest import register
+
+
+def _create_tickets(client, auth, project, n):
+    return [
+        client.post("/tickets", json={"title": f"t{i}", "project_id": project["id"]}, headers=auth).json()["id"]
+        for i in range(n)
+    ]
+
+
+def test_get_tickets_by_ids_keeps_order_and_reports_missing(client, auth, project):
+    ids = _create_tickets(client, auth, project, 3)
+
+    r = client.get(f"/tickets?ids={ids[2]},{ids[0]},999,{ids[2]}", headers=auth)
+    assert r.status_code == 200
+    body = r.json()
+    assert [t["id"] for t in body["items"]] == [ids[2], ids[0]]
+    assert body["missing"] == [999]
+    assert body["total"] == 2
+
+
+def test_lookup_in_body(client, auth, project):
+    ids = _create_tickets(client, auth, project, 2)
+
+    body = client.post("/tickets/lookup", json={"ids": [ids[1], 777]}, headers=auth).json()
+    assert [t["id"] for t in body["items"]] == [ids[1]]
+    assert body["missing"] == [777]
+
+
+def test_other_owners_tickets_are_reported_missing(client, auth, project):
+    [ticket_id] = _create_tickets(client, auth, project, 1)
+    other = register(client, "beto")
+
+    body = client.get(f"/tickets?ids={ticket_id}", headers=other).json()
+    assert body["items"] == []
+    assert body["missing"] == [ticket_id]
+
+
+def test_projects_by_ids(client, auth, project):
+    body = client.get(f"/projects?ids={project['id']},4242", headers=auth).json()
+    assert [p["id"] for p in body["items"]] == [project["id"]]
+    assert body["missing"] == [4242]
+
+
+def test_plain_listing_has_no_missing(client, auth, project):
+    _create_tickets(client, auth, project, 1)
+    assert client.get("/tickets", headers=auth).json()["missing"] is None
+
+
+def test_invalid_and_too_many_ids_are_rejected(client, auth):
+    assert client.get("/tickets?ids=a,b", headers=auth).status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 202))
+    assert client.get(f"/tickets?ids={too_many}", headers=auth).status_code == 400
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.database import engine
+from app.ownership import ProjectOwnershipIndex, project_ownership
+from app.repos import projects_repo
+from tests.conftest import register
+
+
+class Loader:
+    def __init__(self, *ids):
+        self.ids = set(ids)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.ids)
+
+
+def test_index_reuses_one_load_per_owner():
+    index = ProjectOwnershipIndex(ttl=60)
+    loader = Loader(1, 2)
+    assert index.get(7, loader) == {1, 2}
+    loader.ids.add(3)
+    assert index.get(7, loader) == {1, 2}
+    assert loader.calls == 1
+
+    assert index.get(7, loader, refresh=True) == {1, 2, 3}
+    index.invalidate(7)
+    index.get(7, loader)
+    assert loader.calls == 3
+
+
+def test_index_expires_and_evicts():
+    expired = ProjectOwnershipIndex(ttl=0)
+    loader = Loader(1)
+    expired.get(1, loader)
+    expired.get(1, loader)
+    assert loader.calls == 2
+
+    small = ProjectOwnershipIndex(ttl=60, max_owners=2)
+    loaders = {owner: Loader(owner) for owner in (1, 2, 3)}
+    for owner in (1, 2, 1, 3, 1, 2):
+        small.get(owner, loaders[owner])
+    assert [loaders[o].calls for o in (1, 2, 3)] == [1, 2, 1]
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    original = projects_repo.project_ids_by_owner
+
+    def counting(db, owner_id):
+        calls.append(owner_id)
+        return original(db, owner_id)
+
+    monkeypatch.setattr(projects_repo, "project_ids_by_owner", counting)
+    return calls
+
+
+def _create(client, auth, project_id, title="t"):
+    return client.post("/tickets", json={"title": title, "project_id": project_id}, headers=auth)
+
+
+def test_ticket_writes_share_one_ownership_load(client, auth, project, loads):
+    for i in range(3):
+        assert _create(client, auth, project["id"], f"t{i}").status_code == 200
+    assert client.get(f"/tickets?project_id={project['id']}", headers=auth).json()["total"] == 3
+    assert len(loads) == 1
+
+
+def test_new_project_is_usable_right_away(client, auth, project, loads):
+    _create(client, auth, project["id"])
+    other = client.post("/projects", json={"name": "Otro", "description": "x"}, headers=auth).json()
+    assert _create(client, auth, other["id"]).status_code == 200
+
+
+def test_project_created_elsewhere_is_found_on_reload(client, auth, project, db, loads):
+    _create(client, auth, project["id"])
+    # otro proceso: el cache de este no se enteró
+    owner_id = client.get("/users/me", headers=auth).json()["id"]
+    created = projects_repo.create(db, owner_id=owner_id, name="De otro worker", description="x")
+    assert _create(client, auth, created.id).status_code == 200
+    assert len(loads) == 2
+
+
+def test_foreign_project_is_rejected(client, auth, project):
+    beto = register(client, "beto")
+    assert _create(client, beto, project["id"]).status_code == 400
+    assert client.get(f"/tickets?project_id={project['id']}", headers=beto).status_code == 400
+
+
+def test_deleting_flag_is_read_fresh_on_writes(client, auth, project, db):
+    ticket = _create(client, auth, project["id"]).json()
+    # otro proceso marca el proyecto para borrar; el cache sigue diciendo que es del owner
+    db.query(models.Project).filter_by(id=project["id"]).update({"deleting_at": datetime.utcnow()})
+    db.commit()
+
+    r = _create(client, auth, project["id"])
+    assert r.status_code == 400
+    assert "eliminando" in r.json()["detail"]
+    assert client.put(f"/tickets/{ticket['id']}", json={"title": "sigue editable"}, headers=auth).status_code == 200
+
+
+def test_project_deleted_elsewhere_is_rejected_and_dropped_from_cache(client, auth, project, db, loads):
+    _create(client, auth, project["id"])
+    db.query(models.Ticket).delete()
+    db.query(models.Project).filter_by(id=project["id"]).delete()
+    db.commit()
+
+    assert _create(client, auth, project["id"]).status_code == 400
+    # el conjunto cacheado todavía lo tenía: se descarta y el próximo request recarga
+    assert loads == [loads[0]]
+    assert project_ownership._owners == {}
+
+
+def test_project_check_rides_on_the_ticket_write(client, auth, project):
+    ticket = _create(client, auth, project["id"]).json()
+    other = client.post("/projects", json={"name": "Otro", "description": "x"}, headers=auth).json()
+    _create(client, auth, other["id"])
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert _create(client, auth, project["id"]).status_code == 200
+        assert client.put(f"/tickets/{ticket['id']}", json={"project_id": other["id"]}, headers=auth).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert not [s for s in statements if s.startswith("SELECT") and "FROM projects" in s]
+    writes = [s for s in statements if s.startswith(("INSERT INTO tickets", "UPDATE tickets"))]
+    assert len(writes) == 2
+    assert all("FROM projects" in s and "deleting_at IS NULL" in s for s in writes)
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.database import SessionLocal
+from app.jobs import WorkerPool
+from app.repos import projects_repo
+from app.services import archive_service, projects_service
+
+
+def _create(client, auth, project, title, **fields):
+    r = client.post("/tickets", json={"title": title, "project_id": project["id"], **fields}, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _project(client, auth):
+    return client.get("/projects", headers=auth).json()["items"][0]
+
+
+def test_empty_project_is_deleted_right_away(client, auth, project):
+    r = client.delete(f"/projects/{project['id']}", headers=auth)
+    assert r.status_code == 200
+    assert client.get(f"/projects/{project['id']}", headers=auth).status_code == 404
+
+
+def test_project_with_tickets_needs_cascade(client, auth, project):
+    _create(client, auth, project, "t")
+    assert client.delete(f"/projects/{project['id']}", headers=auth).status_code == 400
+    assert client.get(f"/projects/{project['id']}", headers=auth).json()["deleting_at"] is None
+
+
+def test_cascade_is_accepted_and_idempotent(client, auth, project, db):
+    for i in range(3):
+        _create(client, auth, project, f"t{i}")
+
+    r = client.delete(f"/projects/{project['id']}?cascade=true", headers=auth)
+    assert r.status_code == 202
+    body = r.json()
+    assert body["deleting_at"] is not None
+    assert (body["purge_total"], body["purge_done"]) == (3, 0)
+
+    again = client.delete(f"/projects/{project['id']}?cascade=true", headers=auth)
+    assert again.status_code == 202
+    assert again.json()["purge_job_id"] == body["purge_job_id"]
+    assert db.query(models.Job).filter_by(type="projects.purge").count() == 1
+    assert client.delete(f"/projects/{project['id']}", headers=auth).status_code == 400
+
+
+def test_project_is_marked_before_the_job_is_enqueued(client, auth, project, monkeypatch):
+    _create(client, auth, project, "t")
+    original = projects_service.enqueue
+    seen = []
+
+    def spy(db, *args, **kwargs):
+        # otra conexión: lo que ve un worker que tome el job apenas existe
+        other = SessionLocal()
+        try:
+            seen.append(other.get(models.Project, project["id"]).deleting_at)
+        finally:
+            other.close()
+        return original(db, *args, **kwargs)
+
+    monkeypatch.setattr(projects_service, "enqueue", spy)
+    assert client.delete(f"/projects/{project['id']}?cascade=true", headers=auth).status_code == 202
+    assert len(seen) == 1 and seen[0] is not None
+
+
+def test_marked_project_without_job_is_enqueued_again(client, auth, project, db):
+    _create(client, auth, project, "t")
+    row = db.get(models.Project, project["id"])
+    projects_repo.mark_deleting(db, row, 1)
+
+    r = client.delete(f"/projects/{project['id']}?cascade=true", headers=auth)
+    assert r.status_code == 202
+    job_id = r.json()["purge_job_id"]
+    assert job_id is not None
+    assert db.query(models.Job).filter_by(type="projects.purge").count() == 1
+    db.expire_all()
+    assert db.get(models.Project, project["id"]).purge_job_id == job_id
+
+
+def test_deleting_project_rejects_writes(client, auth, project):
+    ticket = _create(client, auth, project, "t")
+    other = client.post("/projects", json={"name": "Otro", "description": "x"}, headers=auth).json()
+    elsewhere = _create(client, auth, other, "afuera")
+    client.delete(f"/projects/{project['id']}?cascade=true", headers=auth)
+
+    assert client.post("/tickets", json={"title": "n", "project_id": project["id"]}, headers=auth).status_code == 400
+    assert client.put(f"/projects/{project['id']}", json={"name": "x"}, headers=auth).status_code == 400
+    moved = client.put(f"/tickets/{elsewhere['id']}", json={"project_id": project["id"]}, headers=auth)
+    assert moved.status_code == 400
+    # los tickets que ya estaban se siguen pudiendo leer hasta que el purge los borre
+    assert client.get(f"/tickets/{ticket['id']}", headers=auth).status_code == 200
+
+
+def test_purge_job_removes_tickets_and_project(client, auth, project, db):
+    me = client.get("/users/me", headers=auth).json()
+    tickets = [_create(client, auth, project, f"t{i}", assigned_to_id=me["id"]) for i in range(3)]
+    client.post(f"/tickets/{tickets[0]['id']}/attachments", files={"file": ("a.txt", b"hola")}, headers=auth)
+    token = client.get("/tickets/changes", headers=auth).json()["next_token"]
+
+    job_id = client.delete(f"/projects/{project['id']}?cascade=true", headers=auth).json()["purge_job_id"]
+    assert WorkerPool(workers=1).run_once() is True
+
+    job = client.get(f"/jobs/{job_id}", headers=auth).json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"deleted": 3}
+    assert client.get(f"/projects/{project['id']}", headers=auth).status_code == 404
+    assert db.query(models.Ticket).count() == 0
+    assert db.query(models.TicketAttachment).count() == 0
+    assert db.query(models.BlobRef).count() == 0
+    assert db.get(models.User, me["id"]).assigned_open_count == 0
+
+    changes = client.get(f"/tickets/changes?since={token}", headers=auth).json()
+    assert sorted(changes["deleted_tickets"]) == sorted(t["id"] for t in tickets)
+    assert changes["deleted_projects"] == [project["id"]]
+
+
+def test_purge_reports_progress_and_resumes(client, auth, project, db, monkeypatch):
+    for i in range(5):
+        _create(client, auth, project, f"t{i}")
+    client.delete(f"/projects/{project['id']}?cascade=true", headers=auth)
+
+    original = projects_repo.delete_ticket_batch
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("se cortó")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(projects_repo, "delete_ticket_batch", flaky)
+    with pytest.raises(RuntimeError):
+        projects_service.purge_project(db, project["id"], batch_size=2)
+    db.rollback()
+
+    progress = _project(client, auth)
+    assert (progress["purge_done"], progress["purge_total"]) == (2, 5)
+
+    assert projects_service.purge_project(db, project["id"], batch_size=2) == 3
+    assert client.get(f"/projects/{project['id']}", headers=auth).status_code == 404
+
+
+def test_purge_includes_archived_tickets(client, auth, project, db):
+    ticket = _create(client, auth, project, "viejo", status="closed")
+    db.query(models.Ticket).update({"closed_at": datetime.utcnow() - timedelta(days=365)})
+    db.commit()
+    archive_service.archive_closed_tickets(db, 90)
+    _create(client, auth, project, "nuevo")
+
+    client.delete(f"/projects/{project['id']}?cascade=true", headers=auth)
+    assert projects_service.purge_project(db, project["id"]) == 2
+    assert db.get(models.ArchivedTicket, ticket["id"]) is None
@@ -0,0 +1,195 @@
+import os
+import subprocess
+import sys
+import textwrap
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+from app.sharding import HashRing, IdAllocator, ShardMap, parse_shard_urls
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parse_shard_urls():
+    assert parse_shard_urls(" s1 = sqlite:///a.db,s2=postgresql+psycopg2://h/db?x=1 ,basura") == {
+        "s1": "sqlite:///a.db",
+        "s2": "postgresql+psycopg2://h/db?x=1",
+    }
+    assert parse_shard_urls("") == {}
+    with pytest.raises(ValueError):
+        parse_shard_urls("directory=sqlite:///x.db")
+
+
+def test_ring_spreads_owners_and_moves_few_when_growing():
+    keys = [str(i) for i in range(3000)]
+    two = HashRing(["s1", "s2"])
+    three = HashRing(["s1", "s2", "s3"])
+
+    before = {k: two.node_for(k) for k in keys}
+    after = {k: three.node_for(k) for k in keys}
+    assert before == {k: HashRing(["s2", "s1"]).node_for(k) for k in keys}
+
+    counts = Counter(after.values())
+    assert all(600 < n < 1400 for n in counts.values()), counts
+    moved = [k for k in keys if before[k] != after[k]]
+    # sólo se mueven owners hacia el shard nuevo, y alrededor de un tercio
+    assert {after[k] for k in moved} == {"s3"}
+    assert 0.2 < len(moved) / len(keys) < 0.45
+
+
+@pytest.fixture
+def directory(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path}/dir.db")
+    Base.metadata.tables["owner_shards"].create(eng)
+    Base.metadata.tables["id_blocks"].create(eng)
+    yield eng
+    eng.dispose()
+
+
+def test_placement_is_pinned_in_the_directory(directory):
+    two = ShardMap(["s1", "s2"], directory, pin_ttl=60)
+    placed = {owner: two.shard_for(owner) for owner in range(1, 40)}
+    assert set(placed.values()) == {"s1", "s2"}
+
+    # con un shard más el anillo cambia, pero los owners ya vistos no se mueven
+    three = ShardMap(["s1", "s2", "s3"], directory, pin_ttl=60)
+    assert {owner: three.shard_for(owner) for owner in placed} == placed
+    assert any(three.ring_shard(owner) == "s3" for owner in placed)
+
+
+def test_placement_cache_and_lock(directory):
+    shard_map = ShardMap(["s1", "s2"], directory, pin_ttl=60)
+    shard = shard_map.shard_for(7)
+    assert shard_map.is_locked(7) is False
+
+    with directory.begin() as conn:
+        conn.execute(text("UPDATE owner_shards SET locked = 1 WHERE owner_id = 7"))
+    assert shard_map.is_locked(7) is False  # sigue cacheado hasta el TTL
+    shard_map.invalidate(7)
+    assert shard_map.is_locked(7) is True
+    assert shard_map.shard_for(7) == shard
+
+
+def test_single_shard_map_never_touches_the_directory():
+    shard_map = ShardMap(["default"], directory_engine=None)
+    assert shard_map.sharded is False
+    assert shard_map.shard_for(1) == "default"
+    assert shard_map.is_locked(1) is False
+
+
+def test_id_allocator_hands_out_blocks_after_existing_ids(tmp_path, directory):
+    shard = create_engine(f"sqlite:///{tmp_path}/s1.db")
+    Base.metadata.create_all(shard)
+    with shard.begin() as conn:
+        conn.execute(text("INSERT INTO archived_tickets (id, title, project_id, owner_id, archived_at) VALUES (41, 'viejo', 1, 1, '2026-01-01')"))
+
+    first = IdAllocator(directory, {"s1": shard}, block_size=3)
+    second = IdAllocator(directory, {"s1": shard}, block_size=3)
+    ids = [first.next_id("tickets"), second.next_id("tickets"), first.next_id("tickets"), first.next_id("tickets"), first.next_id("tickets")]
+    assert ids == [42, 45, 43, 44, 48]
+    assert first.next_id("projects") == 1
+    shard.dispose()
+
+
+# El engine y el ShardedSession se arman al importar app.database, así que
+# el recorrido con dos shards corre en un proceso aparte con su propio entorno.
+SHARDED_SCRIPT = textwrap.dedent("""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, text
+
+    from app import rebalance
+    from app.database import shard_map
+    from app.limiter import limiter
+    from app.main import app
+
+    limiter.enabled = False
+    tmp = os.environ["TMP"]
+
+    def count(name, table):
+        eng = create_engine(f"sqlite:///{tmp}/{name}.db")
+        with eng.connect() as conn:
+            n = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+        eng.dispose()
+        return n
+
+    def register(client, username):
+        client.post("/users", json={"username": username, "password": "secreto123", "full_name": username, "email": f"{username}@example.com"})
+        token = client.post("/token", data={"username": username, "password": "secreto123"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        users = {f"u{i}": register(client, f"u{i}") for i in range(6)}
+        me = {name: client.get("/users/me", headers=h).json()["id"] for name, h in users.items()}
+        placed = {name: shard_map.shard_for(me[name]) for name in users}
+        assert set(placed.values()) == {"s1", "s2"}, placed
+
+        ticket_ids = []
+        for name, headers in users.items():
+            project = client.post("/projects", json={"name": name, "description": "d"}, headers=headers).json()
+            for k in range(2):
+                r = client.post("/tickets", json={"title": f"{name}-{k}", "project_id": project["id"], "assigned_to_id": me["u0"]}, headers=headers)
+                assert r.status_code == 200, r.text
+                ticket_ids.append(r.json()["id"])
+            client.post(f"/tickets/{ticket_ids[-1]}/attachments", files={"file": ("a.txt", b"mismo contenido")}, headers=headers)
+
+        # ids globales, filas sólo en el shard de cada owner
+        assert len(set(ticket_ids)) == len(ticket_ids)
+        assert count("dir", "tickets") == 0
+        per_shard = {s: sum(2 for n in users if placed[n] == s) for s in ("s1", "s2")}
+        assert {s: count(s, "tickets") for s in ("s1", "s2")} == per_shard
+        for name, headers in users.items():
+            assert client.get("/tickets", headers=headers).json()["total"] == 2
+
+        # la bandeja del asignado junta tickets de los dos shards
+        inbox = client.get("/users/me/assigned?limit=100", headers=users["u0"]).json()
+        assert sorted(t["id"] for t in inbox["items"]) == sorted(ticket_ids)
+        assert inbox["open_count"] == len(ticket_ids)
+
+        # el blob es compartido entre shards: borrar un adjunto no lo borra
+        assert count("dir", "blob_refs") == 1
+        first = ticket_ids[1]
+        att = client.get(f"/tickets/{first}/attachments", headers=users["u0"]).json()[0]
+        assert client.delete(f"/tickets/{first}/attachments/{att['id']}", headers=users["u0"]).status_code in (200, 204)
+        last = ticket_ids[-1]
+        att = client.get(f"/tickets/{last}/attachments", headers=users["u5"]).json()[0]
+        assert client.get(f"/tickets/{last}/attachments/{att['id']}", headers=users["u5"]).content == b"mismo contenido"
+
+        # mover un owner de shard: sigue viendo lo suyo y puede escribir
+        source = placed["u1"]
+        target = "s2" if source == "s1" else "s1"
+        rebalance.move_owner(me["u1"], target)
+        assert shard_map.shard_for(me["u1"]) == target
+        items = client.get("/tickets", headers=users["u1"]).json()["items"]
+        assert len(items) == 2
+        assert client.put(f"/tickets/{items[0]['id']}", json={"title": "movido"}, headers=users["u1"]).status_code == 200
+
+        # mientras está bloqueado, sus requests reciben 503
+        rebalance._set_placement(me["u2"], placed["u2"], locked=True)
+        assert client.get("/tickets", headers=users["u2"]).status_code == 503
+        rebalance._set_placement(me["u2"], placed["u2"], locked=False)
+        assert client.get("/tickets", headers=users["u2"]).status_code == 200
+    print("ok")
+""")
+
+
+def test_two_shards_end_to_end(tmp_path):
+    env = {
+        **os.environ,
+        "TMP": str(tmp_path),
+        "DATABASE_URL": f"sqlite:///{tmp_path}/dir.db",
+        "SHARD_URLS": f"s1=sqlite:///{tmp_path}/s1.db,s2=sqlite:///{tmp_path}/s2.db",
+        "SHARD_PIN_TTL": "0",
+        "ATTACHMENTS_DIR": str(tmp_path / "attachments"),
+        "JOBS_RUN_IN_APP": "0",
+        "DB_POOL_WARM": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", "import os\n" + SHARDED_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-3000:]
+    assert result.stdout.strip().endswith("ok")
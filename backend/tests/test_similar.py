@@ -0,0 +1,80 @@
+from app import minhash, models
+from tests.conftest import register
+
+TITLE = "Error 500 al exportar el reporte mensual de ventas"
+
+
+def _create(client, auth, project_id, title, description=None):
+    body = {"title": title, "description": description, "project_id": project_id}
+    r = client.post("/tickets", json=body, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_signatures_are_deterministic_and_normalized():
+    a = minhash.signature("Exportación falla", "con acentos")
+    b = minhash.signature("EXPORTACION falla", "con acentos")
+    assert a == b
+    assert minhash.unpack(minhash.pack(a)) == a
+    assert minhash.similarity(a, b) == 1.0
+    assert minhash.similarity(a, minhash.signature("algo totalmente distinto", None)) < 0.2
+
+
+def test_short_text_has_no_signature():
+    assert minhash.signature("hola", None) is None
+    assert minhash.signature("", "") is None
+    # firmas vacías guardadas antes del mínimo de shingles no se parecen a nada
+    empty = [minhash._MAX32] * minhash.MINHASH_PERM
+    assert minhash.similarity(empty, empty) == 0.0
+
+
+def test_create_reports_possible_duplicates(client, auth, project):
+    first = _create(client, auth, project["id"], TITLE)
+    assert first["possible_duplicates"] == []
+
+    second = _create(client, auth, project["id"], TITLE.replace("mensual", "anual"))
+    dupes = second["possible_duplicates"]
+    assert [d["id"] for d in dupes] == [first["id"]]
+    assert 0.5 <= dupes[0]["similarity"] < 1
+
+    unrelated = _create(client, auth, project["id"], "Cambiar el logo de la pantalla de inicio")
+    assert unrelated["possible_duplicates"] == []
+
+
+def test_short_titles_get_no_buckets_and_no_matches(client, auth, project, db):
+    a = _create(client, auth, project["id"], "Bug")
+    b = _create(client, auth, project["id"], "Bug")
+    assert b["possible_duplicates"] == []
+    assert db.query(models.TicketLshBucket).filter(models.TicketLshBucket.ticket_id.in_([a["id"], b["id"]])).count() == 0
+    assert client.get(f"/tickets/{a['id']}/similar", headers=auth).json() == []
+
+
+def test_similar_scope(client, auth, project):
+    other = client.post("/projects", json={"name": "Otro", "description": "x"}, headers=auth).json()
+    original = _create(client, auth, project["id"], TITLE)
+    copy = _create(client, auth, other["id"], TITLE + " otra vez")
+
+    owner_wide = client.get(f"/tickets/{original['id']}/similar", headers=auth).json()
+    assert [s["id"] for s in owner_wide] == [copy["id"]]
+    assert owner_wide[0]["project_id"] == other["id"]
+
+    same_project = client.get(f"/tickets/{original['id']}/similar?scope=project", headers=auth).json()
+    assert same_project == []
+
+    assert client.get(f"/tickets/{original['id']}/similar?scope=todo", headers=auth).status_code == 400
+
+
+def test_editing_the_title_refreshes_the_signature(client, auth, project):
+    original = _create(client, auth, project["id"], TITLE)
+    other = _create(client, auth, project["id"], "Cambiar el logo de la pantalla de inicio")
+    assert client.get(f"/tickets/{other['id']}/similar", headers=auth).json() == []
+
+    client.put(f"/tickets/{other['id']}", json={"title": TITLE}, headers=auth)
+    assert [s["id"] for s in client.get(f"/tickets/{other['id']}/similar", headers=auth).json()] == [original["id"]]
+
+
+def test_duplicates_are_per_owner(client, auth, project):
+    _create(client, auth, project["id"], TITLE)
+    beto = register(client, "beto")
+    beto_project = client.post("/projects", json={"name": "B", "description": "b"}, headers=beto).json()
+    assert _create(client, beto, beto_project["id"], TITLE)["possible_duplicates"] == []
@@ -0,0 +1,80 @@
+from app import models
+from app.repos.tickets_repo import _like_literal
+from app.suggest import SuggestIndex
+from tests.conftest import register
+
+
+def _suggest(client, auth, q, limit=10):
+    r = client.get("/tickets/suggest", params={"q": q, "limit": limit}, headers=auth)
+    assert r.status_code == 200, r.text
+    return [s["title"] for s in r.json()]
+
+
+def _create(client, auth, project, title):
+    r = client.post("/tickets", json={"title": title, "project_id": project["id"]}, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_prefix_before_substring_before_fuzzy(client, auth, project):
+    for title in ["Error al guardar", "Login con error", "Eror de tipeo", "Exportar CSV"]:
+        _create(client, auth, project, title)
+
+    assert _suggest(client, auth, "error") == ["Error al guardar", "Login con error", "Eror de tipeo"]
+    assert _suggest(client, auth, "error", limit=1) == ["Error al guardar"]
+
+
+def test_index_follows_writes(client, auth, project):
+    ticket = _create(client, auth, project, "Pantalla en blanco")
+    assert _suggest(client, auth, "pant") == ["Pantalla en blanco"]
+
+    # el índice ya está cargado: crear, renombrar y borrar lo actualizan en el lugar
+    _create(client, auth, project, "Pantallazo azul")
+    client.put(f"/tickets/{ticket['id']}", json={"title": "Menú roto"}, headers=auth)
+    assert _suggest(client, auth, "pant") == ["Pantallazo azul"]
+    assert _suggest(client, auth, "menú") == ["Menú roto"]
+
+    client.delete(f"/tickets/{ticket['id']}", headers=auth)
+    assert _suggest(client, auth, "menú") == []
+
+
+def test_suggestions_are_per_owner(client, auth, project):
+    _create(client, auth, project, "Factura duplicada")
+    other = register(client, "beto")
+    assert _suggest(client, other, "factura") == []
+
+
+def test_blank_query(client, auth):
+    assert client.get("/tickets/suggest", params={"q": "   "}, headers=auth).json() == []
+    assert client.get("/tickets/suggest", params={"q": ""}, headers=auth).status_code == 422
+
+
+def test_index_evicts_least_recently_used_owner():
+    index = SuggestIndex(max_owners=2)
+    loads = []
+
+    def loader(owner_id):
+        def load():
+            loads.append(owner_id)
+            return [(owner_id, f"ticket {owner_id}")]
+        return load
+
+    for owner_id in (1, 2, 1, 3, 1, 2):
+        index.search(owner_id, "ticket", 5, 1000, loader(owner_id))
+    # 1 se usa seguido y sobrevive; 2 sale al entrar 3 y se vuelve a cargar
+    assert loads == [1, 2, 3, 2]
+
+
+def test_like_literal_escapes_wildcards(db):
+    assert _like_literal("50%_a\\b") == "50\\%\\_a\\\\b"
+
+    for title in ["100% listo", "1000 listos", "a_b", "axb"]:
+        db.add(models.Ticket(title=title, project_id=1, owner_id=1))
+    db.commit()
+
+    def matches(q):
+        rows = db.query(models.Ticket.title).filter(models.Ticket.title.ilike(f"%{_like_literal(q)}%", escape="\\"))
+        return sorted(t for t, in rows)
+
+    assert matches("0%") == ["100% listo"]
+    assert matches("_") == ["a_b"]